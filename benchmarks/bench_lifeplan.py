@@ -0,0 +1,247 @@
+"""
+ベンチマーク（計算・表示用の表・アドバイス・グラフ画像・PDF の時間とピークメモリ）
+
+    python benchmarks/bench_lifeplan.py                    # 計って baseline.json のしきい値と比べる（超えたら終了コード1）
+    python benchmarks/bench_lifeplan.py --update-baseline  # 今の結果で baseline.json を作り直す
+
+画面（Streamlit）は使わないので、ディスプレイの無い Linux でも動きます。
+期間は短い（6年）・画面の既定値（40年）・60年 の3通りです。
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+# 日本語フォントの無いマシンでは、グラフ画像のたびに「字が無い」警告が大量に出るので止める
+warnings.filterwarnings("ignore", message="Glyph .* missing from font")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lifeplan import (  # noqa: E402
+    INVEST_DEFAULT,
+    calc_lifeplan,
+    calc_lifeplan_result,
+    df_view_for_display,
+    df_to_sticky_html,
+    lumps_to_map,
+    make_money_advice_soft,
+    make_inheritance_advice_soft,
+    run_buckets,
+    sample_returns,
+    stack_invest,
+)
+from lifeplan.report import PDF_REPORT_BUDGET_MS, get_font_registry, make_chart_png, build_pdf_bytes  # noqa: E402
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# しきい値 = 基準値 × (1 + TOLERANCE) + SLACK（短い処理がばらつきで落ちないように、少し余裕を足す）
+TOLERANCE = 0.5
+SLACK_MS = 2.0
+SLACK_KIB = 256
+
+
+# =========================
+# 入力（画面の既定値と同じ。期間だけ変える）
+# =========================
+def _inputs(h_now, h_die, w_now, w_die) -> dict:
+    h_lumps = [(True, 65, 1500.0), (True, 70, 200.0), (False, 80, 0.0)]
+    w_lumps = [(True, 65, 700.0), (True, 72, 300.0), (False, 80, 0.0)]
+    h_spends = [(True, 65, 200.0), (True, 70, 150.0), (True, 88, 100.0)]
+    w_spends = [(True, 60, 50.0), (True, 65, 100.0), (True, 90, 100.0)]
+    return {
+        "h_now": h_now, "h_die": h_die, "w_now": w_now, "w_die": w_die,
+        "start_savings": 1500.0,
+        "h_inc_now": 500.0, "h_g1": 2.0, "h_ch_age": 65, "h_inc_after": 180.0, "h_g2": 1.0,
+        "w_inc_now": 300.0, "w_g1": 2.0, "w_ch_age": 65, "w_inc_after": 160.0, "w_g2": 1.0,
+        "living_params": {
+            "食費": dict(m=8.5, g=2.0, after_years=8, m2=5.5, g2=2.5),
+            "水道光熱費": dict(m=3.5, g=2.0, after_years=8, m2=2.0, g2=2.5),
+            "通信費": dict(m=2.0, g=2.0, after_years=8, m2=0.5, g2=2.5),
+            "交通費": dict(m=2.0, g=2.0, after_years=8, m2=0.8, g2=2.5),
+            "趣味・交際費": dict(m=3.0, g=2.0, after_years=8, m2=0.8, g2=2.5),
+            "医療費": dict(m=1.8, g=2.0, after_years=10, m2=3.0, g2=3.0),
+            "住宅の固定資産税・管理費等": dict(m=3.0, g=2.0, after_years=10, m2=4.0, g2=2.5),
+            "その他": dict(m=6.0, g=2.0, after_years=10, m2=3.0, g2=2.5),
+        },
+        "single_ratio_pct": 75,
+        "h_care_start": 88, "h_care_m": 30.0, "h_care_g": 2.5,
+        "w_care_start": 90, "w_care_m": 35.0, "w_care_g": 2.5,
+        "h_lumps": h_lumps, "w_lumps": w_lumps, "h_spends": h_spends, "w_spends": w_spends,
+        "h_lump_map": lumps_to_map(h_lumps), "w_lump_map": lumps_to_map(w_lumps),
+        "h_spend_map": lumps_to_map(h_spends), "w_spend_map": lumps_to_map(w_spends),
+    }
+
+
+HORIZONS = {
+    "short": _inputs(85, 88, 84, 89),      # 6年
+    "default": _inputs(60, 93, 57, 96),    # 40年（画面の既定値）
+    "60y": _inputs(50, 107, 48, 107),      # 60年
+}
+
+
+# 運用の経路数（年ごとに利回りを振った残高の積み上げ）
+INVEST_PATHS = 10000
+
+
+def _cases(inputs: dict) -> list:
+    # (名前, 計る関数)。前の段の結果は先に作っておき、各段はその処理だけを計る
+    df_long, df_table = calc_lifeplan(inputs)
+    inputs_inv = dict(inputs, invest=INVEST_DEFAULT)
+    inv = stack_invest([inputs_inv])
+    T = len(df_long)
+    rets = sample_returns(inv, INVEST_PATHS, T, np.random.default_rng(0))
+    cash_paths = np.broadcast_to(df_long["年間現金収支(万円)"].to_numpy(), (INVEST_PATHS, T))
+    rep = lambda k: np.broadcast_to(inv[k], (INVEST_PATHS,) + inv[k].shape[1:])
+    df_view = df_view_for_display(df_table)
+    res = calc_lifeplan_result(inputs)
+    money = make_money_advice_soft(df_long, df_table)
+    inh = make_inheritance_advice_soft(inputs, df_long)
+    blocks = [("家計へのアドバイス", money), ("相続ワンポイントアドバイス", inh)]
+    return [
+        ("calc_lifeplan", lambda: calc_lifeplan(inputs)),
+        ("calc_lifeplan_invest", lambda: calc_lifeplan(inputs_inv)),
+        # 残高に利回りが付くと年ごとに順番に積み上げるしかないので、経路の方向にまとめて計算できているかを見る
+        ("run_buckets_10000paths", lambda: run_buckets(
+            np.full(INVEST_PATHS, inputs["start_savings"]), cash_paths,
+            rep("inv_alloc"), rets, rep("inv_order"), rep("inv_rebalance"),
+        )),
+        ("df_view_for_display", lambda: df_view_for_display(df_table)),
+        ("df_to_sticky_html", lambda: df_to_sticky_html(df_view)),
+        ("make_money_advice_soft", lambda: make_money_advice_soft(df_long, df_table)),
+        ("make_inheritance_advice_soft", lambda: make_inheritance_advice_soft(inputs, df_long)),
+        ("make_chart_png", lambda: make_chart_png(df_long, "貯蓄残高(万円)", "貯蓄残高")),
+        ("build_pdf_bytes", lambda: build_pdf_bytes(df_view, inputs, df_long, extra_text_blocks=blocks)),
+        # 画面・まとめて作るときと同じ呼び方（結果から直接表を作る）。default は PDF_REPORT_BUDGET_MS と比べる
+        ("build_pdf_from_result", lambda: build_pdf_bytes(None, inputs, res.df_long, extra_text_blocks=blocks, result=res)),
+    ]
+
+
+# =========================
+# 計測
+# =========================
+def _time_ms(fn, repeat: int, min_seconds: float) -> list:
+    # repeat 回、または min_seconds 秒たつまで（少なくとも repeat 回）繰り返す
+    times = []
+    start = time.perf_counter()
+    while len(times) < repeat or (time.perf_counter() - start < min_seconds and len(times) < 100 * repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return times
+
+
+def _peak_kib(fn) -> float:
+    # Python と NumPy の確保量（tracemalloc）。時間の計測とは別に1回だけ実行する
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024.0
+
+
+def run(repeat: int = 5, min_seconds: float = 0.2, only: str = "") -> dict:
+    get_font_registry()
+    results = {}
+    for horizon, inputs in HORIZONS.items():
+        for name, fn in _cases(inputs):
+            key = f"{horizon}/{name}"
+            if only and only not in key:
+                continue
+            fn()  # 1回目（キャッシュ・フォント読み込み）は計らない
+            times = _time_ms(fn, repeat, min_seconds)
+            results[key] = {
+                "median_ms": round(statistics.median(times), 3),
+                "min_ms": round(min(times), 3),
+                "runs": len(times),
+                "peak_kib": round(_peak_kib(fn), 1),
+            }
+    return results
+
+
+def compare(results: dict, baseline: dict) -> list:
+    """しきい値を超えたものを [(キー, 何が, 今回, しきい値)] で返す"""
+    bad = []
+    for key, r in results.items():
+        b = baseline.get("results", {}).get(key)
+        if b is None:
+            continue
+        if r["median_ms"] > b["max_ms"]:
+            bad.append((key, "時間(ms)", r["median_ms"], b["max_ms"]))
+        if r["peak_kib"] > b["max_peak_kib"]:
+            bad.append((key, "ピークメモリ(KiB)", r["peak_kib"], b["max_peak_kib"]))
+    # PDF 1通の時間の目安（基準ファイルとは別に、決めた値を超えたら失敗）
+    r = results.get("default/build_pdf_from_result")
+    if r is not None and r["median_ms"] > PDF_REPORT_BUDGET_MS:
+        bad.append(("default/build_pdf_from_result", "PDF 1通の目安(ms)", r["median_ms"], PDF_REPORT_BUDGET_MS))
+    return bad
+
+
+def make_baseline(results: dict) -> dict:
+    return {
+        "note": "python benchmarks/bench_lifeplan.py --update-baseline で作り直す。max_* を超えると失敗",
+        "machine": f"{platform.python_implementation()} {platform.python_version()} / {platform.machine()}",
+        "tolerance": TOLERANCE,
+        "results": {
+            key: {
+                "median_ms": r["median_ms"],
+                "max_ms": round(r["median_ms"] * (1.0 + TOLERANCE) + SLACK_MS, 1),
+                "peak_kib": r["peak_kib"],
+                "max_peak_kib": round(r["peak_kib"] * (1.0 + TOLERANCE) + SLACK_KIB, 0),
+            }
+            for key, r in results.items()
+        },
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="ライフプランのベンチマーク")
+    ap.add_argument("--repeat", type=int, default=5, help="1つの処理を計る最少回数（既定5）")
+    ap.add_argument("--min-seconds", type=float, default=0.2, help="1つの処理を計る最短時間（秒、既定0.2）")
+    ap.add_argument("--only", default="", help="キー（例 default/build_pdf_bytes）にこの文字を含むものだけ計る")
+    ap.add_argument("--baseline", default=BASELINE_PATH, help="基準ファイル（既定 benchmarks/baseline.json）")
+    ap.add_argument("--update-baseline", action="store_true", help="今回の結果で基準ファイルを作り直す")
+    ap.add_argument("--json", default="", help="結果を JSON で書き出すファイル")
+    args = ap.parse_args(argv)
+
+    results = run(args.repeat, args.min_seconds, args.only)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(f"{'処理':<40} {'中央値ms':>10} {'最小ms':>10} {'しきい値ms':>10} {'ピークKiB':>10}")
+    for key, r in results.items():
+        b = baseline.get("results", {}).get(key, {})
+        print(f"{key:<40} {r['median_ms']:>10.2f} {r['min_ms']:>10.2f} {b.get('max_ms', float('nan')):>10.1f} {r['peak_kib']:>10.0f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=1)
+
+    if args.update_baseline:
+        # --only で一部だけ計ったときは、残りの基準値はそのまま残す
+        new = make_baseline(results)
+        new["results"] = {**baseline.get("results", {}), **new["results"]}
+        with open(args.baseline, "w", encoding="utf-8", newline="\n") as f:
+            json.dump(new, f, ensure_ascii=False, indent=1)
+            f.write("\n")
+        print(f"基準ファイルを更新しました: {args.baseline}")
+        return 0
+
+    bad = compare(results, baseline)
+    for key, what, now, limit in bad:
+        print(f"遅くなっています: {key} {what} {now} > {limit}", file=sys.stderr)
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,59 @@
+"""
+シニア夫婦のライフプラン計算（画面なしで使える部分）
+
+pandas / NumPy だけで読み込めます。PDF は lifeplan.report（reportlab / matplotlib が必要）
+"""
+from .engine import (
+    ITEMS,
+    TABLE_LAYOUT,
+    INVEST_TABLE_LAYOUT,
+    LifePlanResult,
+    lumps_to_map,
+    get_single_start_year_after,
+    stack_inputs,
+    calc_lifeplan_matrix,
+    calc_lifeplan_batch,
+    summarize_batch,
+    calc_lifeplan_rows,
+    calc_lifeplan_result,
+    calc_lifeplan,
+    display_label,
+)
+from .invest import (
+    BUCKETS,
+    BUCKET_ROWS,
+    INVEST_DEFAULT,
+    INVEST_RET_RANGE,
+    INVEST_SD_RANGE,
+    WITHDRAW_ORDERS,
+    normalize_invest,
+    stack_invest,
+    run_buckets,
+    sample_returns,
+)
+from .monthly import (
+    MONTH_KEYS,
+    uses_monthly,
+    stack_months,
+    calc_lifeplan_monthly_matrix,
+    calc_lifeplan_monthly_batch,
+    calc_lifeplan_monthly,
+)
+from .montecarlo import run_monte_carlo
+from .goalseek import solve_max_spending_scale, solve_min_start_savings
+from .sensitivity import run_sensitivity
+from .incremental import IncrementalLifePlan
+from .longevity import run_longevity_grid
+from .timing import StageTimer, timing_enabled
+from .analytics import analyze_result
+from .compare import compare_scenarios
+from .inputs import normalize_record
+from .share import encode_inputs, decode_inputs, inputs_to_json, inputs_from_json, inputs_to_token, inputs_from_token
+from .advice import (
+    make_money_advice_soft,
+    make_money_advice_from_result,
+    make_inheritance_advice_soft,
+    make_inheritance_advice_from_result,
+)
+from .table import df_view_for_display, df_to_sticky_html, result_to_sticky_html, build_inputs_table
+from .cache import inputs_hash, ResultCache, PdfJobs
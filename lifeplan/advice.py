@@ -0,0 +1,204 @@
+"""
+アドバイス文（計算結果を“読むだけ”で作る）
+"""
+from typing import List, Optional
+
+import pandas as pd
+
+from .analytics import analyze_result
+from .engine import LifePlanResult
+
+
+def make_money_advice_soft(
+    df_long: pd.DataFrame,
+    df_table: pd.DataFrame,
+    inputs: Optional[dict] = None
+) -> List[str]:
+    """
+    ✅ 計算結果(df_long, df_table, inputs)を“読むだけ”で文章を作る
+    ※計算式には一切影響しません（出力文章のみ更新）
+    """
+    if df_long is None or len(df_long) == 0:
+        return ["まだ計算結果がありません。入力後に「計算」を押してください。"]
+    return make_money_advice_from_result(LifePlanResult.from_frames(df_long, df_table), inputs)
+
+
+def make_money_advice_from_result(
+    res: Optional[LifePlanResult],
+    inputs: Optional[dict] = None,
+    analytics: Optional[dict] = None,
+) -> List[str]:
+    """
+    make_money_advice_soft の本体：analyze_result の集計を読む（渡されなければここで作る）
+    """
+    if analytics is None:
+        analytics = analyze_result(res, inputs)
+    if analytics is None:
+        return ["まだ計算結果がありません。入力後に「計算」を押してください。"]
+
+    stats = analytics
+    deficit_count = stats["deficit_count"]
+
+    advice: List[str] = []
+
+    # 総評
+    if stats["negative"] is not None:
+        neg = stats["negative"]
+        if neg["stays_negative"]:
+            advice.append(f"🔴 {neg['first_year']}年目から貯蓄残高がマイナスに入り、その状態が最後まで続きます（資金ショート想定）。早めの手当てが必要です。")
+        else:
+            advice.append(f"🔴 {neg['first_year']}年目に貯蓄残高がマイナスに入ります（いったん{neg['last_year']}年目までマイナスが出ます）。早めに対策を考えると安心です。")
+    else:
+        if deficit_count == 0:
+            advice.append("🟢 全体としてとても安定しています（残高も収支も大きな不安が出にくい形です）。")
+        else:
+            advice.append("🟠 年間収支が赤字になる年はありますが、残高がマイナスにはなっていません。落ち着いて確認していきましょう。")
+        advice.append("🌱 シミュレーション期間を通して、貯蓄残高はマイナスになっていません（資金ショートしにくい想定です）。")
+
+    if deficit_count == 0:
+        advice.append("😊 年間の現金収支は全期間でプラスです。大きな支出イベントの年だけ、念のため見ておくと十分です。")
+    else:
+        advice.append(
+            f"📉 年間の現金収支が赤字になる年が {deficit_count} 年あります（連続最大 {stats['max_streak']} 年）。"
+            f"赤字合計は {stats['total_deficit']:,.1f} 万円ほどです。"
+        )
+
+    advice.append(f"🏁 最終年の貯蓄残高（目安）：{stats['final_balance']:,.1f} 万円")
+
+    # “原因の当たり”を具体化（最悪の年）
+    worst = stats["worst"]
+
+    advice.append("—")
+    advice.append(f"🔎 赤字の要因チェック（目安）：いちばん厳しいのは {worst['year']}年目（年間現金収支 {worst['cashflow']:,.1f} 万円）です。")
+    advice.append(f"・内訳の目安：生活費 {worst['living']:,.1f} 万円／介護費 {worst['care']:,.1f} 万円／一時支出 {worst['spend']:,.1f} 万円")
+
+    # 生活費8項目のうち最大項目
+    if worst["max_item"] is not None:
+        advice.append(f"・生活費8項目の中では「{worst['max_item']}」が {worst['max_item_value']:,.1f} 万円/年 と最も大きいです。")
+        advice.append("　もしこの項目（例：食費など）が平均よりかなり大きい設定なら、赤字の大きな原因となっている可能性があります。")
+
+    # ▼ 一時支出：年齢で具体表示（夫/妻/合計）
+    if inputs is not None:
+        h_sp_map = inputs.get("h_spend_map", {}) or {}
+        w_sp_map = inputs.get("w_spend_map", {}) or {}
+
+        if len(h_sp_map) > 0:
+            h_age_max = max(h_sp_map, key=lambda a: float(h_sp_map.get(a, 0.0)))
+            h_amt_max = float(h_sp_map.get(h_age_max, 0.0))
+            if h_amt_max > 0:
+                advice.append(f"・夫の一時支出では **{int(h_age_max)}歳の {h_amt_max:,.1f} 万円** が最大で、赤字の主要因になっている可能性があります。")
+
+        if len(w_sp_map) > 0:
+            w_age_max = max(w_sp_map, key=lambda a: float(w_sp_map.get(a, 0.0)))
+            w_amt_max = float(w_sp_map.get(w_age_max, 0.0))
+            if w_amt_max > 0:
+                advice.append(f"・妻の一時支出では **{int(w_age_max)}歳の {w_amt_max:,.1f} 万円** が最大で、赤字の主要因になっている可能性があります。")
+
+        merged = {}
+        for a, v in h_sp_map.items():
+            try:
+                merged[int(a)] = merged.get(int(a), 0.0) + float(v)
+            except:
+                pass
+        for a, v in w_sp_map.items():
+            try:
+                merged[int(a)] = merged.get(int(a), 0.0) + float(v)
+            except:
+                pass
+        if len(merged) > 0:
+            age_max = max(merged, key=lambda a: float(merged.get(a, 0.0)))
+            amt_max = float(merged.get(age_max, 0.0))
+            if amt_max > 0:
+                advice.append(f"・夫婦合計で見ると **{int(age_max)}歳の一時支出 {amt_max:,.1f} 万円** が最大です（時期調整だけでも改善することがあります）。")
+
+    # 介護費：最大年も表示
+    if stats["care_max"] is not None:
+        advice.append(f"・介護費（夫婦合計）が最大なのは {stats['care_max']['year']}年目で {stats['care_max']['value']:,.1f} 万円です。高め設定なら赤字要因になりやすいので想定の妥当性を確認すると安心です。")
+
+    # 一時収入の影響（安定要因）
+    if stats["lump_max"] is not None:
+        advice.append("—")
+        advice.append(f"💰 一時収入の影響：一時収入（夫婦合計）が最大なのは {stats['lump_max']['year']}年目で {stats['lump_max']['value']:,.1f} 万円です。")
+        advice.append("　退職金などの一時収入が大きい場合、家計の安定維持の大きな要因になっていることがあります。")
+
+    advice.append("—")
+    advice.append("🧭 もっと詳しく知りたい方は、この下の「相談の入り口」にお進みください。")
+    advice.append("💡 ヒント：①一時支出は“時期調整”だけでも効きます ②生活費は“固定費”から ③介護費は少し多め想定で安心です")
+    return advice
+
+
+def make_inheritance_advice_soft(inputs: dict, df_long: pd.DataFrame) -> List[str]:
+    """
+    ✅ 相続は“計算結果を読むだけ”で文章を作る（計算式には影響なし）
+    目的：
+    - 一次相続（先に亡くなる方）の時点で残高が多い場合の注意喚起
+    - 二次相続リスク（配偶者控除→次の相続で増える可能性）を明確に
+    - 相談導線の文言を追加・表現変更
+    """
+    if inputs is None or df_long is None or len(df_long) == 0:
+        return ["相続アドバイスは、計算後に表示されます。"]
+    return make_inheritance_advice_from_result(inputs, LifePlanResult.from_frames(df_long))
+
+
+def make_inheritance_advice_from_result(
+    inputs: dict,
+    res: Optional[LifePlanResult],
+    analytics: Optional[dict] = None,
+) -> List[str]:
+    """
+    make_inheritance_advice_soft の本体：analyze_result の死亡年の貯蓄残高を読む（渡されなければここで作る）
+    """
+    if inputs is None:
+        return ["相続アドバイスは、計算後に表示されます。"]
+    if analytics is None:
+        analytics = analyze_result(res, inputs)
+    if analytics is None:
+        return ["相続アドバイスは、計算後に表示されます。"]
+
+    deaths = analytics["deaths"]
+
+    # 一次相続：先に亡くなる方（夫・妻とも期間内に亡くなるときだけ）
+    first = None
+    if len(deaths) == 2:
+        h, w = deaths
+        if h["year"] < w["year"]:
+            first = h
+        elif w["year"] < h["year"]:
+            first = w
+
+    advice: List[str] = []
+    advice.append("🕊️ 相続については、まず『いつ頃』『どれくらい残る見込みか』をざっくり掴むだけでも大きな前進です。")
+
+    # それぞれの死亡時残高（目安）
+    for d in deaths:
+        b = d["balance"] if d["balance"] is not None else 0.0
+        advice.append(f"・{d['who']}が {d['die_age']}歳（{d['year']}年目）時点の貯蓄残高目安：{b:,.1f} 万円")
+
+    # 一次相続の注意喚起（残高が大きい場合）
+    # ※しきい値は「目安」：貯蓄だけで判断できないため、控えめに“可能性”表現
+    if first is not None:
+        who, die_age, year_after = first["who"], first["die_age"], first["year"]
+        balv = first["balance"] if first["balance"] is not None else 0.0
+
+        if balv >= 3600.0:
+            advice.append("—")
+            advice.append(f"⚠️ 一次相続の注意：{who}{die_age}歳での死亡時点（{year_after}年目）に、夫婦の貯蓄残高が {balv:,.1f} 万円ほど残る想定です。")
+            advice.append("　これが **すべて亡くなった方の名義** になっている場合、相続税がかかる可能性があります（他の資産も含めて要確認）。")
+            advice.append("　その場合は **二次相続対策も早めに** 考えておく必要があります。")
+
+            advice.append("—")
+            advice.append("📌 二次相続の注意点（超重要）：")
+            advice.append("・一次相続で、配偶者は『配偶者税額控除』を使って相続税をゼロにできる場合があります。")
+            advice.append("・しかしその結果、次に配偶者が亡くなる（二次相続）時に、配偶者の相続財産が大きく増え、二次相続での相続税が増える恐れがあります。ご注意ください。")
+
+    # 表現変更（ご要望どおり）
+    advice.append("—")
+    advice.append("🌿 さらに次の3点を、できる範囲で整えておくと安心です：")
+    advice.append("　① 遺言（特に不動産がある場合は有効）")
+    advice.append("　② もしもの時の連絡先・口座・保険・不動産情報の一覧（家族が困りにくくなります）")
+    advice.append("　③ 生前贈与や名義の整理は『急がず、税や手間を見ながら』でOKです")
+
+    advice.append("—")
+    advice.append("🧭 もっと詳しく知りたい方は、この下の「相談の入り口」にお進みください。")
+    advice.append("📌 これらについてもさらに詳しく知りたい方は、この下の「相談の入り口」よりお進みください。")
+    return advice
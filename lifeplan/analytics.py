@@ -0,0 +1,119 @@
+"""
+計算結果の集計（最低残高・赤字の続く期間・いちばん厳しい年の内訳・死亡年の残高など）
+アドバイス・PDF・相談テンプレはここで1回だけ作った値を読む
+"""
+from typing import Optional
+
+import numpy as np
+
+from .engine import ITEMS, LifePlanResult
+
+
+# =========================
+# 集計（1つの計算結果につき1回）
+# =========================
+def _streaks(mask: np.ndarray) -> list:
+    # True が続く区間を [(開始位置, 長さ), ...] で返す（前後に False を足して、変わり目の位置から求める）
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return list(zip(starts.tolist(), (ends - starts).tolist()))
+
+
+def _death_year(now_age: int, die_age: int) -> Optional[int]:
+    # 何年目に亡くなるか（到達しないなら None）
+    return (die_age - now_age + 1) if die_age >= now_age else None
+
+
+def analyze_result(res: Optional[LifePlanResult], inputs: Optional[dict] = None) -> Optional[dict]:
+    """
+    計算結果を1回だけ読んで、アドバイスなどで使う値をまとめる（結果が無ければ None）
+    - "min_balance" / "min_year": 最低貯蓄残高（万円）とその年目、"final_balance": 最終年の残高
+    - "negative": 残高がマイナスの年があれば {"first_year", "last_year", "stays_negative"}、無ければ None
+    - "deficit_count" / "total_deficit": 現金収支が赤字の年数と赤字の合計（万円）
+    - "deficit_streaks": 赤字が続く期間 [(開始年目, 年数), ...]、"max_streak": その最長
+    - "worst": 現金収支がいちばん厳しい年 {"year", "cashflow", "living", "care", "spend", "max_item", "max_item_value"}
+    - "care_max" / "lump_max": 介護費・一時収入（夫婦合計）が最大の年 {"year", "value"}（0 なら None）
+    - "deaths": inputs があるとき、夫・妻それぞれ {"who", "die_age", "year", "balance"}（期間外の年は balance が None）
+    """
+    if res is None or res.n_years == 0:
+        return None
+
+    cash = res.row("現金収支")
+    bal = res.row("貯蓄残高")
+    years = res.years
+    zeros = np.zeros(len(years))
+
+    def _row_or_zeros(label: str) -> np.ndarray:
+        r = res.row(label)
+        return zeros if r is None else r
+
+    # 生活費合計（年額）：項目の順に足す
+    item_rows = [res.row(nm) for nm in ITEMS]
+    has_items = all(r is not None for r in item_rows)
+    items = np.stack(item_rows) if has_items else None
+    living_total = items.sum(axis=0) if has_items else zeros
+    care_total = _row_or_zeros("介護費 夫") + _row_or_zeros("介護費 妻")
+    spend_total = _row_or_zeros("一時支出 夫") + _row_or_zeros("一時支出 妻")
+    lump_total = _row_or_zeros("一時収入 夫") + _row_or_zeros("一時収入 妻")
+
+    min_idx = int(np.argmin(bal))
+
+    negative = None
+    neg_idx = np.flatnonzero(bal < 0)
+    if len(neg_idx):
+        negative = {
+            "first_year": int(years[neg_idx[0]]),
+            "last_year": int(years[neg_idx[-1]]),
+            "stays_negative": bool(np.all(bal[neg_idx[0]:] < 0)),
+        }
+
+    deficit_mask = cash < 0
+    streaks = [(int(years[s]), n) for s, n in _streaks(deficit_mask)]
+
+    worst_idx = int(np.argmin(cash))
+    worst = {
+        "year": int(years[worst_idx]),
+        "cashflow": float(cash[worst_idx]),
+        "living": float(living_total[worst_idx]),
+        "care": float(care_total[worst_idx]),
+        "spend": float(spend_total[worst_idx]),
+        "max_item": None,
+        "max_item_value": None,
+    }
+    if has_items:
+        # 同じ額なら ITEMS の先の項目（max(dict) と同じ）
+        j = int(np.argmax(items[:, worst_idx]))
+        worst["max_item"] = ITEMS[j]
+        worst["max_item_value"] = float(items[j, worst_idx])
+
+    def _peak(row: np.ndarray) -> Optional[dict]:
+        i = int(np.argmax(row))
+        return {"year": int(years[i]), "value": float(row[i])} if row[i] > 0 else None
+
+    deaths = []
+    if inputs is not None:
+        n_max = int(years.max())
+        for who, p in [("夫", "h"), ("妻", "w")]:
+            now_age, die_age = int(inputs[f"{p}_now"]), int(inputs[f"{p}_die"])
+            y = _death_year(now_age, die_age)
+            if y is None:
+                continue
+            b = float(bal[years == y][0]) if 1 <= y <= n_max else None
+            deaths.append({"who": who, "die_age": die_age, "year": y, "balance": b})
+
+    return {
+        "n_years": res.n_years,
+        "min_balance": float(bal[min_idx]),
+        "min_year": int(years[min_idx]),
+        "final_balance": float(bal[-1]),
+        "negative": negative,
+        "deficit_count": int(deficit_mask.sum()),
+        "total_deficit": float((-cash[deficit_mask]).sum()) if deficit_mask.any() else 0.0,
+        "deficit_streaks": streaks,
+        "max_streak": max((n for _, n in streaks), default=0),
+        "worst": worst,
+        "care_max": _peak(care_total),
+        "lump_max": _peak(lump_total),
+        "deaths": deaths,
+    }
@@ -0,0 +1,296 @@
+"""
+コマンドラインの一括計算（CSV / JSONL の世帯ファイル → 年次の結果 CSV / Parquet）
+
+    python -m lifeplan households.jsonl -o results.csv --workers 4
+    python -m lifeplan households.csv -o results.parquet --summary-only
+    python -m lifeplan households.jsonl --pdf-zip reports.zip --workers 4   # 1世帯1通の PDF（lifeplan.bulkpdf）
+
+1行（1レコード）が1世帯で、キーは画面の「計算」で作る inputs と同じです。
+ファイルは少しずつ読み、少しずつ書くので、件数が増えてもメモリはほぼ一定です。
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .engine import INVEST_TABLE_LAYOUT, calc_lifeplan_batch, summarize_batch
+from .inputs import normalize_record
+from .invest import BUCKET_ROWS
+from .monthly import calc_lifeplan_monthly_batch, uses_monthly
+
+
+# 年次の出力に入れる行（年齢と金額の行。空行と「単身期開始」は入れない）
+# 運用益と貯蓄残高の内訳（うち現金 など）はいつも書く（まとまりによって列が変わらないように。運用しない世帯は運用益0・全部現金）
+YEAR_COLUMNS = [label for label in INVEST_TABLE_LAYOUT if label is not None and label != "単身期開始"]
+
+
+# =========================
+# 世帯ファイルの読み込み
+# =========================
+def iter_records(path: str, fmt: Optional[str] = None) -> Iterator[Tuple[str, dict]]:
+    """
+    (id, レコード) を1件ずつ返す（ファイル全体は読み込まない）
+    id はレコードの "id" 列、無ければ 1 始まりの通し番号。"-" は標準入力（JSONL）
+    JSON として読めない行は、レコードの代わりに ValueError を返す（その行だけスキップする。record_inputs を参照）
+    """
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            for n, rec in enumerate(csv.DictReader(f), start=1):
+                yield str(rec.pop("id", "") or n), rec
+        else:
+            n = 0
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                n += 1
+                try:
+                    rec = json.loads(line)
+                    if not isinstance(rec, dict):
+                        raise ValueError("1行が1つの {...} になっていません")
+                except ValueError as e:
+                    yield str(n), ValueError(f"{line_no}行目が JSON として読めません（{e}）")
+                    continue
+                yield str(rec.pop("id", "") or n), rec
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+# =========================
+# 計算（ワーカーで実行）
+# =========================
+def batch_frame(inputs_list: List[dict], ids: List[str], summary_only: bool = False) -> pd.DataFrame:
+    """
+    N世帯をまとめて計算し、結果を表にする
+    - 既定：1行 = 1世帯の1年（id, 年目, YEAR_COLUMNS の行, 要約列）
+    - summary_only=True：1行 = 1世帯（id と要約列だけ）
+    要約列は summarize_batch と同じ（最低貯蓄残高・赤字年数・最終貯蓄残高 など）
+    月の入力がある世帯があれば、まとまりごと月次で計算する（月の入力が無い世帯は 1月 として年次と同じ値になる）
+    """
+    if any(uses_monthly(d) for d in inputs_list):
+        res = calc_lifeplan_monthly_batch(inputs_list)
+    else:
+        res = calc_lifeplan_batch(inputs_list)
+    summary = summarize_batch(res)
+    ids = np.asarray(ids, dtype=object)
+    if summary_only:
+        summary.insert(0, "id", ids)
+        return summary
+
+    if "運用益" not in res:
+        # 運用する世帯が無いまとまり：運用しない世帯の値（calc_lifeplan_matrix で運用しない世帯と同じ）
+        zero = np.zeros_like(res["貯蓄残高"])
+        res = dict(res, 運用益=zero, **{nm: (res["貯蓄残高"] if j == 0 else zero) for j, nm in enumerate(BUCKET_ROWS)})
+
+    ii, tt = np.nonzero(res["valid"])
+    cols = {"id": ids[ii], "年目": tt + 1}
+    for label in YEAR_COLUMNS:
+        if label in ["夫年齢", "妻年齢"]:
+            # 亡くなった後の年齢は空欄（整数のまま書けるよう Int64 にする）
+            who = "h" if label == "夫年齢" else "w"
+            cols[label] = pd.array(res[f"{who}_age"][ii, tt], dtype="Int64")
+            cols[label][~res[f"{who}_alive"][ii, tt]] = pd.NA
+        else:
+            cols[label] = res[label][ii, tt]
+    for c in summary.columns:
+        cols[c] = summary[c].to_numpy()[ii]
+    return pd.DataFrame(cols)
+
+
+def record_inputs(rec) -> dict:
+    """iter_records のレコードを inputs にする（読めなかった行・おかしい値は ValueError など）"""
+    if isinstance(rec, Exception):
+        raise rec
+    return normalize_record(rec)
+
+
+def _run_chunk(chunk: List[Tuple[str, dict]], summary_only: bool) -> Tuple[pd.DataFrame, List[str]]:
+    ids, inputs_list, errors = [], [], []
+    for rec_id, rec in chunk:
+        try:
+            inputs_list.append(record_inputs(rec))
+            ids.append(rec_id)
+        except (ValueError, TypeError, KeyError) as e:
+            errors.append(f"{rec_id}: {e}")
+    if not inputs_list:
+        return pd.DataFrame(), errors
+    return batch_frame(inputs_list, ids, summary_only=summary_only), errors
+
+
+# =========================
+# 出力（CSV は追記、Parquet は row group ごとに書く）
+# =========================
+class _CsvSink:
+    """
+    pyarrow があればその CSV 書き出しを使う（pandas の to_csv より数倍速い）。無ければ to_csv
+    """
+
+    def __init__(self, path: Optional[str]):
+        try:
+            import pyarrow as pa
+            import pyarrow.csv as pacsv
+        except ImportError:
+            pa = pacsv = None
+        self._pa, self._pacsv = pa, pacsv
+        if pa is not None:
+            self._f = sys.stdout.buffer if path in (None, "-") else open(path, "wb")
+        else:
+            self._f = sys.stdout if path in (None, "-") else open(path, "w", encoding="utf-8", newline="")
+        self._writer = None
+        self._header = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self._pa is None:
+            df.to_csv(self._f, header=self._header, index=False, lineterminator="\n")
+            self._header = False
+            return
+        if self._writer is None:
+            table = self._pa.Table.from_pandas(df, preserve_index=False)
+            opts = self._pacsv.WriteOptions(quoting_style="needed")
+            self._schema = table.schema
+            self._writer = self._pacsv.CSVWriter(self._f, self._schema, write_options=opts)
+        else:
+            table = self._pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._f not in (sys.stdout, sys.stdout.buffer):
+            self._f.close()
+        else:
+            self._f.flush()
+
+
+class _ParquetSink:
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise SystemExit("Parquet で書き出すには pyarrow が必要です（pip install pyarrow）") from e
+        self._pa, self._pq = pa, pq
+        self._path = path
+        self._writer = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self._writer is None:
+            table = self._pa.Table.from_pandas(df, preserve_index=False)
+            self._writer = self._pq.ParquetWriter(self._path, table.schema)
+        else:
+            table = self._pa.Table.from_pandas(df, schema=self._writer.schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _chunks(records: Iterator[Tuple[str, dict]], size: int) -> Iterator[List[Tuple[str, dict]]]:
+    chunk = []
+    for r in records:
+        chunk.append(r)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_batch(
+    input_path: str,
+    output_path: Optional[str] = None,
+    *,
+    input_format: Optional[str] = None,
+    output_format: Optional[str] = None,
+    workers: int = 1,
+    chunk_size: int = 1000,
+    summary_only: bool = False,
+    log=sys.stderr,
+) -> dict:
+    """
+    input_path の世帯を chunk_size 件ずつワーカーで計算し、入力と同じ順番で output_path に書く
+    同時に抱えるチャンクは workers×2 までなので、メモリはファイルの大きさによらずほぼ一定
+    """
+    output_format = output_format or ("parquet" if (output_path or "").lower().endswith(".parquet") else "csv")
+    if output_format == "parquet" and output_path in (None, "-"):
+        raise SystemExit("Parquet は標準出力に書けません（-o でファイルを指定してください）")
+    sink = _ParquetSink(output_path) if output_format == "parquet" else _CsvSink(output_path)
+
+    stats = {"households": 0, "rows": 0, "errors": 0}
+    t0 = time.perf_counter()
+
+    def consume(df: pd.DataFrame, errors: List[str]) -> None:
+        for msg in errors:
+            print(f"スキップ {msg}", file=log)
+        stats["errors"] += len(errors)
+        if len(df):
+            sink.write(df)
+            stats["households"] += int(df["id"].nunique()) if not summary_only else len(df)
+            stats["rows"] += len(df)
+
+    chunks = _chunks(iter_records(input_path, input_format), max(int(chunk_size), 1))
+    try:
+        if workers <= 1:
+            for chunk in chunks:
+                consume(*_run_chunk(chunk, summary_only))
+        else:
+            with ProcessPoolExecutor(max_workers=int(workers)) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(_run_chunk, chunk, summary_only))
+                    if len(pending) >= 2 * int(workers):
+                        consume(*pending.popleft().result())
+                while pending:
+                    consume(*pending.popleft().result())
+    finally:
+        sink.close()
+
+    stats["seconds"] = round(time.perf_counter() - t0, 3)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m lifeplan", description="世帯ファイル（CSV / JSONL）をまとめて計算します")
+    ap.add_argument("input", help="入力ファイル（.csv / .jsonl、- は標準入力の JSONL）")
+    ap.add_argument("-o", "--output", default=None, help="出力ファイル（.csv / .parquet、省略時は標準出力に CSV）")
+    ap.add_argument("--input-format", choices=["csv", "jsonl"], default=None, help="拡張子から決まらないときに指定")
+    ap.add_argument("--output-format", choices=["csv", "parquet"], default=None, help="拡張子から決まらないときに指定")
+    ap.add_argument("--workers", type=int, default=1, help="並列に計算するプロセス数（既定 1）")
+    ap.add_argument("--chunk-size", type=int, default=1000, help="1回にまとめて計算する世帯数（既定 1000）")
+    ap.add_argument("--summary-only", action="store_true", help="年次の行を出さず、1世帯1行の要約だけ書く")
+    ap.add_argument("--pdf-zip", default=None, help="1世帯1通の PDF をこの ZIP にまとめる（このときは -o を付けたときだけ結果も書く）")
+    args = ap.parse_args(argv)
+
+    if args.pdf_zip:
+        # reportlab / matplotlib を使うので、PDF を作るときだけ読み込む
+        from .bulkpdf import run_pdf_export
+
+        pdf_stats = run_pdf_export(args.input, args.pdf_zip, input_format=args.input_format, workers=args.workers)
+        print(
+            f"PDF {pdf_stats['reports']:,} 通 / スキップ {pdf_stats['errors']:,} 件 / {pdf_stats['bytes'] / 1e6:,.1f} MB / "
+            f"{pdf_stats['seconds']:.1f} 秒（{pdf_stats['reports_per_sec']:.1f} 通/秒）",
+            file=sys.stderr,
+        )
+        if args.output is None:
+            return 1 if pdf_stats["errors"] and not pdf_stats["reports"] else 0
+
+    stats = run_batch(
+        args.input, args.output,
+        input_format=args.input_format, output_format=args.output_format,
+        workers=args.workers, chunk_size=args.chunk_size, summary_only=args.summary_only,
+    )
+    print(
+        f"{stats['households']:,} 世帯 / {stats['rows']:,} 行 / スキップ {stats['errors']:,} 件 / {stats['seconds']:.1f} 秒",
+        file=sys.stderr,
+    )
+    return 1 if stats["errors"] and not stats["households"] else 0
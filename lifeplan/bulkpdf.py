@@ -0,0 +1,127 @@
+"""
+PDFの一括作成（世帯ファイル → 1世帯1通の PDF をまとめた ZIP）
+
+    python -m lifeplan households.jsonl --pdf-zip reports.zip --workers 4
+
+レコードの形は一括計算（python -m lifeplan）と同じです。
+PDF はワーカーのプロセスで作り、できた順ではなく入力の順に ZIP へ1通ずつ書き足すので、
+全部の PDF をメモリに抱えることはありません。reportlab / matplotlib が必要です。
+"""
+import re
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from .advice import make_inheritance_advice_from_result, make_money_advice_from_result
+from .analytics import analyze_result
+from .batch import _chunks, iter_records, record_inputs
+from .engine import calc_lifeplan_result
+from .monthly import calc_lifeplan_monthly, uses_monthly
+from .report import build_pdf_bytes, get_font_registry
+
+
+# PDF は1通が重いので、ワーカーに渡すまとまりは小さめにする（抱える PDF は workers×2×これ 通まで）
+PDF_CHUNK_SIZE = 8
+
+
+# =========================
+# PDF作成（ワーカーで実行）
+# =========================
+def _init_worker() -> None:
+    # フォントの登録と matplotlib の設定は、ワーカーごとに最初の1回だけ（あとの PDF は使い回す）
+    get_font_registry()
+
+
+def build_report(inputs: dict) -> bytes:
+    """1世帯ぶんの PDF（画面の「PDFで保存」と同じ中身。モンテカルロは入れない。月の入力があれば月次で計算する）"""
+    res = calc_lifeplan_monthly(inputs)["result"] if uses_monthly(inputs) else calc_lifeplan_result(inputs)
+    analytics = analyze_result(res, inputs)
+    return build_pdf_bytes(
+        None, inputs, res.df_long,
+        extra_text_blocks=[
+            ("家計へのアドバイス", make_money_advice_from_result(res, inputs, analytics)),
+            ("相続ワンポイントアドバイス", make_inheritance_advice_from_result(inputs, res, analytics)),
+        ],
+        result=res,
+    )
+
+
+def _pdf_chunk(chunk: List[Tuple[str, dict]]) -> Tuple[List[Tuple[str, bytes]], List[str]]:
+    done, errors = [], []
+    for rec_id, rec in chunk:
+        try:
+            done.append((rec_id, build_report(record_inputs(rec))))
+        except (ValueError, TypeError, KeyError) as e:
+            errors.append(f"{rec_id}: {e}")
+        except Exception as e:
+            # reportlab / matplotlib の失敗もその1通だけスキップにする（プールごと止めると ZIP が途中で切れる）
+            errors.append(f"{rec_id}: PDF を作れませんでした（{type(e).__name__}: {e}）")
+    return done, errors
+
+
+# =========================
+# ZIPへの書き出し
+# =========================
+def _entry_name(rec_id: str, used: set) -> str:
+    # ファイル名に使えない文字は _ にする。同じ名前が続いたら _2, _3 ... を付ける
+    base = re.sub(r"[^\w.\-]+", "_", rec_id).strip("._") or "report"
+    name, n = f"{base}.pdf", 1
+    while name in used:
+        n += 1
+        name = f"{base}_{n}.pdf"
+    used.add(name)
+    return name
+
+
+def run_pdf_export(
+    input_path: str,
+    zip_path: str,
+    *,
+    input_format: Optional[str] = None,
+    workers: int = 1,
+    chunk_size: int = PDF_CHUNK_SIZE,
+    log=sys.stderr,
+) -> dict:
+    """
+    input_path の世帯ごとに PDF を作り、zip_path（"-" は標準出力）に入力の順で書く
+    PDF は中身を圧縮済みなので、ZIP では圧縮し直さない（ZIP_STORED）
+    戻り値：{"reports", "errors", "bytes", "seconds", "reports_per_sec"}
+    """
+    stats = {"reports": 0, "errors": 0, "bytes": 0}
+    used = set()
+    t0 = time.perf_counter()
+
+    out = sys.stdout.buffer if zip_path == "-" else zip_path
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_STORED) as zf:
+
+        def consume(done: List[Tuple[str, bytes]], errors: List[str]) -> None:
+            for msg in errors:
+                print(f"スキップ {msg}", file=log)
+            stats["errors"] += len(errors)
+            for rec_id, data in done:
+                zf.writestr(_entry_name(rec_id, used), data)
+                stats["reports"] += 1
+                stats["bytes"] += len(data)
+
+        chunks = _chunks(iter_records(input_path, input_format), max(int(chunk_size), 1))
+        if workers <= 1:
+            _init_worker()
+            for chunk in chunks:
+                consume(*_pdf_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=int(workers), initializer=_init_worker) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(_pdf_chunk, chunk))
+                    if len(pending) >= 2 * int(workers):
+                        consume(*pending.popleft().result())
+                while pending:
+                    consume(*pending.popleft().result())
+
+    seconds = time.perf_counter() - t0
+    stats["seconds"] = round(seconds, 3)
+    stats["reports_per_sec"] = round(stats["reports"] / seconds, 2) if seconds > 0 else 0.0
+    return stats
@@ -0,0 +1,180 @@
+"""
+計算結果キャッシュ（入力のハッシュで引く）と、裏でのPDF作成
+"""
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .engine import LifePlanResult
+
+
+def _canonical(obj, key: str = ""):
+    # 同じ内容なら同じ JSON になるように整える（dict のキーは文字列、tuple は list、1500.0 は 1500）
+    if isinstance(obj, dict):
+        items = obj.items()
+        if key.endswith("_map"):
+            # 一時収入/支出の {年齢: 金額}：0円の項目は計算に効かないので落とす
+            items = [(int(a), v) for a, v in items if float(v) != 0.0]
+        return {str(k): _canonical(v, str(k)) for k, v in items}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(v) for v in obj]
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, bool) or obj is None or isinstance(obj, str):
+        return obj
+    if isinstance(obj, float) and obj.is_integer():
+        return int(obj)
+    if isinstance(obj, (int, float)):
+        return obj
+    return str(obj)
+
+
+def inputs_hash(inputs: dict, *extra) -> str:
+    """inputs（と追加の設定）から、キャッシュ用のハッシュ文字列を作る"""
+    payload = json.dumps([_canonical(inputs), _canonical(list(extra))],
+                         sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _approx_nbytes(obj) -> int:
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(np.sum(obj.memory_usage(deep=True)))
+    if isinstance(obj, (np.ndarray, LifePlanResult)):
+        return int(obj.nbytes)
+    if isinstance(obj, (bytes, bytearray)):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(_approx_nbytes(k) + _approx_nbytes(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(_approx_nbytes(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+class ResultCache:
+    """
+    プロセス全体で共有する LRU キャッシュ
+    合計サイズ（目安）が max_bytes を超えたら、使われていないものから捨てる
+    get_or_compute は同じキーを1回だけ計算する（計算中に来た呼び出しは、その結果を待つ）
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = int(max_bytes)
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # 計算中のキー → Future（get_or_compute で後から来た呼び出しが待つ）
+        self._pending = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key][0]
+            self.misses += 1
+            return default
+
+    def put(self, key, value) -> None:
+        size = _approx_nbytes(value)
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._data.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._data[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, old_size) = self._data.popitem(last=False)
+                self._bytes -= old_size
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def get_or_compute(self, key, fn):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key][0]
+            fut = self._pending.get(key)
+            if fut is None:
+                # 最初の呼び出しだけが計算する
+                self.misses += 1
+                fut = self._pending[key] = Future()
+                owner = True
+            else:
+                self.hits += 1
+                owner = False
+        if not owner:
+            return fut.result()
+        try:
+            value = fn()
+        except BaseException as e:
+            with self._lock:
+                self._pending.pop(key, None)
+            fut.set_exception(e)
+            raise
+        # キャッシュに入れてから待ち行列を外す（その間に来た呼び出しはどちらかで値を受け取る）
+        self.put(key, value)
+        with self._lock:
+            self._pending.pop(key, None)
+        fut.set_result(value)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._data), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+# =========================
+# PDFのバックグラウンド作成（押されるまで待たせない）
+# =========================
+class PdfJobs:
+    """
+    PDFを裏で作っておき、できたものは ResultCache に入れる（同じキーは1回だけ作る）
+    result() はキャッシュにあればそれを、作成中なら完成を待って、まだなら今ここで作って返す
+    """
+
+    def __init__(self, cache: ResultCache, max_workers: int, max_pending: int):
+        self._cache = cache
+        self._pool = ThreadPoolExecutor(max_workers=max(int(max_workers), 1), thread_name_prefix="lifeplan-pdf")
+        self._futures = {}
+        self._lock = threading.Lock()
+        self.max_pending = int(max_pending)
+
+    def start(self, key, build) -> None:
+        if key in self._cache:
+            return
+        with self._lock:
+            if key in self._futures or len(self._futures) >= self.max_pending:
+                return
+            self._futures[key] = self._pool.submit(self._run, key, build)
+
+    def _run(self, key, build) -> bytes:
+        try:
+            data = build()
+            self._cache.put(key, data)
+            return data
+        finally:
+            with self._lock:
+                self._futures.pop(key, None)
+
+    def result(self, key, build) -> bytes:
+        missing = object()
+        data = self._cache.get(key, missing)
+        if data is not missing:
+            return data
+        with self._lock:
+            fut = self._futures.get(key)
+        if fut is not None:
+            return fut.result()
+        return self._cache.get_or_compute(key, build)
@@ -0,0 +1,70 @@
+"""
+シナリオ比較（名前を付けて保存した計算結果を並べる。計算はし直さない）
+"""
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .analytics import analyze_result
+from .engine import LifePlanResult
+
+
+# =========================
+# シナリオ比較
+# =========================
+def compare_scenarios(results: Dict[str, LifePlanResult], base: Optional[str] = None) -> dict:
+    """
+    名前 → 計算結果 を受け取り、貯蓄残高を並べる（結果の配列を読むだけ）
+    base（既定は最初のシナリオ）との差も付ける。期間の違うシナリオは、無い年を空欄にする
+    戻り値：
+    - "base": 基準のシナリオ名
+    - "lines": 1行 = 1シナリオの1年（シナリオ, 年目, 貯蓄残高(万円)）。重ねた折れ線グラフ用
+    - "diff": 1行 = 1年（年目, 各シナリオの貯蓄残高, 「差：名前」= そのシナリオ − 基準）
+    - "summary": 1行 = 1シナリオ（最低・最終貯蓄残高、赤字の年数などと、基準との差）
+    """
+    names = list(results)
+    if not names:
+        raise ValueError("比べるシナリオがありません")
+    base = base if base in results else names[0]
+
+    n_max = max(results[nm].n_years for nm in names)
+    years = np.arange(1, n_max + 1)
+    bal = {}
+    for nm in names:
+        b = np.full(n_max, np.nan)
+        row = results[nm].row("貯蓄残高")
+        b[:len(row)] = row
+        bal[nm] = b
+
+    lines = pd.DataFrame({
+        "シナリオ": np.repeat(np.asarray(names, dtype=object), [results[nm].n_years for nm in names]),
+        "年目": np.concatenate([results[nm].years for nm in names]),
+        "貯蓄残高(万円)": np.concatenate([results[nm].row("貯蓄残高") for nm in names]),
+    })
+
+    diff = pd.DataFrame({"年目": years})
+    for nm in names:
+        diff[nm] = bal[nm]
+    for nm in names:
+        if nm != base:
+            diff[f"差：{nm}"] = np.round(bal[nm] - bal[base], 1)
+
+    rows = []
+    for nm in names:
+        a = analyze_result(results[nm])
+        rows.append({
+            "シナリオ": nm,
+            "年数": a["n_years"],
+            "最低貯蓄残高(万円)": a["min_balance"],
+            "最低の年目": a["min_year"],
+            "最終貯蓄残高(万円)": a["final_balance"],
+            "赤字の年数": a["deficit_count"],
+            "連続赤字の最長(年)": a["max_streak"],
+        })
+    summary = pd.DataFrame(rows)
+    b = summary.loc[summary["シナリオ"] == base].iloc[0]
+    for col in ["最低貯蓄残高(万円)", "最終貯蓄残高(万円)", "赤字の年数"]:
+        summary[f"{col}の差"] = (summary[col] - b[col]).round(1)
+
+    return {"base": base, "lines": lines, "diff": diff, "summary": summary}
@@ -0,0 +1,533 @@
+"""
+ライフプラン計算エンジン（Streamlit・matplotlib・reportlab なしで import できる：pandas / NumPy だけ）
+"""
+from dataclasses import dataclass
+from functools import lru_cache, cached_property
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .invest import BUCKET_ROWS, run_buckets, stack_invest
+
+
+# 生活費8項目
+ITEMS = ["食費", "水道光熱費", "通信費", "交通費", "趣味・交際費", "医療費", "住宅の固定資産税・管理費等", "その他"]
+
+
+# =========================
+# 一時収入/支出 → {年齢: 金額}
+# =========================
+def lumps_to_map(lumps):
+    mp = {}
+    for use, age, amt in lumps:
+        if use and age > 0 and amt > 0:
+            mp[age] = mp.get(age, 0.0) + float(amt)
+    return mp
+
+
+# =========================
+# 単身期開始（年目）
+# =========================
+def get_single_start_year_after(h_now, h_die, w_now, w_die):
+    h_death_y = (h_die - h_now + 1) if h_die >= h_now else None
+    w_death_y = (w_die - w_now + 1) if w_die >= w_now else None
+    ys = [y for y in [h_death_y, w_death_y] if y is not None]
+    if not ys:
+        return None
+    return min(ys) + 1
+
+
+# =========================
+# ベクトル化の部品（スカラー版と1円単位まで同じ結果にする）
+# =========================
+# 上昇率の種類がこれより多いとき（乱数で振ったときなど）は np.power で直接計算する（末尾ビットの差は許す）
+EXACT_GROWTH_MAX_RATES = 1024
+
+
+@lru_cache(maxsize=4096)
+def _growth_table(g_pct: float, n: int) -> np.ndarray:
+    # (1+g/100)**k（k=0..n-1）の表。np.power や cumprod は末尾ビットがずれるので、
+    # 元の計算と同じ Python の ** で作り、上昇率ごとに使い回す
+    base = 1.0 + float(g_pct) / 100.0
+    tbl = np.array([base ** k for k in range(n)], dtype=np.float64)
+    tbl.flags.writeable = False
+    return tbl
+
+
+def _growth(g_pct, k) -> np.ndarray:
+    # g_pct はスカラーでも配列（k と同じ形に広がるもの）でもよい
+    k = np.asarray(k, dtype=np.int64)
+    g = np.asarray(g_pct, dtype=np.float64)
+    n = int(k.max()) + 1 if k.size else 1
+    if g.size == 1:
+        out = _growth_table(float(g.reshape(-1)[0]), n)[k]
+        return out if g.ndim <= k.ndim else out.reshape((1,) * (g.ndim - k.ndim) + k.shape)
+    uniq, inv = np.unique(g, return_inverse=True)
+    if len(uniq) > EXACT_GROWTH_MAX_RATES:
+        return np.power(1.0 + g / 100.0, k)
+    tables = np.concatenate([_growth_table(float(u), n) for u in uniq])
+    return tables[inv.reshape(g.shape) * n + k]
+
+
+def _round1(x) -> np.ndarray:
+    # Python の round(x, 1) と同じ丸め（10倍して最近接、ちょうど半分は偶数側）を配列で行う。
+    # np.round は 10倍した時点の誤差で結果が変わることがあるため、
+    # 半端がほぼ 0.5 の要素だけ、20|x| を誤差なしの和 s+e で持って境界 2q+1 と正確に比べる
+    x = np.asarray(x, dtype=np.float64)
+    ax = np.abs(x)
+    y = ax * 10.0
+    q = np.floor(y)
+    d = y - q
+    d -= 0.5
+    out = q + (d > 0)
+    np.abs(d, out=d)
+    near = d <= y * 1e-15
+    if near.any():
+        a = ax[near] * 16.0
+        b = ax[near] * 4.0
+        s = a + b
+        bb = s - a
+        e = (a - (s - bb)) + (b - bb)
+        qn = q[near]
+        m = 2.0 * qn + 1.0
+        up = (s > m) | ((s == m) & ((e > 0) | ((e == 0) & (np.fmod(qn, 2.0) == 1.0))))
+        out[near] = qn + up
+    out /= 10.0
+    return np.copysign(out, x, out=out)
+
+
+# =========================
+# パラメータ行列（N世帯分の inputs を配列にまとめたもの）
+# =========================
+SCALAR_KEYS = [
+    "h_now", "h_die", "w_now", "w_die", "start_savings",
+    "h_inc_now", "h_g1", "h_ch_age", "h_inc_after", "h_g2",
+    "w_inc_now", "w_g1", "w_ch_age", "w_inc_after", "w_g2",
+    "single_ratio_pct",
+    "h_care_start", "h_care_m", "h_care_g",
+    "w_care_start", "w_care_m", "w_care_g",
+]
+INT_KEYS = {"h_now", "h_die", "w_now", "w_die", "h_ch_age", "w_ch_age", "h_care_start", "w_care_start"}
+LIVING_KEYS = ["m", "g", "after_years", "m2", "g2"]
+MAP_KEYS = ["h_lump_map", "w_lump_map", "h_spend_map", "w_spend_map"]
+
+
+def stack_inputs(inputs_list) -> dict:
+    """
+    inputs（画面の「計算」で作る dict）のリストを、N世帯分のパラメータ行列にまとめる
+    - SCALAR_KEYS: (N,)
+    - "living_m" など "living_" + LIVING_KEYS: (N, 8)（列の並びは ITEMS）
+    - 一時収入/支出: "h_lump_map_age" (N, K) と "h_lump_map_amt" (N, K)（空きは年齢 -1）
+    - 貯蓄の運用（inputs["invest"]）がある世帯があれば "inv_on" など（lifeplan.invest.stack_invest）
+    どの配列も先頭の次元が 1 なら N 世帯に広げて使う
+    """
+    inputs_list = list(inputs_list)
+    params = {}
+    for key in SCALAR_KEYS:
+        dtype = np.int64 if key in INT_KEYS else np.float64
+        default = 100.0 if key == "single_ratio_pct" else None
+        params[key] = np.array([d[key] if default is None else d.get(key, default) for d in inputs_list], dtype=dtype)
+
+    living = np.array(
+        [[[d["living_params"][nm][k] for k in LIVING_KEYS] for nm in ITEMS] for d in inputs_list],
+        dtype=np.float64,
+    ).reshape(len(inputs_list), len(ITEMS), len(LIVING_KEYS))
+    for j, k in enumerate(LIVING_KEYS):
+        params[f"living_{k}"] = living[:, :, j].astype(np.int64) if k == "after_years" else living[:, :, j].copy()
+
+    for key in MAP_KEYS:
+        width = max([len(d[key]) for d in inputs_list] + [1])
+        ages = np.full((len(inputs_list), width), -1, dtype=np.int64)
+        amts = np.zeros((len(inputs_list), width), dtype=np.float64)
+        for i, d in enumerate(inputs_list):
+            for j, (age, amt) in enumerate(d[key].items()):
+                ages[i, j] = int(age)
+                amts[i, j] = float(amt)
+        params[f"{key}_age"] = ages
+        params[f"{key}_amt"] = amts
+    if any(d.get("invest") for d in inputs_list):
+        params.update(stack_invest(inputs_list))
+    return params
+
+
+def _scatter_by_age(ages, amts, now_age, T) -> np.ndarray:
+    # (N, K) の {年齢: 金額} を、年目の列 (N, T) に並べる（範囲外の年齢は無視）
+    N = len(now_age)
+    idx = ages - now_age[:, None]
+    ok = (ages >= 0) & (idx >= 0) & (idx < T) & (amts != 0)
+    out = np.zeros((N, T), dtype=np.float64)
+    rr, cc = np.nonzero(ok)
+    out[rr, idx[rr, cc]] = amts[rr, cc]
+    return out
+
+
+# 行のまとまり（グループ）ごとの計算。calc_lifeplan_matrix と差分計算（incremental）で共用する
+# P はパラメータ行列（先頭の次元は N にそろえたもの）、H は _horizon の戻り値
+def _horizon(P: dict) -> dict:
+    # 年数・年齢・生存・単身期開始（夫婦の年齢と死亡年齢だけで決まる）
+    h_now, h_die, w_now, w_die = P["h_now"], P["h_die"], P["w_now"], P["w_die"]
+    N = len(h_now)
+    years_len = np.maximum(h_die - h_now, w_die - w_now) + 1
+    T = max(int(years_len.max()), 0) if N else 0
+
+    t = np.arange(T, dtype=np.int64)[None, :]
+    valid = t < years_len[:, None]
+    ah, aw = h_now[:, None] + t, w_now[:, None] + t
+
+    # 単身期開始（年目）：get_single_start_year_after と同じ決め方。無いときは 0
+    big = np.iinfo(np.int64).max
+    h_death_y = np.where(h_die >= h_now, h_die - h_now + 1, big)
+    w_death_y = np.where(w_die >= w_now, w_die - w_now + 1, big)
+    first_y = np.minimum(h_death_y, w_death_y)
+    single_start_y = np.where(first_y < big, first_y + 1, 0)
+
+    return {
+        "N": N, "T": T, "t": t, "year_idx": t + 1, "valid": valid, "years_len": years_len,
+        "h_age": ah, "w_age": aw,
+        "h_alive": (ah <= h_die[:, None]) & valid,
+        "w_alive": (aw <= w_die[:, None]) & valid,
+        "single_start_y": single_start_y,
+    }
+
+
+def _income_raw(H: dict, P: dict, who: str) -> np.ndarray:
+    # 手取り年収（丸める前）。who は "h" か "w"
+    ages, alive, now_age = H[f"{who}_age"], H[f"{who}_alive"], P[f"{who}_now"]
+    inc1, g1, inc2, g2 = P[f"{who}_inc_now"], P[f"{who}_g1"], P[f"{who}_inc_after"], P[f"{who}_g2"]
+    ch = P[f"{who}_ch_age"][:, None]
+    after = (ch != 0) & (ages >= ch)
+    v1 = inc1[:, None] * _growth(g1[:, None], np.where(after, 0, ages - now_age[:, None]))
+    v2 = inc2[:, None] * _growth(g2[:, None], np.where(after, ages - ch, 0))
+    return np.where(alive, np.where(after, v2, v1), 0.0)
+
+
+def _by_age_raw(H: dict, P: dict, who: str, key: str) -> np.ndarray:
+    # 一時収入/支出（{年齢: 金額}）を年目に並べる。key は MAP_KEYS のどれか
+    return np.where(H[f"{who}_alive"], _scatter_by_age(P[f"{key}_age"], P[f"{key}_amt"], P[f"{who}_now"], H["T"]), 0.0)
+
+
+def _care_raw(H: dict, P: dict, who: str) -> np.ndarray:
+    # 介護費（年額、丸める前）
+    ages, alive = H[f"{who}_age"], H[f"{who}_alive"]
+    st_age = P[f"{who}_care_start"][:, None]
+    on = (st_age != 0) & alive & (ages >= st_age)
+    mm = P[f"{who}_care_m"][:, None] * _growth(P[f"{who}_care_g"][:, None], np.where(on, ages - st_age, 0))
+    return np.where(on, mm * 12.0, 0.0)
+
+
+def _living_raw(H: dict, P: dict, cols=slice(None)) -> np.ndarray:
+    # 生活費（年額、丸める前）を (N, 項目数, T) で返す。cols で ITEMS の一部だけ計算できる
+    # 単身期：夫婦期最終年の月額×割合を起点に g2 で伸ばす
+    N, t, year_idx, valid = H["N"], H["t"], H["year_idx"], H["valid"]
+    years_len, single_start_y = H["years_len"], H["single_start_y"]
+    single_ratio = np.clip(P["single_ratio_pct"].astype(np.float64) / 100.0, 0.0, 2.0)
+
+    m, g = P["living_m"][:, cols, None], P["living_g"][:, cols, None]
+    m2, g2 = P["living_m2"][:, cols, None], P["living_g2"][:, cols, None]
+    after = P["living_after_years"][:, cols, None]
+    tt = t[:, None, :]
+    sw = (after > 0) & (tt >= after)
+    mm = np.where(sw, m2 * _growth(g2, np.where(sw, tt - after, 0)), m * _growth(g, np.where(sw, 0, tt)))
+
+    has_single = (single_start_y >= 2) & (single_start_y <= years_len)
+    if has_single.any():
+        ss = single_start_y[:, None]
+        single_mask = (has_single[:, None] & (year_idx >= ss))[:, None, :]
+        single_dt = np.where(single_mask, (year_idx - ss)[:, None, :], 0)
+        couple_last_t = np.where(has_single, single_start_y - 2, 0)
+        base_mm = np.take_along_axis(mm, np.broadcast_to(couple_last_t[:, None, None], (N, mm.shape[1], 1)), axis=2)
+        mm = np.where(single_mask, base_mm * single_ratio[:, None, None] * _growth(g2, single_dt), mm)
+    mm = np.where(valid[:, None, :], mm, 0.0)
+    return mm * 12.0
+
+
+def _cashflow_rows(income_total, living_rows, care_h, care_w, spend_h, spend_w):
+    # 支出合計・現金収支（丸める前、引数は丸めた行）。どちらの計算でも足す順番を同じにして、末尾ビットまで合わせる
+    living_total = np.zeros(np.shape(income_total), dtype=np.float64)
+    for r in living_rows:
+        living_total = living_total + r
+    expense_total = living_total + (care_h + care_w) + (spend_h + spend_w)
+    return expense_total, income_total - expense_total
+
+
+def _broadcast_params(params: dict) -> dict:
+    # 先頭の次元が 1 の配列を N 世帯に広げる
+    N = max(np.shape(v)[0] for v in params.values())
+    return {k: (v if np.shape(v)[0] == N else np.broadcast_to(v, (N,) + np.shape(v)[1:])) for k, v in params.items()}
+
+
+def calc_lifeplan_matrix(params: dict) -> dict:
+    """
+    パラメータ行列（stack_inputs の戻り値）から、N世帯×年数 をまとめて計算する
+    戻り値のキーは表の行名と同じで、値は (N, T) の float64（T は最も長い世帯の年数）
+    期間の短い世帯の後ろは収支0で埋めるので、貯蓄残高は最終年の値がそのまま続く
+    ほかに "years_len" (N,), "valid" (N, T), "h_age"/"w_age" (N, T), "h_alive"/"w_alive" (N, T),
+    "single_start_y" (N,)（単身期が無い世帯は 0）
+    運用（"inv_on" など）があれば、貯蓄残高は口座ごとに利回りを付けて積み上げ、"運用益" と "うち現金" などの行も付く
+    "inv_ret" は (N, 3) のほか、年ごとに振った (N, T以上, 3) でもよい（モンテカルロ用）
+    """
+    P = _broadcast_params(params)
+    H = _horizon(P)
+    N, T = H["N"], H["T"]
+
+    k = 5 + len(ITEMS)
+    raw = np.empty((k + 4, N, T), dtype=np.float64)
+    raw[0], raw[1] = _income_raw(H, P, "h"), _income_raw(H, P, "w")
+    raw[2], raw[3] = _by_age_raw(H, P, "h", "h_lump_map"), _by_age_raw(H, P, "w", "w_lump_map")
+    raw[5:k] = np.moveaxis(_living_raw(H, P), 1, 0)
+    raw[k], raw[k + 1] = _care_raw(H, P, "h"), _care_raw(H, P, "w")
+    raw[k + 2], raw[k + 3] = _by_age_raw(H, P, "h", "h_spend_map"), _by_age_raw(H, P, "w", "w_spend_map")
+    return _rows_from_raw(H, P, raw)
+
+
+def _rows_from_raw(H: dict, P: dict, raw: np.ndarray) -> dict:
+    # 丸める前の行 raw（並びは calc_lifeplan_matrix と同じ。raw[4] の収入合計はここで入れる）から、表の行と残高を作る
+    # 月次計算（monthly）も年にまとめた行をここに渡すので、年次と同じ丸め・足し算の順番になる
+    k = 5 + len(ITEMS)
+    # 行ごとの丸めは1回にまとめる（収入合計は丸める前の値を足してから丸める）
+    raw[4] = raw[0] + raw[1] + raw[2] + raw[3]
+    r = _round1(raw)
+
+    rows = {
+        "years_len": H["years_len"], "valid": H["valid"],
+        "h_age": H["h_age"], "w_age": H["w_age"],
+        "h_alive": H["h_alive"], "w_alive": H["w_alive"],
+        "single_start_y": H["single_start_y"],
+        "夫年収(手取り)": r[0], "妻年収(手取り)": r[1],
+        "一時収入 夫": r[2], "一時収入 妻": r[3], "収入合計": r[4],
+    }
+    for i, nm in enumerate(ITEMS):
+        rows[nm] = r[5 + i]
+    rows["介護費 夫"], rows["介護費 妻"], rows["一時支出 夫"], rows["一時支出 妻"] = r[k], r[k + 1], r[k + 2], r[k + 3]
+
+    # 収支・残高（残高は丸める前の収支を積み上げる）
+    expense_total, cashflow = _cashflow_rows(r[4], r[5:k], r[k], r[k + 1], r[k + 2], r[k + 3])
+    bal = np.cumsum(np.concatenate([P["start_savings"].astype(np.float64)[:, None], cashflow], axis=1), axis=1)[:, 1:]
+    if "inv_on" in P and P["inv_on"].any():
+        bal = _invest_rows(H, P, cashflow, bal, rows)
+    rows["支出合計"], rows["現金収支"], rows["貯蓄残高"] = _round1(np.stack([expense_total, cashflow, bal]))
+    return rows
+
+
+def _invest_rows(H: dict, P: dict, cashflow: np.ndarray, bal: np.ndarray, rows: dict) -> np.ndarray:
+    # 運用する世帯だけ口座ごとに積み上げ直し、"運用益" と内訳（BUCKET_ROWS）の行を rows に足す。戻り値は丸める前の貯蓄残高
+    # 運用しない世帯は今までどおりの残高で、内訳は全部現金
+    on = P["inv_on"]
+    out = run_buckets(
+        P["start_savings"][on], cashflow[on], P["inv_alloc"][on], P["inv_ret"][on],
+        P["inv_order"][on], P["inv_rebalance"][on], H["valid"][on],
+    )
+    bal = bal.copy()
+    bal[on] = out["total"]
+    gain = np.zeros_like(bal)
+    gain[on] = out["gain"]
+    hold = np.zeros(bal.shape + (len(BUCKET_ROWS),), dtype=np.float64)
+    hold[~on, :, 0] = bal[~on]
+    hold[on] = out["hold"]
+    rows["運用益"] = _round1(gain)
+    for j, nm in enumerate(BUCKET_ROWS):
+        rows[nm] = _round1(hold[:, :, j])
+    return bal
+
+
+def calc_lifeplan_batch(inputs_list) -> dict:
+    """inputs のリストをまとめて計算する（calc_lifeplan_matrix(stack_inputs(...)) の短縮形）"""
+    return calc_lifeplan_matrix(stack_inputs(inputs_list))
+
+
+def summarize_batch(rows: dict) -> pd.DataFrame:
+    """calc_lifeplan_matrix の結果から、世帯ごとの要約（1行1世帯）を作る"""
+    valid = rows["valid"]
+    bal = np.where(valid, rows["貯蓄残高"], np.inf)
+    cash = rows["現金収支"]
+    years_len = rows["years_len"]
+    has_year = years_len > 0
+    min_idx = np.argmin(bal, axis=1) if bal.shape[1] else np.zeros(len(years_len), dtype=np.int64)
+    last_idx = np.maximum(years_len - 1, 0)
+    pick = lambda a, idx: np.take_along_axis(a, idx[:, None], axis=1)[:, 0] if a.shape[1] else np.zeros(len(idx))
+    neg = (rows["貯蓄残高"] < 0) & valid
+    first_neg = np.where(neg.any(axis=1), np.argmax(neg, axis=1) + 1, 0)
+    return pd.DataFrame({
+        "年数": years_len,
+        "最低貯蓄残高(万円)": np.where(has_year, pick(rows["貯蓄残高"], min_idx), np.nan),
+        "最低残高の年目": np.where(has_year, min_idx + 1, 0),
+        "最終貯蓄残高(万円)": np.where(has_year, pick(rows["貯蓄残高"], last_idx), np.nan),
+        "赤字年数": ((cash < 0) & valid).sum(axis=1),
+        "マイナス開始年目": first_neg,
+    })
+
+
+# =========================
+# 年次計算（単身期：夫婦期最終年の生活費×割合）
+# =========================
+def calc_lifeplan_rows(inputs: dict) -> dict:
+    """
+    calc_lifeplan の数値部分だけを float64 配列で返す（DataFrameは作らない）
+    キーは表の行名と同じ。ほかに "years_len", "h_age", "w_age", "h_alive", "w_alive", "single_start_y"
+    """
+    res = calc_lifeplan_batch([inputs])
+    n = max(int(res["years_len"][0]), 0)
+    rows = {k: v[0, :n] for k, v in res.items() if np.ndim(v) == 2 and k != "valid"}
+    rows["years_len"] = int(res["years_len"][0])
+    rows["single_start_y"] = get_single_start_year_after(
+        int(inputs["h_now"]), int(inputs["h_die"]), int(inputs["w_now"]), int(inputs["w_die"])
+    )
+    return rows
+
+
+TABLE_LAYOUT = tuple(
+    ["夫年齢", "妻年齢", "単身期開始",
+     "夫年収(手取り)", "妻年収(手取り)", "一時収入 夫", "一時収入 妻", "収入合計", None]
+    + ITEMS
+    + ["介護費 夫", "介護費 妻", "一時支出 夫", "一時支出 妻", "支出合計", None, "現金収支", "貯蓄残高"]
+)
+# 貯蓄を運用するときの表（運用益と、貯蓄残高の内訳を足す）
+INVEST_TABLE_LAYOUT = TABLE_LAYOUT[:-1] + ("運用益", "貯蓄残高") + tuple(BUCKET_ROWS)
+SINGLE_START_TEXT = "←ここから単身期"
+
+
+def display_label(label: str) -> str:
+    # 表示用の行名（金額の行に「（万円）」を付ける）
+    if label in ["夫年齢", "妻年齢", "単身期開始"] or label == "":
+        return label
+    if "（万円）" in label:
+        return label
+    return f"{label}（万円）"
+
+
+@dataclass
+class LifePlanResult:
+    """
+    計算結果（数値と表示レイアウトを分けて持つ）
+    - rows: 行名 → float64 配列（年数ぶん）。"夫年齢"/"妻年齢" は亡くなった後が NaN
+    - years: 年目（1, 2, ...）
+    - single_start_y: 単身期が始まる年目（なければ None）
+    - layout: 表の行の並び（None は空行）
+    表・PDF・アドバイスはここから数値をそのまま読む（文字列を読み直さない）
+    """
+    rows: Dict[str, np.ndarray]
+    years: np.ndarray
+    single_start_y: Optional[int] = None
+    layout: Tuple[Optional[str], ...] = TABLE_LAYOUT
+
+    @property
+    def n_years(self) -> int:
+        return int(len(self.years))
+
+    def row(self, label: str) -> Optional[np.ndarray]:
+        return self.rows.get(label)
+
+    @property
+    def nbytes(self) -> int:
+        n = sum(int(v.nbytes) for v in self.rows.values()) + int(self.years.nbytes)
+        for name in ("df_long", "df_table"):
+            if name in self.__dict__:
+                n += int(np.sum(self.__dict__[name].memory_usage(deep=True)))
+        return n
+
+    @classmethod
+    def from_rows(cls, rows: dict) -> "LifePlanResult":
+        n = max(int(rows["years_len"]), 0)
+        layout = INVEST_TABLE_LAYOUT if "運用益" in rows else TABLE_LAYOUT
+        out = {k: np.asarray(v, dtype=float) for k, v in rows.items() if k in layout}
+        out["夫年齢"] = np.where(rows["h_alive"], rows["h_age"], np.nan)
+        out["妻年齢"] = np.where(rows["w_alive"], rows["w_age"], np.nan)
+        return cls(rows=out, years=np.arange(1, n + 1), single_start_y=rows["single_start_y"], layout=layout)
+
+    @classmethod
+    def from_frames(cls, df_long: pd.DataFrame, df_table: Optional[pd.DataFrame] = None) -> "LifePlanResult":
+        """
+        既存の (df_long, df_table) から作る（古い呼び出し用：ここで1回だけ文字列を数値に直す）
+        """
+        rows: Dict[str, np.ndarray] = {}
+        single_start_y = None
+        if df_table is not None:
+            for label in df_table.index:
+                label = str(label)
+                if label.startswith("__blank"):
+                    continue
+                if label == "単身期開始":
+                    hit = [i for i, v in enumerate(df_table.loc[label].tolist()) if str(v).strip() not in ("", "nan", "None")]
+                    single_start_y = hit[0] + 1 if hit else None
+                    continue
+                vals = pd.to_numeric(df_table.loc[label], errors="coerce").to_numpy(dtype=float)
+                rows[label] = vals if label in ["夫年齢", "妻年齢"] else np.nan_to_num(vals, nan=0.0)
+        rows["現金収支"] = df_long["年間現金収支(万円)"].to_numpy(dtype=float)
+        rows["貯蓄残高"] = df_long["貯蓄残高(万円)"].to_numpy(dtype=float)
+        return cls(rows=rows, years=df_long["年目"].to_numpy(dtype=int), single_start_y=single_start_y)
+
+    # ---- 表示用 ----
+    def display_labels(self) -> List[str]:
+        return [display_label("" if label is None else label) for label in self.layout]
+
+    def single_start_row(self) -> List[str]:
+        r = [""] * self.n_years
+        if self.single_start_y is not None and 1 <= int(self.single_start_y) <= self.n_years:
+            r[int(self.single_start_y) - 1] = SINGLE_START_TEXT
+        return r
+
+    def cell_strings(self) -> List[List[str]]:
+        """
+        表のセル文字列（行×年）を数値から直接作る（年齢は整数、金額は小数1桁、空欄は空文字）
+        表とPDFで共用するので1回だけ作る
+        """
+        return self._cells
+
+    @cached_property
+    def _cells(self) -> List[List[str]]:
+        n = self.n_years
+        cells = []
+        for label in self.layout:
+            if label == "単身期開始":
+                cells.append(self.single_start_row())
+            elif label is None or label not in self.rows:
+                cells.append([""] * n)
+            elif label in ["夫年齢", "妻年齢"]:
+                cells.append(["" if a != a else "%d" % a for a in self.rows[label].tolist()])
+            else:
+                cells.append(["%.1f" % v for v in self.rows[label].tolist()])
+        return cells
+
+    @cached_property
+    def df_long(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "年目": self.years.tolist(),
+            "年間現金収支(万円)": self.rows["現金収支"],
+            "貯蓄残高(万円)": self.rows["貯蓄残高"],
+        })
+
+    @cached_property
+    def df_table(self) -> pd.DataFrame:
+        n = self.n_years
+        rows_table, idx_table = [], []
+        blank_counter = 0
+        for label in self.layout:
+            if label is None:
+                blank_counter += 1
+                idx_table.append(f"__blank{blank_counter}__")
+                rows_table.append([""] * n)
+            elif label == "単身期開始":
+                idx_table.append(label)
+                rows_table.append(self.single_start_row())
+            elif label in ["夫年齢", "妻年齢"]:
+                idx_table.append(label)
+                rows_table.append(["" if a != a else int(a) for a in self.rows[label].tolist()])
+            else:
+                idx_table.append(label)
+                rows_table.append(self.rows[label].tolist())
+
+        # 文字と数値が混ざる表なので、object の2次元配列から1ブロックで作る（列ごとの型推論を避ける）
+        table = np.empty((len(rows_table), n), dtype=object)
+        for i, r in enumerate(rows_table):
+            table[i, :] = r
+        return pd.DataFrame(table, index=idx_table, columns=[str(y) for y in self.years.tolist()])
+
+
+def calc_lifeplan_result(inputs: dict) -> LifePlanResult:
+    return LifePlanResult.from_rows(calc_lifeplan_rows(inputs))
+
+
+def calc_lifeplan(inputs: dict):
+    res = calc_lifeplan_result(inputs)
+    return res.df_long, res.df_table
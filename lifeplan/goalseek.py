@@ -0,0 +1,159 @@
+"""
+ゴールシーク（貯蓄残高がマイナスにならない生活費の上限・必要な初期貯蓄額の逆算）
+月の入力がある世帯は月次計算（lifeplan.monthly）の表の貯蓄残高で調べる
+"""
+import math
+
+import numpy as np
+
+from .engine import stack_inputs
+from .monthly import matrix_calc_for
+
+
+# =========================
+# ゴールシーク（二分探索をまとめて行う）
+# =========================
+GOAL_PROBES = 64          # 1回の計算で調べる点の数（範囲は1回ごとに 1/(GOAL_PROBES-1) に狭まる）
+SCALE_MAX = 20.0          # 生活費の倍率はここまでしか探さない
+SCALE_TOL = 0.0005        # 倍率の精度（0.05％）
+SAVINGS_STEP = 0.1        # 初期貯蓄額の刻み（万円、入力欄と同じ）
+SAVINGS_DOUBLINGS = 40    # 運用するとき、探す範囲を倍にするのはここまで（見当の約1兆倍）
+
+
+def _min_balance(res) -> np.ndarray:
+    # 世帯（ここでは探索の点）ごとの最低貯蓄残高。年数0なら +inf
+    return np.where(res["valid"], res["貯蓄残高"], np.inf).min(axis=1, initial=np.inf)
+
+
+def _batched_bisect(feasible, lo, hi, tol, increasing):
+    """
+    feasible(xs) -> bool配列 が x について単調なとき、True と False の境目を探す
+    - increasing=False：lo 側が True・hi 側が False。True の最大の x を返す
+    - increasing=True ：lo 側が False・hi 側が True。True の最小の x を返す
+    1回に GOAL_PROBES 点をまとめて計算するので、数回の計算で tol まで狭まる
+    戻り値：(x, 計算の回数)
+    """
+    rounds = 0
+    while hi - lo > tol:
+        xs = np.linspace(lo, hi, GOAL_PROBES)
+        ok = feasible(xs[1:-1])
+        rounds += 1
+        # 単調なので、lo 側と同じ判定の点の数がそのまま境目の位置になる
+        k = int(np.sum(ok != increasing))
+        lo, hi = float(xs[k]), float(xs[k + 1])
+    return (hi if increasing else lo), rounds
+
+
+def solve_max_spending_scale(inputs: dict, scale_max: float = SCALE_MAX, tol: float = SCALE_TOL) -> dict:
+    """
+    生活費8項目（夫婦期・切替後の月額の両方）を同じ倍率で増減したとき、
+    貯蓄残高が一度もマイナスにならない最大の倍率を探す（介護費・一時支出はそのまま）
+    戻り値：
+    - "scale": 倍率（1.0 が今の入力）。生活費を0にしてもマイナスになるときは None
+    - "capped": scale_max まで上げてもマイナスにならなかったとき True
+    - "monthly_now" / "monthly_at_scale": 生活費の月額合計（画面の「現在 合計」、万円/月）と、その倍率にしたときの値
+    - "min_balance": その倍率での最低貯蓄残高（万円）
+    - "rounds": 計算の回数（1回で GOAL_PROBES 点）
+    """
+    base = stack_inputs([inputs])
+    calc = matrix_calc_for(inputs)
+    m0, m20 = base["living_m"], base["living_m2"]
+
+    def min_balance_at(scales):
+        params = dict(base)
+        params["living_m"] = m0 * scales[:, None]
+        params["living_m2"] = m20 * scales[:, None]
+        return _min_balance(calc(params))
+
+    monthly_now = float(m0.sum())
+    out = {"scale": None, "capped": False, "monthly_now": monthly_now, "monthly_at_scale": None, "min_balance": None, "rounds": 1}
+
+    ends = min_balance_at(np.array([0.0, 1.0, float(scale_max)]))
+    if ends[0] < 0:
+        out["min_balance"] = float(ends[0])
+        return out
+    if ends[2] >= 0 or monthly_now <= 0:
+        scale, out["capped"] = float(scale_max), True
+    else:
+        # 今の入力（倍率1）がどちら側かで、探す範囲を半分にしておく
+        lo, hi = (1.0, float(scale_max)) if ends[1] >= 0 else (0.0, 1.0)
+        scale, rounds = _batched_bisect(lambda xs: min_balance_at(xs) >= 0, lo, hi, tol, increasing=False)
+        out["rounds"] += rounds
+        # 表示する桁（0.1％）にそろえる。切り下げた点はマイナスにならないので、境目はその次の点までにある
+        # （tol は 0.1％ より細かい）。次の点も調べて、マイナスにならない大きいほうを選ぶ
+        k = math.floor(scale * 1000.0)
+        cand = np.array([k, k + 1], dtype=np.float64) / 1000.0
+        ok = min_balance_at(cand) >= 0
+        out["rounds"] += 1
+        scale = float(cand[1] if ok[1] else cand[0])
+
+    out["scale"] = scale
+    out["monthly_at_scale"] = monthly_now * scale
+    out["min_balance"] = float(min_balance_at(np.array([scale]))[0])
+    return out
+
+
+def solve_min_start_savings(inputs: dict, step: float = SAVINGS_STEP) -> dict:
+    """
+    貯蓄残高が一度もマイナスにならない最小の初期貯蓄額（step 刻みで切り上げ）を探す
+    初期貯蓄額は収支に影響しない（残高がそのまま平行に動く）ので、初期貯蓄0の最低残高から見当をつけ、
+    その前後の刻みの点だけをまとめて計算して決める（表の残高は0.1万円で丸めるため）
+    貯蓄を運用するとき（inputs["invest"]）は、利回りが複利で効いて平行には動かないので、
+    初期貯蓄額について単調なことを使って 0〜見当 を二分探索し、境目の前後の刻みの点から決める
+    戻り値：
+    - "start_savings": 必要な初期貯蓄額（万円）
+    - "current": 入力の初期貯蓄額、"gap": 必要額 − 入力（プラスなら不足）
+    - "min_balance": 必要額にしたときの最低貯蓄残高（万円）
+    - "rounds": 計算の回数
+    """
+    base = stack_inputs([inputs])
+    calc = matrix_calc_for(inputs)
+
+    def min_balance_at(savings):
+        params = dict(base)
+        params["start_savings"] = np.asarray(savings, dtype=np.float64)
+        return _min_balance(calc(params))
+
+    zero_min = float(min_balance_at([0.0])[0])
+    rounds = 1
+    if zero_min >= 0:
+        need = 0.0
+    elif "inv_on" in base and base["inv_on"][0]:
+        # 見当（−最低残高）で足りなければ（利回りがマイナスの口座があるときなど）、足りるまで範囲を倍にする
+        lo, hi = 0.0, -zero_min
+        rounds += 1
+        while min_balance_at([hi])[0] < 0:
+            if rounds > SAVINGS_DOUBLINGS:
+                raise ValueError("初期貯蓄額をいくら増やしても、貯蓄残高がマイナスになります（期待利回りを確かめてください）")
+            lo, hi = hi, hi * 2.0
+            rounds += 1
+        x, n = _batched_bisect(lambda xs: min_balance_at(xs) >= 0, lo, hi, step, increasing=True)
+        rounds += n
+        # 境目は (x − step, x] にあるので、その前後の刻みの点をまとめて計算し、マイナスにならない最小の点を選ぶ
+        k = np.arange(max(math.floor(x / step) - 1, 0), math.ceil(x / step) + 1)
+        cand = np.round(k * step, 1)
+        ok = min_balance_at(cand) >= 0
+        rounds += 1
+        need = float(cand[np.argmax(ok)])
+    else:
+        # 見当（−最低残高）の前後 ±1万円の刻みの点をまとめて計算し、マイナスにならない最小の点を選ぶ
+        guess = -zero_min
+        k = np.arange(max(math.floor((guess - 1.0) / step), 0), math.ceil((guess + 1.0) / step) + 1)
+        cand = np.round(k * step, 1)
+        ok = min_balance_at(cand) >= 0
+        rounds += 1
+        while not ok.any():
+            # 丸めの誤差が見当より大きいことは無いはずだが、念のため広げる
+            cand = np.round(cand[-1] + step * np.arange(1, len(cand) + 1), 1)
+            ok = min_balance_at(cand) >= 0
+            rounds += 1
+        need = float(cand[np.argmax(ok)])
+
+    current = float(inputs["start_savings"])
+    return {
+        "start_savings": need,
+        "current": current,
+        "gap": round(need - current, 1),
+        "min_balance": float(min_balance_at([need])[0]),
+        "rounds": rounds,
+    }
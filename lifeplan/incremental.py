@@ -0,0 +1,180 @@
+"""
+差分計算（前回の入力から変わった行のまとまりだけ計算し直す）
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from .engine import (
+    ITEMS,
+    LifePlanResult,
+    _by_age_raw,
+    _care_raw,
+    _cashflow_rows,
+    _horizon,
+    _income_raw,
+    _invest_rows,
+    _living_raw,
+    _round1,
+    get_single_start_year_after,
+    stack_inputs,
+)
+
+
+# =========================
+# 行のまとまり（グループ）と、それぞれが使う入力
+# =========================
+HORIZON_KEYS = ("h_now", "h_die", "w_now", "w_die")
+# グループ名 → 使う入力のキー（年齢・死亡年齢はどのグループも使う）。生活費は項目ごとに f"living:{項目名}"
+GROUP_INPUTS = {
+    "income_h": ("h_inc_now", "h_g1", "h_ch_age", "h_inc_after", "h_g2"),
+    "income_w": ("w_inc_now", "w_g1", "w_ch_age", "w_inc_after", "w_g2"),
+    "lump_h": ("h_lump_map",),
+    "lump_w": ("w_lump_map",),
+    "care_h": ("h_care_start", "h_care_m", "h_care_g"),
+    "care_w": ("w_care_start", "w_care_m", "w_care_g"),
+    "spend_h": ("h_spend_map",),
+    "spend_w": ("w_spend_map",),
+}
+GROUP_ROWS = {
+    "income_h": "夫年収(手取り)", "income_w": "妻年収(手取り)",
+    "lump_h": "一時収入 夫", "lump_w": "一時収入 妻",
+    "care_h": "介護費 夫", "care_w": "介護費 妻",
+    "spend_h": "一時支出 夫", "spend_w": "一時支出 妻",
+}
+# グループごとに覚えておく結果の数（入力を戻したときにも使えるように少しだけ持つ）
+GROUP_KEEP = 4
+
+
+def _freeze(v):
+    # dict（{年齢: 金額} や生活費の設定）をキーに使える形にする
+    if isinstance(v, dict):
+        return tuple(sorted((str(k), _freeze(x)) for k, x in v.items()))
+    return v
+
+
+class IncrementalLifePlan:
+    """
+    calc_lifeplan_result と同じ結果を、前回からの差分だけ計算して返す（1世帯用。画面のセッションごとに1つ持つ）
+    - 行のまとまり（収入・一時収入・生活費の各項目・介護費・一時支出）ごとに、使う入力の値をキーにして丸める前の行を覚えておき、
+      キーが変わったまとまりだけ作り直す（年齢・死亡年齢が変わったときは全部）
+    - 生活費の各項目は、その項目の設定と単身期の割合だけで決まる
+    - 貯蓄残高は、現金収支が前回と変わった最初の年から積み上げ直す（それより前の年は前回の値をそのまま使う）
+      貯蓄を運用するとき（inputs["invest"]）は、口座ごとの残高を毎回最初から積み上げる
+    last_stats に、直前の計算で作り直したまとまりと、積み上げ直した最初の年目が入る
+    """
+
+    def __init__(self):
+        self._groups = {}
+        self._last = None
+        self.last_stats = {}
+
+    def _group(self, name, key, build):
+        store = self._groups.setdefault(name, OrderedDict())
+        if key in store:
+            store.move_to_end(key)
+            return store[key], False
+        value = build()
+        store[key] = value
+        while len(store) > GROUP_KEEP:
+            store.popitem(last=False)
+        return value, True
+
+    def rows(self, inputs: dict) -> dict:
+        """calc_lifeplan_rows と同じ形の dict を返す"""
+        horizon = tuple(int(inputs[k]) for k in HORIZON_KEYS)
+        # パラメータ行列は、作り直すグループがあるときだけ作る
+        P_box = []
+
+        def P():
+            if not P_box:
+                P_box.append(stack_inputs([inputs]))
+            return P_box[0]
+
+        H, _ = self._group("horizon", horizon, lambda: _horizon(P()))
+
+        def with_round(build):
+            # 丸める前の行（収入合計に使う）と丸めた行を一緒に覚えておく
+            return lambda: (lambda r: (r, _round1(r)))(build())
+
+        builders = {
+            "income_h": lambda: _income_raw(H, P(), "h"),
+            "income_w": lambda: _income_raw(H, P(), "w"),
+            "lump_h": lambda: _by_age_raw(H, P(), "h", "h_lump_map"),
+            "lump_w": lambda: _by_age_raw(H, P(), "w", "w_lump_map"),
+            "care_h": lambda: _care_raw(H, P(), "h"),
+            "care_w": lambda: _care_raw(H, P(), "w"),
+            "spend_h": lambda: _by_age_raw(H, P(), "h", "h_spend_map"),
+            "spend_w": lambda: _by_age_raw(H, P(), "w", "w_spend_map"),
+        }
+        dirty = []
+        raw, rounded = {}, {}
+        for name, keys in GROUP_INPUTS.items():
+            key = (horizon,) + tuple(_freeze(inputs[k]) for k in keys)
+            (raw[name], rounded[GROUP_ROWS[name]]), built = self._group(name, key, with_round(builders[name]))
+            if built:
+                dirty.append(name)
+        single_ratio = _freeze(inputs.get("single_ratio_pct", 100.0))
+        for j, nm in enumerate(ITEMS):
+            key = (horizon, _freeze(inputs["living_params"][nm]), single_ratio)
+            (_, rounded[nm]), built = self._group(f"living:{nm}", key, with_round(lambda j=j: _living_raw(H, P(), [j])[:, 0, :]))
+            if built:
+                dirty.append(f"living:{nm}")
+
+        # 合計は安い（年数ぶんの足し算）ので毎回行う
+        income_total = _round1(raw["income_h"] + raw["income_w"] + raw["lump_h"] + raw["lump_w"])
+
+        expense_total, cashflow = _cashflow_rows(
+            income_total, [rounded[nm] for nm in ITEMS],
+            rounded["介護費 夫"], rounded["介護費 妻"], rounded["一時支出 夫"], rounded["一時支出 妻"],
+        )
+        start = float(inputs["start_savings"])
+        inv_rows = {}
+        if inputs.get("invest"):
+            bal, first = _invest_rows(H, P(), cashflow, np.zeros_like(cashflow), inv_rows)[0], 0
+        else:
+            bal, first = self._balance(horizon, start, cashflow)
+
+        n = max(int(H["years_len"][0]), 0)
+        rows = {label: v[0, :n] for label, v in rounded.items()}
+        rows.update({label: v[0, :n] for label, v in inv_rows.items()})
+        rows["収入合計"] = income_total[0, :n]
+        rows["支出合計"], rows["現金収支"], rows["貯蓄残高"] = _round1(np.stack([expense_total[0, :n], cashflow[0, :n], bal[:n]]))
+        for k in ("h_age", "w_age", "h_alive", "w_alive"):
+            rows[k] = H[k][0, :n]
+        rows["years_len"] = int(H["years_len"][0])
+        rows["single_start_y"] = get_single_start_year_after(*horizon)
+
+        # 運用したときの残高は、次の単純な積み上げの続きには使えない
+        self._last = None if inv_rows else (horizon, start, cashflow[0].copy(), bal)
+        self.last_stats = {"recomputed": dirty, "balance_from_year": None if first is None else first + 1}
+        return rows
+
+    def _balance(self, horizon, start, cashflow):
+        # 丸める前の残高。前回と年数・初期貯蓄額が同じなら、現金収支が変わった最初の年から積み上げ直す
+        cf = cashflow[0]
+        last = self._last
+        if last is not None and last[0] == horizon and last[1] == start:
+            changed = np.flatnonzero(cf != last[2])
+            if len(changed) == 0:
+                return last[3], None
+            first = int(changed[0])
+        else:
+            first = 0
+        bal = np.empty(len(cf), dtype=np.float64)
+        if first > 0:
+            bal[:first] = last[3][:first]
+            prev = last[3][first - 1]
+        else:
+            prev = start
+        # cumsum は先頭から順に足すので、途中から続けても全体を積み上げたときと同じ値になる
+        bal[first:] = np.cumsum(np.concatenate([[prev], cf[first:]]))[1:]
+        return bal, first
+
+    def result(self, inputs: dict) -> LifePlanResult:
+        return LifePlanResult.from_rows(self.rows(inputs))
+
+    def clear(self) -> None:
+        self._groups.clear()
+        self._last = None
+
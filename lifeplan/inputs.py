@@ -0,0 +1,89 @@
+"""
+入力をそろえる（JSON・CSV の1行・保存データから、画面の「計算」で作る inputs と同じ形にする）
+一括計算（lifeplan.batch）・一括PDF・入力の保存（lifeplan.share）から使う
+"""
+import json
+
+from .engine import INT_KEYS, ITEMS, LIVING_KEYS, MAP_KEYS, SCALAR_KEYS, lumps_to_map
+from .invest import normalize_invest
+from .monthly import MONTH_KEYS, MONTHS
+
+
+# 一時収入/支出：{年齢: 金額} の代わりに、画面と同じ [使う, 年齢, 金額] のリストでも受け付ける
+LUMP_LIST_KEYS = {"h_lump_map": "h_lumps", "w_lump_map": "w_lumps", "h_spend_map": "h_spends", "w_spend_map": "w_spends"}
+
+
+# =========================
+# レコード → inputs
+# =========================
+def _maybe_json(v):
+    # CSV のセルに入れた {...} / [...] は JSON として読む
+    if isinstance(v, str):
+        sv = v.strip()
+        if sv[:1] in ("{", "["):
+            return json.loads(sv)
+        return sv
+    return v
+
+
+def normalize_record(rec: dict) -> dict:
+    """
+    1世帯ぶんのレコード（JSON の dict か CSV の1行）を calc_lifeplan の inputs にそろえる
+    - 生活費は "living_params"（dict）か、列 "living_食費_m" などのどちらでもよい
+    - 一時収入/支出は "h_lump_map" などの {年齢: 金額} か、"h_lumps" などのリスト（無ければ0件）
+      PDF の入力表で使うので、画面と同じ "h_lumps" などのリストも作っておく
+    - 貯蓄の運用は "invest"（dict、lifeplan.invest の INVEST_DEFAULT と同じ形。無ければ運用しない）
+    - 月単位で計算するときは "h_ch_month" など（lifeplan.monthly の MONTH_KEYS。1〜12 に寄せる。無ければ年単位）
+    足りない・おかしい値は ValueError
+    """
+    rec = {k: _maybe_json(v) for k, v in rec.items() if k is not None and v is not None and v != ""}
+    inputs = {}
+    for key in SCALAR_KEYS:
+        if key not in rec:
+            if key == "single_ratio_pct":
+                continue
+            raise ValueError(f"{key} がありません")
+        inputs[key] = int(float(rec[key])) if key in INT_KEYS else float(rec[key])
+
+    if inputs["h_die"] < inputs["h_now"]:
+        raise ValueError("夫：死亡年齢は現在年齢以上にしてください。")
+    if inputs["w_die"] < inputs["w_now"]:
+        raise ValueError("妻：死亡年齢は現在年齢以上にしてください。")
+
+    living = rec.get("living_params")
+    if not isinstance(living, dict):
+        living = {}
+        for nm in ITEMS:
+            living[nm] = {}
+            for k in LIVING_KEYS:
+                col = f"living_{nm}_{k}"
+                if col not in rec:
+                    raise ValueError(f"{col} がありません")
+                living[nm][k] = rec[col]
+    inputs["living_params"] = {}
+    for nm in ITEMS:
+        if nm not in living:
+            raise ValueError(f"living_params に「{nm}」がありません")
+        inputs["living_params"][nm] = {
+            k: int(float(living[nm][k])) if k == "after_years" else float(living[nm][k]) for k in LIVING_KEYS
+        }
+
+    for key in MAP_KEYS:
+        list_key = LUMP_LIST_KEYS[key]
+        if key in rec:
+            mp = {int(float(a)): float(v) for a, v in dict(rec[key]).items()}
+            lumps = [(True, a, v) for a, v in sorted(mp.items())]
+        elif list_key in rec:
+            lumps = [(bool(u), int(float(a)), float(v)) for u, a, v in rec[list_key]]
+            mp = lumps_to_map(lumps)
+        else:
+            mp, lumps = {}, []
+        inputs[key] = mp
+        inputs[list_key] = lumps
+
+    if rec.get("invest"):
+        inputs["invest"] = normalize_invest(dict(rec["invest"]))
+    for key in MONTH_KEYS:
+        if key in rec:
+            inputs[key] = min(max(int(float(rec[key])), 1), MONTHS)
+    return inputs
@@ -0,0 +1,174 @@
+"""
+貯蓄の運用（現金・債券・株式の3つに分けて持ち、利回り・取り崩す順番・リバランスで残高を積み上げる）
+NumPy だけで読み込める（engine からも使うので、engine は import しない）
+"""
+from typing import Optional
+
+import numpy as np
+
+
+# =========================
+# 運用の入力
+# =========================
+BUCKETS = ["現金", "債券", "株式"]
+# 表の行名（貯蓄残高の内訳）
+BUCKET_ROWS = [f"うち{nm}" for nm in BUCKETS]
+# inputs["invest"] の形（％はすべて年率）
+# - "alloc": BUCKETS の順の配分（％。合計が100でなくても割合にそろえる）
+# - "ret": 期待利回り（％）、"sd": 利回りのばらつき（±％、モンテカルロで使う）
+# - "order": 赤字の年に取り崩す順番（BUCKETS の番号）。黒字の年は先頭の口座に入れる
+# - "rebalance": 毎年の終わりに配分どおりに戻すか
+INVEST_DEFAULT = {
+    "alloc": [40.0, 30.0, 30.0],
+    "ret": [0.0, 1.0, 4.0],
+    "sd": [0.0, 3.0, 15.0],
+    "order": [0, 1, 2],
+    "rebalance": True,
+}
+# 期待利回り・ばらつき（％）の範囲（画面の入力欄と同じ。一括計算・保存データもこの範囲に限る）
+INVEST_RET_RANGE = (-20.0, 20.0)
+INVEST_SD_RANGE = (0.0, 50.0)
+# 取り崩す順番の選択肢（画面用）
+WITHDRAW_ORDERS = {
+    "現金→債券→株式": [0, 1, 2],
+    "現金→株式→債券": [0, 2, 1],
+    "債券→現金→株式": [1, 0, 2],
+}
+
+
+def normalize_invest(inv: dict) -> dict:
+    """inputs["invest"] を INVEST_DEFAULT と同じ形にそろえる（足りない値は既定値）。おかしい値は ValueError"""
+    out = {}
+    for k in ["alloc", "ret", "sd"]:
+        v = [float(x) for x in inv.get(k, INVEST_DEFAULT[k])]
+        if len(v) != len(BUCKETS):
+            raise ValueError(f"invest の {k} は {len(BUCKETS)} つの値にしてください")
+        out[k] = v
+    if min(out["alloc"]) < 0 or sum(out["alloc"]) <= 0:
+        raise ValueError("invest の配分は0以上で、合計を0より大きくしてください")
+    for k, (lo, hi) in [("ret", INVEST_RET_RANGE), ("sd", INVEST_SD_RANGE)]:
+        if not all(lo <= v <= hi for v in out[k]):
+            raise ValueError(f"invest の {k} は {lo:g}〜{hi:g}（％）にしてください")
+    order = [int(x) for x in inv.get("order", INVEST_DEFAULT["order"])]
+    if sorted(order) != list(range(len(BUCKETS))):
+        raise ValueError(f"invest の取り崩す順番は 0〜{len(BUCKETS) - 1} を1回ずつにしてください")
+    out["order"] = order
+    out["rebalance"] = bool(inv.get("rebalance", INVEST_DEFAULT["rebalance"]))
+    return out
+
+
+def stack_invest(inputs_list) -> dict:
+    """
+    inputs["invest"] を N世帯分の配列にまとめる（stack_inputs から、どれかの世帯に運用があるときだけ呼ぶ）
+    - "inv_on": (N,) 運用するか（しない世帯は全部現金・利回り0 で、残高はこれまでどおり単純な積み上げ）
+    - "inv_alloc": (N, 3) 配分の割合（合計1）、"inv_ret" / "inv_sd": (N, 3) ％
+    - "inv_order": (N, 3) 取り崩す順番、"inv_rebalance": (N,)
+    """
+    invs = [normalize_invest(d["invest"]) if d.get("invest") else None for d in inputs_list]
+    off = {"alloc": [100.0, 0.0, 0.0], "ret": [0.0] * len(BUCKETS), "sd": [0.0] * len(BUCKETS),
+           "order": list(range(len(BUCKETS))), "rebalance": False}
+    rows = [v or off for v in invs]
+    alloc = np.array([r["alloc"] for r in rows], dtype=np.float64).reshape(len(rows), len(BUCKETS))
+    return {
+        "inv_on": np.array([v is not None for v in invs], dtype=bool),
+        "inv_alloc": alloc / alloc.sum(axis=1, keepdims=True),
+        "inv_ret": np.array([r["ret"] for r in rows], dtype=np.float64).reshape(alloc.shape),
+        "inv_sd": np.array([r["sd"] for r in rows], dtype=np.float64).reshape(alloc.shape),
+        "inv_order": np.array([r["order"] for r in rows], dtype=np.int64).reshape(alloc.shape),
+        "inv_rebalance": np.array([r["rebalance"] for r in rows], dtype=bool),
+    }
+
+
+# =========================
+# 残高の積み上げ（年ごとに順番に。世帯・経路の方向はまとめて計算）
+# =========================
+def run_buckets(
+    start: np.ndarray,
+    cashflow: np.ndarray,
+    alloc: np.ndarray,
+    ret_pct: np.ndarray,
+    order: np.ndarray,
+    rebalance: np.ndarray,
+    valid: Optional[np.ndarray] = None,
+) -> dict:
+    """
+    口座ごとの残高を1年ずつ進める（前の年の残高で利回りが決まるので、年の方向は順番に計算する）
+    start (N,)、cashflow (N, T)、alloc (N, B)、ret_pct (N, B) か年ごとに振った (N, T以上, B)、order (N, B)、rebalance (N,)
+    1年の流れ：
+    1. 年の初めの残高に利回りを付ける（マイナスの口座＝借入には付けない）
+    2. 現金収支が黒字なら order の先頭の口座に入れ、赤字なら order の順に、プラスの口座から取り崩す
+       （全部取り崩しても足りない分は、先頭の口座のマイナスにする）
+    3. rebalance の世帯は、合計がプラスなら配分どおりに戻す
+    valid (N, T) が False の年（世帯の期間の後）は利回りを付けないので、残高は最終年の値がそのまま続く
+    戻り値："total" (N, T) 年末の合計、"gain" (N, T) 運用益、"hold" (N, T, B) 年末の口座ごとの残高
+    """
+    N, T = cashflow.shape
+    B = alloc.shape[1]
+    # 年のループの中は (口座, 世帯) の行だけを読み書きする：
+    # 口座は世帯ごとに「取り崩す順番」に並べ替え（_by_order）、年の方向は先頭に出しておく
+    order = np.asarray(order, dtype=np.int64)
+    ord_t = order.T
+    same = N > 0 and bool((order == order[:1]).all())
+    alloc = _by_order(np.asarray(alloc, dtype=np.float64).T, ord_t, same)
+    pct = np.asarray(ret_pct, dtype=np.float64)
+    by_year = pct.ndim == 3
+    # 年ごとの利回りは (B, N) ずつ取り出して並べ替える（大きな配列を丸ごと並べ替えない）
+    rate = pct.transpose(1, 2, 0) if by_year else _by_order(pct.T, ord_t, same) / 100.0
+    cash_t = np.ascontiguousarray(cashflow.T)
+    ok_t = np.ones((T, N), dtype=bool) if valid is None else np.ascontiguousarray(valid.T)
+    rb_rows = np.asarray(rebalance, dtype=bool)
+    rb_any = bool(rb_rows.any())
+
+    start = np.asarray(start, dtype=np.float64)
+    hold = np.maximum(start, 0.0)[None, :] * alloc
+    hold[0] += np.minimum(start, 0.0)
+
+    total = np.empty((T, N), dtype=np.float64)
+    gain = np.empty((T, N), dtype=np.float64)
+    hold_out = np.empty((T, B, N), dtype=np.float64)
+    g = np.empty((B, N), dtype=np.float64)
+    take = np.empty(N, dtype=np.float64)
+    need = np.empty(N, dtype=np.float64)
+    for t in range(T):
+        ok = ok_t[t]
+        np.maximum(hold, 0.0, out=g)
+        g *= _by_order(rate[t], ord_t, same) / 100.0 if by_year else rate
+        g *= ok
+        hold += g
+
+        cf = cash_t[t]
+        np.negative(cf, out=need)
+        np.maximum(need, 0.0, out=need)
+        for j in range(B):
+            np.maximum(hold[j], 0.0, out=take)
+            np.minimum(take, need, out=take)
+            hold[j] -= take
+            need -= take
+        hold[0] += np.maximum(cf, 0.0) - need
+
+        tot = hold.sum(axis=0)
+        if rb_any:
+            rb = rb_rows & (tot > 0) & ok
+            hold = np.where(rb, tot * alloc, hold)
+
+        total[t] = tot
+        g.sum(axis=0, out=gain[t])
+        hold_out[t] = hold
+    # 口座の並びを BUCKETS の順に戻す（戻り値は (N, T) / (N, T, B) の形で見せる）
+    back = np.argsort(order, axis=1).T
+    hold_out = hold_out[:, back[:, 0], :] if same else np.take_along_axis(hold_out, back[None, :, :], axis=1)
+    return {"total": total.T, "gain": gain.T, "hold": hold_out.transpose(2, 0, 1)}
+
+
+def _by_order(x: np.ndarray, ord_t: np.ndarray, same: bool) -> np.ndarray:
+    # (..., B, N) の口座の軸を、世帯ごとの取り崩す順番 ord_t (B, N) に並べ替える。全世帯が同じ順番なら行の入れ替えだけ
+    if same:
+        return x[..., ord_t[:, 0], :]
+    return np.take_along_axis(x, np.broadcast_to(ord_t, x.shape), axis=-2)
+
+
+def sample_returns(P: dict, n: int, T: int, rng: np.random.Generator) -> np.ndarray:
+    """利回りを 期待利回り±sd（％、正規分布）で年ごとに振る：(n, T, B)。P は stack_invest の値（先頭の次元は 1 か n）"""
+    ret = np.broadcast_to(P["inv_ret"], (n, len(BUCKETS)))[:, None, :]
+    sd = np.broadcast_to(P["inv_sd"], (n, len(BUCKETS)))[:, None, :]
+    return ret + sd * rng.standard_normal((n, T, len(BUCKETS)))
@@ -0,0 +1,156 @@
+"""
+寿命の組み合わせ（夫・妻の死亡年齢を振ったときの最低・最終貯蓄残高：ヒートマップ用）
+"""
+import numpy as np
+import pandas as pd
+
+from .engine import (
+    ITEMS,
+    _by_age_raw,
+    _care_raw,
+    _horizon,
+    _income_raw,
+    _living_raw,
+    _round1,
+    stack_inputs,
+)
+from .invest import run_buckets
+from .monthly import calc_lifeplan_monthly_matrix, stack_months, uses_monthly
+
+
+# =========================
+# 寿命の組み合わせ（ヒートマップ）
+# =========================
+LONGEVITY_DIE_MIN = 75
+LONGEVITY_DIE_MAX = 105
+
+
+def _die_range(now_age: int, die_now: int, lo: int, hi: int) -> np.ndarray:
+    # 年齢0の人（おひとりさま入力）は振らない。現在年齢より前には亡くならない
+    if now_age <= 0:
+        return np.array([die_now], dtype=np.int64)
+    lo = max(int(lo), now_age)
+    return np.arange(lo, max(int(hi), lo) + 1, dtype=np.int64)
+
+
+def _grid_balance(inputs: dict, h_dies: np.ndarray, w_dies: np.ndarray):
+    # 年次計算の貯蓄残高（丸めた値）(夫の人数, 妻の人数, T) と、valid (同じ形)・年数 (夫の人数, 妻の人数)
+    h_now, w_now = int(inputs["h_now"]), int(inputs["w_now"])
+    nh, nw = len(h_dies), len(w_dies)
+
+    # いちばん長い期間（どちらも最後まで生きる場合）で、夫・妻それぞれの行を作る
+    P = stack_inputs([inputs])
+    P["h_die"], P["w_die"] = h_dies[-1:], w_dies[-1:]
+    H = _horizon(P)
+    T = H["T"]
+    t = np.arange(T, dtype=np.int64)
+
+    def spouse_rows(who, dies, now_age):
+        # (死亡年齢の数, T)：その年齢で亡くなった場合の行（丸める前）
+        alive = t[None, :] <= (dies - now_age)[:, None]
+        return {
+            name: np.where(alive, row, 0.0)
+            for name, row in [
+                ("income", _income_raw(H, P, who)),
+                ("lump", _by_age_raw(H, P, who, f"{who}_lump_map")),
+                ("care", _care_raw(H, P, who)),
+                ("spend", _by_age_raw(H, P, who, f"{who}_spend_map")),
+            ]
+        }
+
+    hr, wr = spouse_rows("h", h_dies, h_now), spouse_rows("w", w_dies, w_now)
+
+    # 年数・単身期開始（年目）は組み合わせごと
+    h_death_y = (h_dies - h_now + 1)[:, None]
+    w_death_y = (w_dies - w_now + 1)[None, :]
+    years_len = np.maximum(h_death_y, w_death_y)
+    single_start = np.minimum(h_death_y, w_death_y) + 1
+    valid = t[None, None, :] < years_len[:, :, None]
+
+    # 生活費：単身期開始の年目ごとに1回だけ作る（期間は最長にしておき、あとで組み合わせごとの年数で切る）
+    starts, s_idx = np.unique(single_start, return_inverse=True)
+    s_idx = s_idx.reshape(single_start.shape)
+    ns = len(starts)
+    HS = dict(H)
+    HS["N"] = ns
+    HS["single_start_y"] = starts
+    HS["years_len"] = np.full(ns, T, dtype=np.int64)
+    HS["valid"] = np.ones((ns, T), dtype=bool)
+    PS = {k: np.repeat(P[k], ns, axis=0) for k in ["living_m", "living_g", "living_m2", "living_g2", "living_after_years", "single_ratio_pct"]}
+    living = _round1(_living_raw(HS, PS))
+    living_total = np.zeros((ns, T), dtype=np.float64)
+    for i in range(len(ITEMS)):
+        living_total = living_total + living[:, i, :]
+
+    # 組み合わせ (nh, nw, T) で合計と残高（足す順番は calc_lifeplan_matrix と同じ）
+    hx = {k: v[:, None, :] for k, v in hr.items()}
+    wx = {k: v[None, :, :] for k, v in wr.items()}
+    income_total = _round1(hx["income"] + wx["income"] + hx["lump"] + wx["lump"])
+    care = _round1(hx["care"]) + _round1(wx["care"])
+    spend = _round1(hx["spend"]) + _round1(wx["spend"])
+    expense_total = np.where(valid, living_total[s_idx], 0.0) + care + spend
+    cashflow = income_total - expense_total
+    if "inv_on" in P and P["inv_on"][0]:
+        M = nh * nw
+        rep = lambda k: np.broadcast_to(P[k], (M,) + P[k].shape[1:])
+        bal = run_buckets(
+            np.full(M, float(inputs["start_savings"])), cashflow.reshape(M, T),
+            rep("inv_alloc"), rep("inv_ret"), rep("inv_order"), rep("inv_rebalance"), valid.reshape(M, T),
+        )["total"].reshape(nh, nw, T)
+    else:
+        bal = float(inputs["start_savings"]) + np.zeros((nh, nw, 1))
+        bal = np.cumsum(np.concatenate([bal, cashflow], axis=2), axis=2)[:, :, 1:]
+    bal = _round1(bal)
+    return bal, valid, years_len
+
+
+def run_longevity_grid(inputs: dict, die_min: int = LONGEVITY_DIE_MIN, die_max: int = LONGEVITY_DIE_MAX) -> dict:
+    """
+    夫・妻の死亡年齢を die_min〜die_max のすべての組み合わせで計算し、最低・最終貯蓄残高を返す
+    calc_lifeplan_matrix と同じ値を、組み合わせごとに全部計算し直さずに作る：
+    - 夫（妻）の収入・一時収入・介護費・一時支出は、いちばん長生きした場合の行を1回だけ作り、亡くなった後を0にする
+    - 生活費は単身期の始まる年目だけで決まるので、その年目ごとに1回だけ作る
+    - 残りの足し算と残高の積み上げだけを、組み合わせ（夫の人数×妻の人数）の配列でまとめて行う
+      （貯蓄を運用するときは、口座ごとの積み上げ run_buckets を組み合わせの数だけまとめて行う）
+    月の入力があるときは、組み合わせを世帯として並べて calc_lifeplan_monthly_matrix で計算する（表の貯蓄残高で見る）
+    戻り値：
+    - "h_dies" / "w_dies": 振った死亡年齢
+    - "min_balance" / "final_balance" / "min_year": (夫の死亡年齢の数, 妻の死亡年齢の数) の配列（万円・年目）
+    - "grid": 1行1組み合わせの DataFrame（ヒートマップ用）
+    """
+    h_now, w_now = int(inputs["h_now"]), int(inputs["w_now"])
+    h_dies = _die_range(h_now, int(inputs["h_die"]), die_min, die_max)
+    w_dies = _die_range(w_now, int(inputs["w_die"]), die_min, die_max)
+    nh, nw = len(h_dies), len(w_dies)
+
+    if uses_monthly(inputs):
+        P = stack_inputs([inputs])
+        P["h_die"], P["w_die"] = np.repeat(h_dies, nw), np.tile(w_dies, nh)
+        rows = calc_lifeplan_monthly_matrix(P, stack_months([inputs]))
+        T = rows["貯蓄残高"].shape[1]
+        bal = rows["貯蓄残高"].reshape(nh, nw, T)
+        valid = rows["valid"].reshape(nh, nw, T)
+        years_len = rows["years_len"].reshape(nh, nw)
+    else:
+        bal, valid, years_len = _grid_balance(inputs, h_dies, w_dies)
+
+    min_year = np.argmin(np.where(valid, bal, np.inf), axis=2)
+    min_balance = np.take_along_axis(bal, min_year[:, :, None], axis=2)[:, :, 0]
+    final_balance = np.take_along_axis(bal, (years_len - 1)[:, :, None], axis=2)[:, :, 0]
+
+    hh, ww = np.meshgrid(h_dies, w_dies, indexing="ij")
+    grid = pd.DataFrame({
+        "夫の死亡年齢": hh.ravel(),
+        "妻の死亡年齢": ww.ravel(),
+        "最低残高(万円)": min_balance.ravel(),
+        "最終残高(万円)": final_balance.ravel(),
+        "最低残高の年目": (min_year + 1).ravel(),
+    })
+    return {
+        "h_dies": h_dies,
+        "w_dies": w_dies,
+        "min_balance": min_balance,
+        "final_balance": final_balance,
+        "min_year": min_year + 1,
+        "grid": grid,
+    }
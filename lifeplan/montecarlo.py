@@ -0,0 +1,114 @@
+"""
+モンテカルロ（上昇率・死亡年齢のばらつき）
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .engine import ITEMS, stack_inputs
+from .invest import sample_returns
+from .monthly import matrix_calc_for
+
+
+# =========================
+# モンテカルロ（上昇率・死亡年齢のばらつき）
+# =========================
+MC_RATE_KEYS = ["h_g1", "h_g2", "w_g1", "w_g2", "h_care_g", "w_care_g"]
+MC_LIVING_RATE_KEYS = ["living_g", "living_g2"]
+MC_MIN_ALIVE_SHARE = 0.05
+
+
+def run_monte_carlo(
+    inputs: dict,
+    n_paths: int = 10000,
+    rate_sd: float = 1.0,
+    die_sd: float = 0.0,
+    seed: Optional[int] = None,
+    chunk_size: int = 1000,
+) -> dict:
+    """
+    上昇率（収入・生活費8項目・介護費）を 入力値±rate_sd（％ポイント、正規分布）で振り、
+    die_sd > 0 なら死亡年齢も ±die_sd 年で振って n_paths 通り計算する
+    貯蓄を運用するとき（inputs["invest"]）は、口座ごとの利回りも 期待利回り±sd で年ごとに振る
+    月の入力があれば月次で計算する（集計は年末の貯蓄残高）
+    chunk_size 通りずつ計算するので、途中の配列の大きさは n_paths によらず一定
+    乱数は経路ごとに順に引くので、同じ seed なら chunk_size を変えても結果は同じ
+    戻り値：
+    - "bands": 年目ごとの貯蓄残高 5%/50%/95% 点（DataFrame、その年まで世帯が続いている経路だけで集計。
+      続いている経路が MC_MIN_ALIVE_SHARE 未満になった年以降は含めない）
+    - "prob_negative": 途中で一度でも貯蓄残高がマイナスになる確率
+    - "prob_negative_by_year": 年目ごとのマイナス確率
+    """
+    # 上昇率・死亡年齢のばらつきと、利回りのばらつきは別の乱数列（どちらも1経路ずつ順に引く）
+    rng, rng_ret = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(2)]
+    base = stack_inputs([inputs])
+    calc = matrix_calc_for(inputs)
+    n_paths = max(int(n_paths), 1)
+    chunk_size = max(int(chunk_size), 1)
+
+    h_now, w_now = int(inputs["h_now"]), int(inputs["w_now"])
+    die_max = 120
+    if die_sd > 0:
+        # 年齢0の人（おひとりさま入力）は振らない
+        h_hi = int(inputs["h_die"]) + (int(np.ceil(4 * die_sd)) if h_now > 0 else 0)
+        w_hi = int(inputs["w_die"]) + (int(np.ceil(4 * die_sd)) if w_now > 0 else 0)
+        T = max(min(h_hi, die_max) - h_now, min(w_hi, die_max) - w_now, int(inputs["h_die"]) - h_now, int(inputs["w_die"]) - w_now) + 1
+    else:
+        T = max(int(inputs["h_die"]) - h_now, int(inputs["w_die"]) - w_now) + 1
+    T = max(T, 0)
+
+    bal_all = np.full((n_paths, T), np.nan, dtype=np.float32)
+    ever_negative = 0
+
+    for start in range(0, n_paths, chunk_size):
+        c = min(chunk_size, n_paths - start)
+        params = dict(base)
+        # 1行 = 1経路：[MC_RATE_KEYS, MC_LIVING_RATE_KEYS（各8項目）, 夫・妻の死亡年齢]
+        z = rng.standard_normal((c, len(MC_RATE_KEYS) + len(MC_LIVING_RATE_KEYS) * len(ITEMS) + 2))
+        for i, key in enumerate(MC_RATE_KEYS):
+            params[key] = base[key] + rate_sd * z[:, i]
+        for i, key in enumerate(MC_LIVING_RATE_KEYS):
+            j = len(MC_RATE_KEYS) + i * len(ITEMS)
+            params[key] = base[key] + rate_sd * z[:, j:j + len(ITEMS)]
+        if die_sd > 0:
+            for i, (who, now_age) in enumerate((("h", h_now), ("w", w_now))):
+                if now_age > 0:
+                    d = base[f"{who}_die"] + np.rint(die_sd * z[:, -2 + i]).astype(np.int64)
+                    params[f"{who}_die"] = np.clip(d, now_age, die_max)
+        if "inv_on" in base:
+            params["inv_ret"] = sample_returns(base, c, T, rng_ret)
+
+        res = calc(params)
+        bal = np.where(res["valid"], res["貯蓄残高"], np.nan)
+        n = bal.shape[1]
+        bal_all[start:start + c, :n] = bal[:, :T]
+        ever_negative += int(((res["貯蓄残高"] < 0) & res["valid"]).any(axis=1).sum())
+
+    # 死亡年齢を振ると後ろの年ほど経路が減るので、5%未満しか残らない年は集計しない
+    alive_paths = np.sum(~np.isnan(bal_all), axis=0)
+    keep = int(np.sum(alive_paths >= max(MC_MIN_ALIVE_SHARE * n_paths, 1)))
+    bal_all = bal_all[:, :keep]
+    alive_paths = alive_paths[:keep]
+    if np.isnan(bal_all).any():
+        p5, p50, p95 = np.nanpercentile(bal_all, [5, 50, 95], axis=0)
+    else:
+        p5, p50, p95 = np.percentile(bal_all, [5, 50, 95], axis=0)
+    prob_by_year = np.sum(bal_all < 0, axis=0) / np.maximum(alive_paths, 1)
+
+    bands = pd.DataFrame({
+        "年目": np.arange(1, keep + 1),
+        "5%点(万円)": np.round(p5.astype(np.float64), 1),
+        "中央値(万円)": np.round(p50.astype(np.float64), 1),
+        "95%点(万円)": np.round(p95.astype(np.float64), 1),
+        "マイナス確率(％)": np.round(prob_by_year * 100.0, 1),
+        "継続中の経路(％)": np.round(alive_paths / n_paths * 100.0, 1),
+    })
+    return {
+        "bands": bands,
+        "prob_negative": ever_negative / n_paths,
+        "prob_negative_by_year": prob_by_year,
+        "n_paths": n_paths,
+        "rate_sd": float(rate_sd),
+        "die_sd": float(die_sd),
+    }
@@ -0,0 +1,175 @@
+"""
+月次計算（1か月きざみ。年の途中の退職・介護の始まりと、年の途中の貯蓄残高の落ち込みを見る）
+表は年次と同じ形にまとめる。年次計算（calc_lifeplan_matrix）は何も変えないので遅くならない
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .engine import (
+    ITEMS, LifePlanResult, _broadcast_params, _by_age_raw, _growth, _horizon, _living_raw, _round1,
+    _rows_from_raw, calc_lifeplan_matrix, stack_inputs,
+)
+
+
+# =========================
+# 月の入力（無ければ 1月 = 年次と同じ）
+# =========================
+MONTHS = 12
+# 年齢が変わる年の何か月目から切り替わるか（1〜12）。収入は h_ch_age / w_ch_age、介護費は h_care_start / w_care_start の年
+MONTH_KEYS = ["h_ch_month", "w_ch_month", "h_care_month", "w_care_month"]
+
+
+def uses_monthly(inputs: dict) -> bool:
+    """inputs に月の入力があれば月次で計算する（画面で「月単位で計算する」を選んだとき）"""
+    return any(k in inputs for k in MONTH_KEYS)
+
+
+def stack_months(inputs_list) -> dict:
+    """MONTH_KEYS を (N,) の 0始まりの月（0〜11）にまとめる（無い・範囲外は 1月 / 12月に寄せる）"""
+    return {
+        k: np.clip(np.array([int(d.get(k, 1)) for d in inputs_list], dtype=np.int64), 1, MONTHS) - 1
+        for k in MONTH_KEYS
+    }
+
+
+# =========================
+# 月ごとの行（N, T, 12）
+# =========================
+# 年額で持つ（月の額は 12 で割る）。年にまとめるときは 1月の値 + (各月 − 1月)/12 なので、
+# 年の途中で変わらない年は年次計算と末尾ビットまで同じ値になる
+def _rollup(R: np.ndarray) -> np.ndarray:
+    R0 = R[:, :, 0]
+    return R0 + (R - R0[:, :, None]).sum(axis=2) / MONTHS
+
+
+def _income_monthly(H: dict, P: dict, M: dict, who: str, mo: np.ndarray) -> np.ndarray:
+    # 手取り年収（年額、丸める前）。切り替わる年は M の月から inc_after に変わる
+    ages, alive, now_age = H[f"{who}_age"][:, :, None], H[f"{who}_alive"][:, :, None], P[f"{who}_now"][:, None, None]
+    inc1, g1, inc2, g2 = P[f"{who}_inc_now"], P[f"{who}_g1"], P[f"{who}_inc_after"], P[f"{who}_g2"]
+    ch, chm = P[f"{who}_ch_age"][:, None, None], M[f"{who}_ch_month"][:, None, None]
+    after = (ch != 0) & ((ages > ch) | ((ages == ch) & (mo >= chm)))
+    v1 = inc1[:, None, None] * _growth(g1[:, None, None], np.where(after, 0, ages - now_age))
+    v2 = inc2[:, None, None] * _growth(g2[:, None, None], np.where(after, ages - ch, 0))
+    return np.where(alive, np.where(after, v2, v1), 0.0)
+
+
+def _care_monthly(H: dict, P: dict, M: dict, who: str, mo: np.ndarray) -> np.ndarray:
+    # 介護費（年額、丸める前）。始まる年は M の月から
+    ages, alive = H[f"{who}_age"][:, :, None], H[f"{who}_alive"][:, :, None]
+    st_age, stm = P[f"{who}_care_start"][:, None, None], M[f"{who}_care_month"][:, None, None]
+    on = (st_age != 0) & alive & ((ages > st_age) | ((ages == st_age) & (mo >= stm)))
+    mm = P[f"{who}_care_m"][:, None, None] * _growth(P[f"{who}_care_g"][:, None, None], np.where(on, ages - st_age, 0))
+    return np.where(on, mm * 12.0, 0.0)
+
+
+# =========================
+# 月次計算（N世帯をまとめて）
+# =========================
+def calc_lifeplan_monthly_matrix(params: dict, months: Optional[dict] = None) -> dict:
+    """
+    calc_lifeplan_matrix の月次版（months は stack_months の戻り値。None なら全部 1月）
+    戻り値は calc_lifeplan_matrix と同じキー（年にまとめた表の行）に、次を足したもの
+    - "cash_m" / "bal_m": 月ごとの現金収支・貯蓄残高 (N, T*12)（丸める前）
+    - "valid_m": (N, T*12)
+    - "min_bal_m" / "min_step_m": 月末の貯蓄残高の最低値とその月（0始まりの通し月。年目 = //12 + 1）
+    一時収入・一時支出はその年齢の年の最初の月に入れる。生活費は年の中で同じ額
+    月末の残高は、前の年末の貯蓄残高（表の値）に、その年の月ごとの収支を足していく（12月末は表の値と同じ）
+    12月末の残高だけは表の値にそろえる（行ごとの丸めの差と、貯蓄を運用するときのその年の運用益はここに入る）。
+    cash_m は月ごとの収支のままで、この差は入れない
+    """
+    P = _broadcast_params(params)
+    H = _horizon(P)
+    N, T = H["N"], H["T"]
+    M = months if months is not None else {k: np.zeros(N, dtype=np.int64) for k in MONTH_KEYS}
+    M = {k: np.broadcast_to(np.asarray(v, dtype=np.int64), (N,)) for k, v in M.items()}
+    mo = np.arange(MONTHS, dtype=np.int64)[None, None, :]
+
+    inc_h, inc_w = _income_monthly(H, P, M, "h", mo), _income_monthly(H, P, M, "w", mo)
+    care_h, care_w = _care_monthly(H, P, M, "h", mo), _care_monthly(H, P, M, "w", mo)
+    living = _living_raw(H, P)
+
+    k = 5 + len(ITEMS)
+    raw = np.empty((k + 4, N, T), dtype=np.float64)
+    raw[0], raw[1] = _rollup(inc_h), _rollup(inc_w)
+    raw[2], raw[3] = _by_age_raw(H, P, "h", "h_lump_map"), _by_age_raw(H, P, "w", "w_lump_map")
+    raw[5:k] = np.moveaxis(living, 1, 0)
+    raw[k], raw[k + 1] = _rollup(care_h), _rollup(care_w)
+    raw[k + 2], raw[k + 3] = _by_age_raw(H, P, "h", "h_spend_map"), _by_age_raw(H, P, "w", "w_spend_map")
+    lump = (raw[2] + raw[3]) - (raw[k + 2] + raw[k + 3])
+    rows = _rows_from_raw(H, P, raw)
+
+    # 月ごとの収支（年額の行を 12 で割る）と、年の中の残高
+    cash = ((inc_h + inc_w) - (care_h + care_w) - living.sum(axis=1)[:, :, None]) / MONTHS
+    cash[:, :, 0] += lump
+    start = np.concatenate([P["start_savings"].astype(np.float64)[:, None], rows["貯蓄残高"][:, :-1]], axis=1)
+    bal = start[:, :, None] + np.cumsum(cash, axis=2)
+    # 年末の残高は表の貯蓄残高にそろえる（収支の月の値は変えない）
+    bal[:, :, -1] = rows["貯蓄残高"]
+
+    valid_m = np.repeat(H["valid"], MONTHS, axis=1)
+    rows["cash_m"] = cash.reshape(N, T * MONTHS)
+    rows["bal_m"] = bal.reshape(N, T * MONTHS)
+    rows["valid_m"] = valid_m
+    if T:
+        step = np.argmin(np.where(valid_m, rows["bal_m"], np.inf), axis=1)
+        rows["min_step_m"] = step
+        rows["min_bal_m"] = np.take_along_axis(rows["bal_m"], step[:, None], axis=1)[:, 0]
+    else:
+        rows["min_step_m"] = np.zeros(N, dtype=np.int64)
+        rows["min_bal_m"] = np.full(N, np.nan)
+    return rows
+
+
+def matrix_calc_for(inputs: dict):
+    """
+    1世帯の inputs を振って計算するとき（ゴールシーク・感度分析・寿命・モンテカルロ）の計算関数 params -> 行 を返す
+    月の入力があれば、その世帯の月で calc_lifeplan_monthly_matrix、無ければ calc_lifeplan_matrix
+    どちらも表の行（年にまとめた値）は同じキーで返る
+    """
+    if not uses_monthly(inputs):
+        return calc_lifeplan_matrix
+    months = stack_months([inputs])
+    return lambda params: calc_lifeplan_monthly_matrix(params, months)
+
+
+def calc_lifeplan_monthly_batch(inputs_list) -> dict:
+    """inputs のリストをまとめて月次で計算する"""
+    inputs_list = list(inputs_list)
+    return calc_lifeplan_monthly_matrix(stack_inputs(inputs_list), stack_months(inputs_list))
+
+
+# =========================
+# 1世帯（画面・PDF用）
+# =========================
+def calc_lifeplan_monthly(inputs: dict) -> dict:
+    """
+    1世帯を月次で計算する
+    - "result": 年にまとめた LifePlanResult（表・グラフ・PDF・アドバイスは年次と同じように使える）
+    - "months": 1行 = 1か月（年目, 月, 通し月, 現金収支(万円), 貯蓄残高(万円)）。金額は小数1桁
+    - "min_balance" / "min_year" / "min_month": 月末の貯蓄残高の最低値と、その年目・月
+    """
+    m = calc_lifeplan_monthly_batch([inputs])
+    n = max(int(m["years_len"][0]), 0)
+    rows = {k: v[0, :n] for k, v in m.items() if np.ndim(v) == 2 and not k.endswith("_m") and k != "valid"}
+    rows["years_len"] = n
+    rows["single_start_y"] = int(m["single_start_y"][0]) or None
+    res = LifePlanResult.from_rows(rows)
+
+    steps = np.arange(n * MONTHS)
+    months = pd.DataFrame({
+        "年目": steps // MONTHS + 1,
+        "月": steps % MONTHS + 1,
+        "通し月": steps + 1,
+        "現金収支(万円)": _round1(m["cash_m"][0, :n * MONTHS]),
+        "貯蓄残高(万円)": _round1(m["bal_m"][0, :n * MONTHS]),
+    })
+    step = int(m["min_step_m"][0])
+    return {
+        "result": res,
+        "months": months,
+        "min_balance": float(_round1(m["min_bal_m"][:1])[0]) if n else None,
+        "min_year": step // MONTHS + 1 if n else None,
+        "min_month": step % MONTHS + 1 if n else None,
+    }
@@ -0,0 +1,444 @@
+"""
+PDFレポート（reportlab）とグラフ画像（matplotlib）
+画面なしでも使えるが、重い依存があるので lifeplan 本体からは import しない
+"""
+import html
+import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from io import BytesIO
+from typing import List, Optional, Tuple
+
+import matplotlib
+import matplotlib.pyplot as plt
+from matplotlib import font_manager
+import numpy as np
+import pandas as pd
+
+from reportlab import rl_config
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib import colors
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.graphics.shapes import Drawing, Group, Line, PolyLine, Polygon, Circle, Rect, String
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+
+from .engine import LifePlanResult
+from .table import _format_cells, build_inputs_table
+from .timing import NO_TIMER, StageTimer
+
+APP_TITLE = "シニア夫婦のライフプラン・シミュレーション"
+
+# PDF 1通あたりの時間の目安（既定の40年・アドバイス付き、C拡張なしの reportlab で）。
+# 多くのお客さま分をまとめて作るときの見積もりに使う。benchmarks/bench_lifeplan.py がこれを超えると失敗にする
+PDF_REPORT_BUDGET_MS = 150.0
+
+_a85_lock = threading.Lock()
+_a85_state = {"depth": 0, "prev": None}
+
+
+@contextmanager
+def _without_ascii85():
+    """
+    この中で作る PDF は、ページの中身を ASCII85 で文字にしない（zlib 圧縮だけ）。
+    C拡張の無い環境では ASCII85 が純Pythonで遅く、ファイルも小さくなる。
+    reportlab のこの設定はプロセス全体で1つなので、import では変えず、作っている間だけ変えて元に戻す
+    （画面のスレッドが同時に作っても、最後の1通が終わるまで戻さない）
+    """
+    with _a85_lock:
+        if _a85_state["depth"] == 0:
+            _a85_state["prev"] = rl_config.useA85
+            rl_config.useA85 = 0
+        _a85_state["depth"] += 1
+    try:
+        yield
+    finally:
+        with _a85_lock:
+            _a85_state["depth"] -= 1
+            if _a85_state["depth"] == 0:
+                rl_config.useA85 = _a85_state["prev"]
+
+
+# =========================
+# 日本語フォント（□対策：オンラインPDF用）
+# =========================
+@lru_cache(maxsize=None)
+def get_font_registry() -> dict:
+    """
+    日本語フォントをプロセスで1回だけ解決して、matplotlib と reportlab で共用する
+    - "mpl_fp": グラフの文字に直指定する FontProperties
+    - "mpl_font_name": matplotlib 側のフォント名（見つからなければ None）
+    - "pdf_font": reportlab の表・本文に使うフォント名
+    """
+    # 文字化け（□）対策の基本
+    matplotlib.rcParams["axes.unicode_minus"] = False
+
+    # fonts/ はリポジトリ直下（lifeplan_senior.py と同じ場所）
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    font_path = os.path.join(here, "fonts", "NotoSansJP-Regular.otf")
+
+    reg = {"font_path": font_path, "font_path_exists": os.path.exists(font_path)}
+
+    # 同梱フォントがある場合：これを最優先で使う
+    if reg["font_path_exists"]:
+        font_manager.fontManager.addfont(font_path)
+        fp = font_manager.FontProperties(fname=font_path)
+
+        # ここが肝：font.family / sans-serif を確実に Noto Sans JP にする
+        matplotlib.rcParams["font.family"] = "sans-serif"
+        matplotlib.rcParams["font.sans-serif"] = [fp.get_name()]
+        reg["mpl_fp"], reg["mpl_font_name"] = fp, fp.get_name()
+    else:
+        # フォントが無い場合でも落とさず、候補を試す（ローカル向け保険）
+        candidates = [
+            "Yu Gothic", "Yu Gothic UI", "Meiryo", "MS Gothic", "MS PGothic",
+            "Hiragino Sans", "Noto Sans CJK JP", "IPAexGothic", "TakaoGothic"
+        ]
+        available = {f.name for f in font_manager.fontManager.ttflist}
+        found = next((name for name in candidates if name in available), None)
+        if found is not None:
+            matplotlib.rcParams["font.family"] = found
+            reg["mpl_fp"], reg["mpl_font_name"] = font_manager.FontProperties(family=found), found
+        else:
+            # 何も見つからない場合でも返す（最悪でもクラッシュさせない）
+            reg["mpl_fp"], reg["mpl_font_name"] = font_manager.FontProperties(), None
+
+    # reportlab：CIDフォント（埋め込み不要）を1回だけ登録
+    try:
+        pdfmetrics.registerFont(UnicodeCIDFont("HeiseiKakuGo-W5"))
+        reg["pdf_font"] = "HeiseiKakuGo-W5"
+    except Exception:
+        reg["pdf_font"] = "Helvetica"
+    return reg
+
+
+def make_chart_png(df_long: pd.DataFrame, y_col: str, title: str) -> bytes:
+    fp = get_font_registry()["mpl_fp"]
+
+    fig = plt.figure(figsize=(10, 4.2))
+    ax = fig.add_subplot(111)
+
+    # 0ライン（赤）
+    ax.axhline(0, color="red", linewidth=2, linestyle="--")
+
+    # 線
+    ax.plot(df_long["年目"], df_long[y_col], marker="o")
+
+    # ★ここが本命：フォントを「直指定」してオンラインでも日本語を強制
+    ax.set_title(title, fontproperties=fp)
+    ax.set_xlabel("年目", fontproperties=fp)
+    ax.set_ylabel("万円", fontproperties=fp)
+
+    # ★目盛りにもフォント直指定（念のため）
+    for lab in ax.get_xticklabels() + ax.get_yticklabels():
+        lab.set_fontproperties(fp)
+
+    ax.grid(True)
+
+    buf = BytesIO()
+    fig.tight_layout()
+    fig.savefig(buf, format="png", dpi=200)
+    plt.close(fig)
+    return buf.getvalue()
+
+# =========================
+# PDF用グラフ（reportlab のベクター描画：PNGを経由しない）
+# =========================
+CHART_W, CHART_H = 720, 300
+CHART_LINE = colors.HexColor("#1f77b4")
+CHART_GRID = colors.HexColor("#b0b0b0")
+
+
+def _nice_ticks(lo: float, hi: float, n: int = 7) -> List[float]:
+    # matplotlib の自動目盛りに近い「きりのいい」刻み
+    if hi <= lo:
+        hi = lo + 1.0
+    raw = (hi - lo) / max(n - 1, 1)
+    mag = 10.0 ** np.floor(np.log10(raw))
+    step = next(m * mag for m in (1, 2, 2.5, 5, 10) if m * mag >= raw)
+    first = np.ceil(lo / step - 1e-9) * step
+    return [float(np.round(v / step) * step) + 0.0 for v in np.arange(first, hi + step * 1e-9, step)]
+
+
+def _tick_label(v: float) -> str:
+    return f"{v:,.0f}" if float(v).is_integer() else f"{v:,.1f}"
+
+
+def _chart_frame(title: str, x_max: int, y_lo: float, y_hi: float, font: str):
+    """
+    枠・グリッド・目盛り・赤の0ライン・日本語ラベルまでを描いた Drawing と、
+    データ座標 → 描画座標の変換関数 (sx, sy) を返す
+    """
+    # 0ラインが必ず入るように範囲を取り、上下に 5% の余白（matplotlib と同じ見た目）
+    y_lo, y_hi = min(y_lo, 0.0), max(y_hi, 0.0)
+    pad = (y_hi - y_lo) * 0.05 or 1.0
+    y_lo, y_hi = y_lo - pad, y_hi + pad
+    x_lo, x_hi = 1 - (x_max - 1) * 0.05 - 0.5 * (x_max == 1), x_max + (x_max - 1) * 0.05 + 0.5 * (x_max == 1)
+
+    left, right, bottom, top = 62, 12, 36, 26
+    pw, ph = CHART_W - left - right, CHART_H - bottom - top
+
+    def sx(x):
+        return left + (x - x_lo) / (x_hi - x_lo) * pw
+
+    def sy(y):
+        return bottom + (y - y_lo) / (y_hi - y_lo) * ph
+
+    d = Drawing(CHART_W, CHART_H)
+    d.add(Rect(left, bottom, pw, ph, fillColor=colors.white, strokeColor=colors.black, strokeWidth=0.8))
+
+    for v in _nice_ticks(y_lo, y_hi):
+        y = sy(v)
+        d.add(Line(left, y, left + pw, y, strokeColor=CHART_GRID, strokeWidth=0.6))
+        d.add(Line(left - 3, y, left, y, strokeColor=colors.black, strokeWidth=0.6))
+        d.add(String(left - 5, y - 3, _tick_label(v), fontName=font, fontSize=8, textAnchor="end"))
+    for v in _nice_ticks(x_lo, x_hi):
+        if not float(v).is_integer():
+            continue
+        x = sx(v)
+        d.add(Line(x, bottom, x, bottom + ph, strokeColor=CHART_GRID, strokeWidth=0.6))
+        d.add(Line(x, bottom - 3, x, bottom, strokeColor=colors.black, strokeWidth=0.6))
+        d.add(String(x, bottom - 13, _tick_label(v), fontName=font, fontSize=8, textAnchor="middle"))
+
+    # ゼロ線（赤）
+    d.add(Line(left, sy(0), left + pw, sy(0), strokeColor=colors.red, strokeWidth=1.5, strokeDashArray=[5, 3]))
+
+    d.add(String(left + pw / 2, CHART_H - 16, title, fontName=font, fontSize=11, textAnchor="middle"))
+    d.add(String(left + pw / 2, 6, "年目", fontName=font, fontSize=9, textAnchor="middle"))
+    ylab = Group(String(0, 0, "万円", fontName=font, fontSize=9, textAnchor="middle"))
+    ylab.transform = (0, 1, -1, 0, 14, bottom + ph / 2)
+    d.add(ylab)
+    return d, sx, sy
+
+
+def _add_line(d: Drawing, xs, ys, sx, sy, color=CHART_LINE) -> None:
+    pts = []
+    for x, y in zip(xs, ys):
+        pts += [sx(x), sy(y)]
+    if len(pts) >= 4:
+        d.add(PolyLine(pts, strokeColor=color, strokeWidth=1.3))
+    for i in range(0, len(pts), 2):
+        d.add(Circle(pts[i], pts[i + 1], 2.2, fillColor=color, strokeColor=color, strokeWidth=0.5))
+
+
+def make_chart_drawing(df_long: pd.DataFrame, y_col: str, title: str) -> Drawing:
+    font = get_font_registry()["pdf_font"]
+    xs = np.asarray(df_long["年目"], dtype=float)
+    ys = np.asarray(df_long[y_col], dtype=float)
+    x_max = int(xs.max()) if len(xs) else 1
+    y_lo, y_hi = (float(ys.min()), float(ys.max())) if len(ys) else (0.0, 0.0)
+
+    d, sx, sy = _chart_frame(title, x_max, y_lo, y_hi, font)
+    _add_line(d, xs, ys, sx, sy)
+    return d
+
+
+def make_band_chart_drawing(bands: pd.DataFrame, title: str) -> Drawing:
+    # モンテカルロの 5%〜95% 帯と中央値
+    font = get_font_registry()["pdf_font"]
+    xs = np.asarray(bands["年目"], dtype=float)
+    lo = np.asarray(bands["5%点(万円)"], dtype=float)
+    mid = np.asarray(bands["中央値(万円)"], dtype=float)
+    hi = np.asarray(bands["95%点(万円)"], dtype=float)
+
+    d, sx, sy = _chart_frame(title, int(xs.max()), float(lo.min()), float(hi.max()), font)
+
+    pts = []
+    for x, y in zip(xs, hi):
+        pts += [sx(x), sy(y)]
+    for x, y in zip(xs[::-1], lo[::-1]):
+        pts += [sx(x), sy(y)]
+    d.add(Polygon(pts, fillColor=CHART_LINE, fillOpacity=0.25, strokeColor=None, strokeWidth=0))
+    _add_line(d, xs, mid, sx, sy)
+
+    # 凡例（左上）
+    lx, ly = sx(xs.min()) + 6, CHART_H - 26 - 14
+    d.add(Rect(lx, ly - 3, 16, 8, fillColor=CHART_LINE, fillOpacity=0.25, strokeColor=None))
+    d.add(String(lx + 20, ly - 2, "5%〜95%", fontName=font, fontSize=8))
+    d.add(Line(lx, ly - 12, lx + 16, ly - 12, strokeColor=CHART_LINE, strokeWidth=1.3))
+    d.add(Circle(lx + 8, ly - 12, 2.2, fillColor=CHART_LINE, strokeColor=CHART_LINE))
+    d.add(String(lx + 20, ly - 15, "中央値", fontName=font, fontSize=8))
+    return d
+
+
+def mc_summary_text(mc: dict) -> str:
+    return (
+        f"上昇率を±{mc['rate_sd']:.1f}％"
+        + (f"、死亡年齢を±{mc['die_sd']:.1f}歳" if mc["die_sd"] > 0 else "")
+        + f" の幅で {mc['n_paths']:,} 通り計算しました。"
+        + f"途中で貯蓄残高がマイナスになる確率：{mc['prob_negative'] * 100:.1f}％"
+    )
+
+
+# =========================
+# PDFの表（スタイルはフォントごとに1回だけ作って、どのPDF・どのページでも使い回す）
+# =========================
+RESULT_COLS_PER_PAGE = 20
+RESULT_FIRST_COL_W = 165
+# 色を付ける行（行名の先頭で判定）→ (背景, 文字色)
+RESULT_ROW_COLORS = [
+    ("収入合計", colors.HexColor("#00b0f0"), colors.white),
+    ("支出合計", colors.HexColor("#ff0000"), colors.white),
+    ("貯蓄残高", colors.HexColor("#92d050"), colors.black),
+    ("単身期開始", colors.HexColor("#fff4c2"), colors.black),
+]
+
+
+@lru_cache(maxsize=None)
+def _body_style(font: str) -> ParagraphStyle:
+    return ParagraphStyle("Normal", parent=getSampleStyleSheet()["Normal"], fontName=font, fontSize=9, leading=12)
+
+
+@lru_cache(maxsize=None)
+def _inputs_table_style(font: str) -> TableStyle:
+    ts = TableStyle()
+    ts.add("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1e88e5"))
+    ts.add("TEXTCOLOR", (0, 0), (-1, 0), colors.white)
+    ts.add("FONTNAME", (0, 0), (-1, -1), font)
+    ts.add("FONTSIZE", (0, 0), (-1, -1), 8)
+    ts.add("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#d0d0d0"))
+    ts.add("VALIGN", (0, 0), (-1, -1), "MIDDLE")
+    ts.add("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f7fbff")])
+    ts.add("ALIGN", (0, 0), (-1, -1), "LEFT")
+    return ts
+
+
+@lru_cache(maxsize=64)
+def _result_table_style(font: str, labels: Tuple[str, ...]) -> TableStyle:
+    # 行の並び（labels）が同じなら、どのページ・どの結果でも同じスタイル
+    ts = TableStyle()
+    ts.add("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f3f4f6"))
+    ts.add("FONTNAME", (0, 0), (-1, -1), font)
+    ts.add("FONTSIZE", (0, 0), (-1, -1), 8)
+    ts.add("ALIGN", (1, 0), (-1, -1), "CENTER")
+    ts.add("ALIGN", (0, 0), (0, -1), "LEFT")
+    ts.add("VALIGN", (0, 0), (-1, -1), "MIDDLE")
+    ts.add("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#d0d0d0"))
+    ts.add("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#fcfcfc")])
+    ts.add("BACKGROUND", (0, 1), (0, -1), colors.HexColor("#fafafa"))
+    for i, label in enumerate(labels, start=1):
+        for head, bg, fg in RESULT_ROW_COLORS:
+            if label.startswith(head):
+                ts.add("BACKGROUND", (0, i), (-1, i), bg)
+                ts.add("TEXTCOLOR", (0, i), (-1, i), fg)
+                break
+    return ts
+
+
+def _result_tables(first_col: str, year_cols: List[str], labels: List[str], cells: List[List[str]], font: str, width: float) -> List[Table]:
+    """
+    結果表を RESULT_COLS_PER_PAGE 年ずつのページに分けて Table にする
+    セルの文字列は呼ぶ側で（列ごとにまとめて）作っておき、ここでは切り出すだけ
+    """
+    style = _result_table_style(font, tuple(labels))
+    tables = []
+    for c0 in range(0, len(year_cols), RESULT_COLS_PER_PAGE):
+        ch = year_cols[c0:c0 + RESULT_COLS_PER_PAGE]
+        c1 = c0 + len(ch)
+        data = [[first_col] + ch] + [[label] + row[c0:c1] for label, row in zip(labels, cells)]
+        each_w = max(width - RESULT_FIRST_COL_W, 10) / max(len(ch), 1)
+        tbl = Table(data, repeatRows=1, colWidths=[RESULT_FIRST_COL_W] + [each_w] * len(ch))
+        tbl.setStyle(style)
+        tables.append(tbl)
+    return tables
+
+
+def build_pdf_bytes(
+    df_view: Optional[pd.DataFrame],
+    inputs: dict,
+    df_long: pd.DataFrame,
+    extra_text_blocks: Optional[List[Tuple[str, List[str]]]] = None,
+    mc: Optional[dict] = None,
+    result: Optional[LifePlanResult] = None,
+    timer: Optional[StageTimer] = None,
+) -> bytes:
+    """
+    result を渡すと、表の数字は df_view を読み直さず計算結果から直接作る
+    timer を渡すと、入力表・結果表・グラフ・アドバイス・レイアウト（doc.build）の時間を記録する
+    1通の時間の目安は PDF_REPORT_BUDGET_MS（ほとんどは doc.build でセルを描く時間）
+    """
+    timer = timer or NO_TIMER
+    timer.reset_lap()
+    base_font = get_font_registry()["pdf_font"]
+
+    buf = BytesIO()
+    doc = SimpleDocTemplate(
+        buf,
+        pagesize=landscape(A4),
+        leftMargin=24, rightMargin=18, topMargin=18, bottomMargin=18
+    )
+    styleN = _body_style(base_font)
+
+    elems = []
+    elems.append(Paragraph(f"<b>{APP_TITLE}</b>", styleN))
+    elems.append(Spacer(1, 8))
+
+    elems.append(Paragraph("<b>入力値一覧</b>", styleN))
+    elems.append(Spacer(1, 6))
+
+    # 入力表：iterrows で1行ずつ読まず、列ごとに文字列にしてから行に並べる
+    in_df = build_inputs_table(inputs)
+    in_cols = ["区分", "項目", "入力値"]
+    in_data = [list(in_df.columns)] + [list(r) for r in zip(*[[str(v) for v in in_df[c].tolist()] for c in in_cols])]
+
+    in_tbl = Table(in_data, repeatRows=1)
+    in_tbl.setStyle(_inputs_table_style(base_font))
+    elems.append(in_tbl)
+    timer.lap("pdf.inputs_table")
+
+    elems.append(PageBreak())
+
+    elems.append(Paragraph("<b>計算結果（ライフプラン表）</b>", styleN))
+    elems.append(Spacer(1, 6))
+
+    if result is not None:
+        all_cols = ["年目"] + [str(y) for y in result.years.tolist()]
+        labels = result.display_labels()
+        cells = result.cell_strings()
+    else:
+        all_cols = [str(c) for c in df_view.columns]
+        labels = ["" if v is None else str(v) for v in df_view.iloc[:, 0].tolist()]
+        cells = _format_cells(df_view.iloc[:, 1:].to_numpy(dtype=object), labels, escape=False)
+    tables = _result_tables(all_cols[0], all_cols[1:], labels, cells, base_font, doc.width)
+    for ci, tbl in enumerate(tables):
+        if ci > 0:
+            elems.append(PageBreak())
+        elems.append(tbl)
+    timer.lap("pdf.result_table", pages=len(tables))
+
+    elems.append(PageBreak())
+    elems.append(Paragraph("<b>グラフ</b>", styleN))
+    elems.append(Spacer(1, 8))
+
+    # ★PNGを経由せず、reportlab のベクター図形としてそのまま埋め込む
+    elems.append(make_chart_drawing(df_long, "年間現金収支(万円)", "年間現金収支（万円）"))
+    elems.append(Spacer(1, 10))
+    elems.append(make_chart_drawing(df_long, "貯蓄残高(万円)", "貯蓄残高（万円）"))
+
+    if mc is not None and len(mc["bands"]) > 0:
+        elems.append(PageBreak())
+        elems.append(Paragraph("<b>貯蓄残高のばらつき（モンテカルロ）</b>", styleN))
+        elems.append(Spacer(1, 4))
+        elems.append(Paragraph(html.escape(mc_summary_text(mc)), styleN))
+        elems.append(Spacer(1, 8))
+        elems.append(make_band_chart_drawing(mc["bands"], "貯蓄残高のばらつき（5%〜95%・中央値、万円）"))
+    timer.lap("pdf.charts")
+
+    if extra_text_blocks:
+        elems.append(PageBreak())
+        elems.append(Paragraph("<b>アドバイス</b>", styleN))
+        elems.append(Spacer(1, 8))
+        for title, lines in extra_text_blocks:
+            elems.append(Paragraph(f"<b>{html.escape(title)}</b>", styleN))
+            elems.append(Spacer(1, 4))
+            for ln in lines:
+                elems.append(Paragraph(html.escape(str(ln)), styleN))
+            elems.append(Spacer(1, 10))
+    timer.lap("pdf.advice")
+
+    with _without_ascii85():
+        doc.build(elems)
+    timer.lap("pdf.layout", bytes=buf.tell())
+    return buf.getvalue()
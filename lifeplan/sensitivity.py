@@ -0,0 +1,146 @@
+"""
+感度分析（入力を1つずつ上げ下げしたときの、最低・最終貯蓄残高への影響：トルネード図用）
+"""
+import numpy as np
+import pandas as pd
+
+from .engine import ITEMS, stack_inputs
+from .monthly import matrix_calc_for
+
+
+# =========================
+# 感度分析（トルネード図）
+# =========================
+# (表示名, パラメータ行列のキー, 生活費の列（ITEMS の位置）または None, 種類)
+# 種類："amount" は ±amount_pct ％、"rate" は ±rate_pt ポイント、"age" / "years" は ±years 年、"ratio" は ±ratio_pt ポイント
+SENS_PARAMS = (
+    [
+        ("夫 現在年収", "h_inc_now", None, "amount"),
+        ("夫 年収の上昇率", "h_g1", None, "rate"),
+        ("夫 年収の変更年齢", "h_ch_age", None, "age"),
+        ("夫 変更後年収", "h_inc_after", None, "amount"),
+        ("夫 変更後年収の上昇率", "h_g2", None, "rate"),
+        ("妻 現在年収", "w_inc_now", None, "amount"),
+        ("妻 年収の上昇率", "w_g1", None, "rate"),
+        ("妻 年収の変更年齢", "w_ch_age", None, "age"),
+        ("妻 変更後年収", "w_inc_after", None, "amount"),
+        ("妻 変更後年収の上昇率", "w_g2", None, "rate"),
+    ]
+    + [
+        (f"{nm} {label}", f"living_{k}", j, kind)
+        for j, nm in enumerate(ITEMS)
+        for label, k, kind in [
+            ("月額", "m", "amount"),
+            ("上昇率", "g", "rate"),
+            ("変更年数", "after_years", "years"),
+            ("変更後月額", "m2", "amount"),
+            ("変更後の上昇率", "g2", "rate"),
+        ]
+    ]
+    + [
+        ("夫 介護の開始年齢", "h_care_start", None, "age"),
+        ("夫 介護費の月額", "h_care_m", None, "amount"),
+        ("夫 介護費の上昇率", "h_care_g", None, "rate"),
+        ("妻 介護の開始年齢", "w_care_start", None, "age"),
+        ("妻 介護費の月額", "w_care_m", None, "amount"),
+        ("妻 介護費の上昇率", "w_care_g", None, "rate"),
+        ("単身期の生活費割合", "single_ratio_pct", None, "ratio"),
+    ]
+)
+
+# 0 のとき「使わない」意味になる入力と、それが 0 のとき効かなくなる入力
+SENS_SWITCH = {
+    "h_inc_after": "h_ch_age", "h_g2": "h_ch_age",
+    "w_inc_after": "w_ch_age", "w_g2": "w_ch_age",
+    "living_m2": "living_after_years", "living_g2": "living_after_years",
+    "h_care_m": "h_care_start", "h_care_g": "h_care_start",
+    "w_care_m": "w_care_start", "w_care_g": "w_care_start",
+}
+
+
+def _value(base, key, j):
+    v = base[key][0]
+    return v if j is None else v[j]
+
+
+def run_sensitivity(
+    inputs: dict,
+    amount_pct: float = 10.0,
+    rate_pt: float = 1.0,
+    years: int = 1,
+    ratio_pt: float = 10.0,
+) -> dict:
+    """
+    SENS_PARAMS の入力を1つずつ上げ下げして、最低貯蓄残高・最終貯蓄残高の変化を調べる
+    （基準1通り＋入力ごとに下げ・上げの2通りを、1回の calc_lifeplan_matrix でまとめて計算する。月の入力があれば月次で）
+    使っていない入力（変更年齢・開始年齢などが0、金額が0）は除く
+    戻り値：
+    - "base_min" / "base_final": 入力どおりの最低・最終貯蓄残高（万円）
+    - "table": 1行1入力の DataFrame（最低残高の振れ幅の大きい順）
+      列：項目, キー, 今の値, 下げた値, 上げた値, 最低残高の差(下げ/上げ), 最終残高の差(下げ/上げ), 振れ幅(最低残高/最終残高)
+    - "settings": 上げ下げの幅
+    """
+    base = stack_inputs([inputs])
+    years = max(int(years), 1)
+
+    picked = []
+    for label, key, j, kind in SENS_PARAMS:
+        now = _value(base, key, j)
+        switch = SENS_SWITCH.get(key)
+        if switch is not None and _value(base, switch, j) == 0:
+            continue
+        if kind == "amount":
+            if now == 0:
+                continue
+            down, up = now * (1.0 - amount_pct / 100.0), now * (1.0 + amount_pct / 100.0)
+            down = max(down, 0.0)
+        elif kind == "rate":
+            down, up = now - rate_pt, now + rate_pt
+        elif kind == "ratio":
+            down, up = max(now - ratio_pt, 0.0), min(now + ratio_pt, 200.0)
+        else:
+            if now == 0:
+                continue
+            # 0 にすると「使わない」に変わってしまうので 1 で止める
+            down, up = max(now - years, 1), now + years
+        picked.append((label, key, j, now, down, up))
+
+    # 0行目が基準、1 + 2i 行目が i 番目の下げ、2 + 2i 行目が上げ
+    n = 1 + 2 * len(picked)
+    params = {k: np.repeat(v, n, axis=0) for k, v in base.items()}
+    for i, (label, key, j, now, down, up) in enumerate(picked):
+        col = params[key] if j is None else params[key][:, j]
+        col[1 + 2 * i] = down
+        col[2 + 2 * i] = up
+
+    res = matrix_calc_for(inputs)(params)
+    bal = res["貯蓄残高"]
+    valid = res["valid"]
+    min_bal = np.where(valid, bal, np.inf).min(axis=1, initial=np.inf)
+    last = np.maximum(res["years_len"] - 1, 0)
+    final_bal = bal[np.arange(n), last] if bal.shape[1] else np.zeros(n)
+
+    base_min, base_final = float(min_bal[0]), float(final_bal[0])
+    d_min = np.round(min_bal[1:].reshape(-1, 2) - base_min, 1)
+    d_final = np.round(final_bal[1:].reshape(-1, 2) - base_final, 1)
+    table = pd.DataFrame({
+        "項目": [p[0] for p in picked],
+        "キー": [p[1] if p[2] is None else f"{p[1]}[{ITEMS[p[2]]}]" for p in picked],
+        "今の値": [float(p[3]) for p in picked],
+        "下げた値": [float(p[4]) for p in picked],
+        "上げた値": [float(p[5]) for p in picked],
+        "最低残高の差(下げ)": d_min[:, 0] if len(picked) else [],
+        "最低残高の差(上げ)": d_min[:, 1] if len(picked) else [],
+        "最終残高の差(下げ)": d_final[:, 0] if len(picked) else [],
+        "最終残高の差(上げ)": d_final[:, 1] if len(picked) else [],
+    })
+    table["振れ幅(最低残高)"] = (table["最低残高の差(上げ)"] - table["最低残高の差(下げ)"]).abs()
+    table["振れ幅(最終残高)"] = (table["最終残高の差(上げ)"] - table["最終残高の差(下げ)"]).abs()
+    table = table.sort_values(["振れ幅(最低残高)", "振れ幅(最終残高)"], ascending=False, kind="stable").reset_index(drop=True)
+
+    return {
+        "base_min": base_min,
+        "base_final": base_final,
+        "table": table,
+        "settings": {"amount_pct": float(amount_pct), "rate_pt": float(rate_pt), "years": years, "ratio_pt": float(ratio_pt)},
+    }
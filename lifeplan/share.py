@@ -0,0 +1,119 @@
+"""
+入力の保存・読み込み（短い JSON と、URL に入れられる文字列）
+"""
+import base64
+import json
+import zlib
+
+from .engine import ITEMS, LIVING_KEYS, SCALAR_KEYS
+from .inputs import LUMP_LIST_KEYS, normalize_record
+from .invest import normalize_invest
+from .monthly import MONTH_KEYS
+
+
+# =========================
+# 入力 ⇔ 短い JSON
+# =========================
+# 形を変えたら SHARE_VERSION を上げ、_decode_v{番号} を足す（古い版の保存ファイル・URL も読めるように残す）
+SHARE_VERSION = 1
+SHARE_FORMAT = "lifeplan-inputs"
+# URL の ?plan=... に使う名前
+SHARE_QUERY_KEY = "plan"
+LUMP_LIST_ORDER = [LUMP_LIST_KEYS[k] for k in ["h_lump_map", "w_lump_map", "h_spend_map", "w_spend_map"]]
+
+
+def _num(v):
+    # 1500.0 は 1500 と書く（短くするため。読むときに型をそろえる）
+    v = float(v)
+    return int(v) if v.is_integer() else v
+
+
+def encode_inputs(inputs: dict) -> dict:
+    """
+    inputs を、キー名を並び順に置きかえた短い dict にする（版番号付き）
+    - "s": SCALAR_KEYS の順の値
+    - "lv": ITEMS の順に [m, g, after_years, m2, g2]
+    - "lp": 夫の一時収入・妻の一時収入・夫の一時支出・妻の一時支出の順に [[使う(0/1), 年齢, 金額], ...]
+    - "m": 月単位で計算するときだけ、MONTH_KEYS の順の月（無い保存データは年単位）
+    - "iv": 貯蓄を運用するときだけ [配分, 期待利回り, ばらつき, 取り崩す順番, リバランス(0/1)]（無い保存データは運用しない）
+    """
+    payload = {
+        "f": SHARE_FORMAT,
+        "v": SHARE_VERSION,
+        "s": [_num(inputs.get(k, 100 if k == "single_ratio_pct" else 0)) for k in SCALAR_KEYS],
+        "lv": [[_num(inputs["living_params"][nm][k]) for k in LIVING_KEYS] for nm in ITEMS],
+        "lp": [[[int(bool(u)), int(a), _num(v)] for u, a, v in inputs.get(k, [])] for k in LUMP_LIST_ORDER],
+    }
+    if any(k in inputs for k in MONTH_KEYS):
+        payload["m"] = [int(inputs.get(k, 1)) for k in MONTH_KEYS]
+    if inputs.get("invest"):
+        inv = normalize_invest(inputs["invest"])
+        payload["iv"] = [[_num(v) for v in inv[k]] for k in ["alloc", "ret", "sd"]] + [inv["order"], int(inv["rebalance"])]
+    return payload
+
+
+def _decode_v1(payload: dict) -> dict:
+    s, lv, lp = payload["s"], payload["lv"], payload["lp"]
+    if len(s) != len(SCALAR_KEYS) or len(lv) != len(ITEMS) or len(lp) != len(LUMP_LIST_ORDER):
+        raise ValueError("保存データの項目数が合いません")
+    rec = dict(zip(SCALAR_KEYS, s))
+    rec["living_params"] = {nm: dict(zip(LIVING_KEYS, row)) for nm, row in zip(ITEMS, lv)}
+    for k, rows in zip(LUMP_LIST_ORDER, lp):
+        rec[k] = [(bool(u), a, v) for u, a, v in rows]
+    if "iv" in payload:
+        alloc, ret, sd, order, rebalance = payload["iv"]
+        rec["invest"] = {"alloc": alloc, "ret": ret, "sd": sd, "order": order, "rebalance": bool(rebalance)}
+    if "m" in payload:
+        if len(payload["m"]) != len(MONTH_KEYS):
+            raise ValueError("保存データの項目数が合いません")
+        rec.update(zip(MONTH_KEYS, payload["m"]))
+    inputs = normalize_record(rec)
+    # 画面と同じ型（単身期の割合は整数）にそろえる。内容のハッシュも画面で計算したときと同じになる
+    inputs["single_ratio_pct"] = int(inputs.get("single_ratio_pct", 100))
+    return inputs
+
+
+_DECODERS = {1: _decode_v1}
+
+
+def decode_inputs(payload: dict) -> dict:
+    """encode_inputs の逆（画面の「計算」で作る inputs と同じ形）。読めないときは ValueError"""
+    if not isinstance(payload, dict) or payload.get("f") != SHARE_FORMAT:
+        raise ValueError("ライフプランの保存データではありません")
+    decoder = _DECODERS.get(payload.get("v"))
+    if decoder is None:
+        raise ValueError(f"この版の保存データは読めません（版 {payload.get('v')}）")
+    try:
+        return decoder(payload)
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"保存データが壊れています（{e}）") from e
+
+
+def inputs_to_json(inputs: dict) -> str:
+    return json.dumps(encode_inputs(inputs), ensure_ascii=False, separators=(",", ":"))
+
+
+def inputs_from_json(text) -> dict:
+    try:
+        payload = json.loads(text)
+    except ValueError as e:
+        raise ValueError("JSON として読めません") from e
+    return decode_inputs(payload)
+
+
+# =========================
+# 入力 ⇔ URL 用の文字列
+# =========================
+def inputs_to_token(inputs: dict) -> str:
+    """短い JSON を zlib で縮め、URL にそのまま入れられる base64 にする（末尾の = は付けない）"""
+    raw = zlib.compress(inputs_to_json(inputs).encode("utf-8"), 9)
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def inputs_from_token(token: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(token.strip() + "=" * (-len(token.strip()) % 4))
+        text = zlib.decompress(raw).decode("utf-8")
+    except (ValueError, zlib.error) as e:
+        raise ValueError("URL の保存データが読めません") from e
+    return inputs_from_json(text)
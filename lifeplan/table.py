@@ -0,0 +1,166 @@
+"""
+表示用の表（画面のHTML表・入力値一覧）
+"""
+import html
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from .engine import LifePlanResult, display_label
+from .invest import BUCKETS, normalize_invest
+
+
+def df_view_for_display(df_table: pd.DataFrame) -> pd.DataFrame:
+    df_view = df_table.reset_index().rename(columns={"index": "年目"})
+    df_view = df_view.fillna("")
+    df_view["年目"] = df_view["年目"].astype(str).apply(lambda x: "" if x.startswith("__blank") else x)
+
+    df_view["年目"] = df_view["年目"].apply(display_label)
+    return df_view
+
+
+# 行ラベルの先頭 → (背景色, 文字色) ※太字は共通
+STICKY_ROW_COLORS = [
+    ("収入合計", "#00b0f0", "white"),
+    ("支出合計", "#ff0000", "white"),
+    ("貯蓄残高", "#92d050", "black"),
+    ("単身期開始", "#fff4c2", "#111827"),
+]
+STICKY_ROW_CLASSES = {"夫年齢": "sticky-row-1", "妻年齢": "sticky-row-2"}
+
+
+def _sticky_row_style(label: str) -> str:
+    for head, bg, fg in STICKY_ROW_COLORS:
+        if label.startswith(head):
+            return f"background:{bg};color:{fg};font-weight:900;"
+    return ""
+
+
+def _format_cells(body: np.ndarray, labels: List[str], escape: bool = True) -> List[List[str]]:
+    """
+    表の本体（行×年）をまとめて文字列にする
+    年齢は整数、単身期開始はそのまま、その他は小数1桁。空欄は空文字。
+    escape=False は PDF 用（HTMLエスケープしない）
+    """
+    esc = html.escape if escape else str
+    blank = (body == "") | np.equal(body, None)
+    filled = np.where(blank, 0.0, body)
+    try:
+        num = filled.astype(float)
+    except (TypeError, ValueError):
+        num = pd.to_numeric(pd.Series(filled.ravel()), errors="coerce").to_numpy(dtype=float).reshape(body.shape)
+    bad = ~blank & ~np.isfinite(num)
+    num = np.where(np.isfinite(num), num, 0.0)
+
+    rows = []
+    for i, label in enumerate(labels):
+        if label.startswith("単身期開始"):
+            rows.append(["" if b else esc(str(v)) for v, b in zip(body[i], blank[i])])
+            continue
+        fmt = "%d" if label in ["夫年齢", "妻年齢"] else "%.1f"
+        cells = [fmt % x for x in num[i].tolist()] if not bad[i].any() else [
+            esc(str(v)) if e else fmt % x for v, x, e in zip(body[i], num[i].tolist(), bad[i])
+        ]
+        if blank[i].any():
+            cells = ["" if b else c for c, b in zip(cells, blank[i].tolist())]
+        rows.append(cells)
+    return rows
+
+
+def _sticky_html(header: List[str], labels: List[str], cells: List[List[str]]) -> str:
+    parts = ['<div class="table-wrap"><table class="life-table"><thead><tr>']
+    parts.append(f'<th class="sticky-col">{html.escape(header[0])}</th>')
+    parts += [f'<th class="">{html.escape(c)}</th>' for c in header[1:]]
+    parts.append("</tr></thead><tbody>")
+
+    for i, label in enumerate(labels):
+        style = _sticky_row_style(label)
+        td = f'<td style="{style}">'
+        parts.append(f'<tr class="{STICKY_ROW_CLASSES.get(label, "")}">')
+        parts.append(f'<td class="sticky-col" style="{style}">{html.escape(label)}</td>')
+        parts.append(td + f"</td>{td}".join(cells[i]) + "</td>" if len(header) > 1 else "")
+        parts.append("</tr>")
+
+    parts.append("</tbody></table></div>")
+    return "".join(parts)
+
+
+def df_to_sticky_html(df_view: pd.DataFrame) -> str:
+    labels = [str(v) for v in df_view.iloc[:, 0].tolist()]
+    body = df_view.iloc[:, 1:].to_numpy(dtype=object)
+    return _sticky_html([str(c) for c in df_view.columns], labels, _format_cells(body, labels))
+
+
+def result_to_sticky_html(res: LifePlanResult) -> str:
+    # 計算結果の数値から直接作る（df_view を経由しない）
+    header = ["年目"] + [str(y) for y in res.years.tolist()]
+    return _sticky_html(header, res.display_labels(), res.cell_strings())
+
+
+def build_inputs_table(inputs: dict) -> pd.DataFrame:
+    rows = []
+    rows += [
+        ("年齢・貯蓄", "夫の現在年齢", f"{inputs['h_now']} 歳"),
+        ("年齢・貯蓄", "夫の死亡年齢", f"{inputs['h_die']} 歳"),
+        ("年齢・貯蓄", "妻の現在年齢", f"{inputs['w_now']} 歳"),
+        ("年齢・貯蓄", "妻の死亡年齢", f"{inputs['w_die']} 歳"),
+        ("年齢・貯蓄", "夫婦合計の現在貯蓄額", f"{inputs['start_savings']:.1f} 万円"),
+    ]
+
+    rows += [
+        ("収入（夫）", "現在年収（年額）", f"{inputs['h_inc_now']:.1f} 万円"),
+        ("収入（夫）", "上昇率", f"{inputs['h_g1']:.1f} ％"),
+        ("収入（夫）", "変更（何歳から）", f"{inputs['h_ch_age']} 歳"),
+        ("収入（夫）", "変更後年収（年額）", f"{inputs['h_inc_after']:.1f} 万円"),
+        ("収入（夫）", "変更後上昇率", f"{inputs['h_g2']:.1f} ％"),
+    ]
+
+    rows += [
+        ("収入（妻）", "現在年収（年額）", f"{inputs['w_inc_now']:.1f} 万円"),
+        ("収入（妻）", "上昇率", f"{inputs['w_g1']:.1f} ％"),
+        ("収入（妻）", "変更（何歳から）", f"{inputs['w_ch_age']} 歳"),
+        ("収入（妻）", "変更後年収（年額）", f"{inputs['w_inc_after']:.1f} 万円"),
+        ("収入（妻）", "変更後上昇率", f"{inputs['w_g2']:.1f} ％"),
+    ]
+
+    for who, lumps in [("一時収入（夫）", inputs["h_lumps"]), ("一時収入（妻）", inputs["w_lumps"])]:
+        for i, (use, age, amt) in enumerate(lumps, start=1):
+            rows.append((who, f"{i}件目 使用", "はい" if use else "いいえ"))
+            rows.append((who, f"{i}件目 年齢", f"{age} 歳"))
+            rows.append((who, f"{i}件目 金額（年額）", f"{amt:.1f} 万円"))
+
+    for nm, p in inputs["living_params"].items():
+        rows.append(("生活費", f"{nm} 月額", f"{p['m']:.1f} 万円/月"))
+        rows.append(("生活費", f"{nm} 上昇率", f"{p['g']:.1f} ％"))
+        rows.append(("生活費", f"{nm} 変更（何年後から）", f"{p['after_years']} 年後"))
+        rows.append(("生活費", f"{nm} 変更後月額", f"{p['m2']:.1f} 万円/月"))
+        rows.append(("生活費", f"{nm} 変更後上昇率", f"{p['g2']:.1f} ％"))
+
+        if nm == "その他":
+            rows.append(("生活費", "単身世帯になったときの生活費の割合(％)", f"{int(inputs.get('single_ratio_pct', 100))} ％"))
+
+    rows += [
+        ("介護費（夫）", "何歳から", f"{inputs['h_care_start']} 歳"),
+        ("介護費（夫）", "月額", f"{inputs['h_care_m']:.1f} 万円/月"),
+        ("介護費（夫）", "上昇率", f"{inputs['h_care_g']:.1f} ％"),
+        ("介護費（妻）", "何歳から", f"{inputs['w_care_start']} 歳"),
+        ("介護費（妻）", "月額", f"{inputs['w_care_m']:.1f} 万円/月"),
+        ("介護費（妻）", "上昇率", f"{inputs['w_care_g']:.1f} ％"),
+    ]
+
+    for who, spends in [("一時支出（夫）", inputs["h_spends"]), ("一時支出（妻）", inputs["w_spends"])]:
+        for i, (use, age, amt) in enumerate(spends, start=1):
+            rows.append((who, f"{i}件目 使用", "はい" if use else "いいえ"))
+            rows.append((who, f"{i}件目 年齢", f"{age} 歳"))
+            rows.append((who, f"{i}件目 金額（年額）", f"{amt:.1f} 万円"))
+
+    if inputs.get("invest"):
+        inv = normalize_invest(inputs["invest"])
+        for j, nm in enumerate(BUCKETS):
+            rows.append(("貯蓄の運用", f"{nm} 配分", f"{inv['alloc'][j]:.1f} ％"))
+            rows.append(("貯蓄の運用", f"{nm} 期待利回り", f"{inv['ret'][j]:.1f} ％"))
+        rows.append(("貯蓄の運用", "取り崩す順番", "→".join(BUCKETS[j] for j in inv["order"])))
+        rows.append(("貯蓄の運用", "毎年リバランス", "はい" if inv["rebalance"] else "いいえ"))
+
+    return pd.DataFrame(rows, columns=["区分", "項目", "入力値"])
@@ -0,0 +1,92 @@
+"""
+処理時間の計測（環境変数 LIFEPLAN_TIMING=1 のときだけ。段階ごとに JSON 1行のログを出す）
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+
+
+# =========================
+# 段階ごとの処理時間
+# =========================
+TIMING_ENV = "LIFEPLAN_TIMING"
+logger = logging.getLogger("lifeplan.timing")
+_handler_lock = threading.Lock()
+
+
+def timing_enabled() -> bool:
+    return os.environ.get(TIMING_ENV, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+def _ensure_handler() -> None:
+    # ログの設定が無くても標準エラーに1行ずつ出す（アプリ側でハンドラを付けてあればそれに任せる）
+    with _handler_lock:
+        if logger.handlers:
+            return
+        h = logging.StreamHandler()
+        h.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(h)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+class StageTimer:
+    """
+    with timer.stage("calc"): ... で段階ごとの時間を計り、ログ（JSON 1行）と stages に残す
+    enabled が False（既定は LIFEPLAN_TIMING を見る）のときは何もしない
+    ログの例：{"event": "lifeplan.stage", "run": "submit", "run_id": "3f2a9c1b", "stage": "calc", "ms": 1.234, ...}
+    """
+
+    def __init__(self, run: str, enabled: Optional[bool] = None, **fields):
+        self.enabled = timing_enabled() if enabled is None else bool(enabled)
+        self.run = run
+        self.run_id = uuid.uuid4().hex[:8]
+        self.fields = fields
+        self.stages = []
+        self._lap = time.perf_counter()
+        if self.enabled:
+            _ensure_handler()
+
+    @contextmanager
+    def stage(self, name: str, **fields):
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - t0) * 1000.0, **fields)
+
+    def record(self, name: str, ms: float, **fields) -> None:
+        if not self.enabled:
+            return
+        rec = {"event": "lifeplan.stage", "run": self.run, "run_id": self.run_id, "stage": name, "ms": round(ms, 3)}
+        rec.update(self.fields)
+        rec.update(fields)
+        self.stages.append(rec)
+        logger.info(json.dumps(rec, ensure_ascii=False, default=str))
+
+    def reset_lap(self) -> None:
+        if self.enabled:
+            self._lap = time.perf_counter()
+
+    def lap(self, name: str, **fields) -> None:
+        # 直前の lap（または reset_lap）からの時間を name で記録する（長い関数を段落ごとに区切るとき用）
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.record(name, (now - self._lap) * 1000.0, **fields)
+        self._lap = now
+
+    def total_ms(self) -> float:
+        return round(sum(r["ms"] for r in self.stages), 3)
+
+
+# 計らないとき用（build_pdf_bytes などの既定値）
+NO_TIMER = StageTimer("", enabled=False)
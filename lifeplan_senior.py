@@ -6,23 +6,53 @@ import streamlit as st
 import pandas as pd
 import html
 import altair as alt
-from io import BytesIO
 import os
 import urllib.parse
 
-import matplotlib.pyplot as plt
 import matplotlib
-from matplotlib import font_manager
 
-from typing import List, Tuple, Optional
+# ====== 計算エンジン（pandas / NumPy だけ。画面なしでも import できる） ======
+from lifeplan import (
+    ITEMS,
+    lumps_to_map,
+    IncrementalLifePlan,
+    MONTH_KEYS,
+    uses_monthly,
+    calc_lifeplan_monthly,
+    BUCKETS,
+    BUCKET_ROWS,
+    INVEST_DEFAULT,
+    INVEST_RET_RANGE,
+    INVEST_SD_RANGE,
+    WITHDRAW_ORDERS,
+    normalize_invest,
+    run_monte_carlo,
+    solve_max_spending_scale,
+    solve_min_start_savings,
+    run_sensitivity,
+    run_longevity_grid,
+    StageTimer,
+    df_view_for_display,
+    df_to_sticky_html,
+    result_to_sticky_html,
+    analyze_result,
+    compare_scenarios,
+    inputs_to_json,
+    inputs_from_json,
+    inputs_to_token,
+    inputs_from_token,
+    make_money_advice_soft,
+    make_money_advice_from_result,
+    make_inheritance_advice_soft,
+    make_inheritance_advice_from_result,
+    inputs_hash,
+    ResultCache,
+    PdfJobs,
+)
 
-# ====== reportlab（PDF生成） ======
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image as RLImage
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+# ====== PDF生成（reportlab / matplotlib） ======
+from lifeplan.report import APP_TITLE, get_font_registry, build_pdf_bytes, mc_summary_text
+from lifeplan.share import SHARE_QUERY_KEY
 
 
 # =========================
@@ -82,8 +112,6 @@ DEFAULT = {
     ],
 }
 
-ITEMS = ["食費", "水道光熱費", "通信費", "交通費", "趣味・交際費", "医療費", "住宅の固定資産税・管理費等", "その他"]
-APP_TITLE = "シニア夫婦のライフプラン・シミュレーション"
 
 # =========================
 # 画像設定（タイトル横）
@@ -282,44 +310,6 @@ with t2:
         st.caption(f"※画像 {TITLE_IMAGE_FILENAME} が見つかりません（このpyと同じ場所に置いてください）")
 
 
-# =========================
-# matplotlib 日本語フォント（□対策）
-# =========================
-def make_chart_png(df_long: pd.DataFrame, y_col: str, title: str) -> bytes:
-    # ★本番では debug=False にします（画面にログを出さない）
-    fp = set_japanese_font_for_matplotlib(debug=False)
-
-    fig = plt.figure(figsize=(10, 4.2))
-    ax = fig.add_subplot(111)
-
-    # ゼロ線（赤）
-    ax.axhline(0, color="red", linewidth=2, linestyle="--")
-
-    ax.plot(df_long["年目"], df_long[y_col], marker="o")
-
-    # ★ここが本命：フォントを直指定（オンラインでも□になりにくい）
-    if fp is not None:
-        ax.set_title(title, fontproperties=fp)
-        ax.set_xlabel("年目", fontproperties=fp)
-        ax.set_ylabel("万円", fontproperties=fp)
-        for lab in ax.get_xticklabels() + ax.get_yticklabels():
-            lab.set_fontproperties(fp)
-    else:
-        # フォントが取れない時の保険（ローカルならOSフォントで出ることが多い）
-        ax.set_title(title)
-        ax.set_xlabel("年目")
-        ax.set_ylabel("万円")
-
-    ax.grid(True)
-
-    buf = BytesIO()
-    fig.tight_layout()
-    fig.savefig(buf, format="png", dpi=200)
-    plt.close(fig)
-    return buf.getvalue()
-
-
-
 # =========================
 # 入力（数値：型統一）
 # =========================
@@ -378,888 +368,147 @@ def build_lumps(prefix, title, defaults, note_text=None):
         )
     return rows
 
-def lumps_to_map(lumps):
-    mp = {}
-    for use, age, amt in lumps:
-        if use and age > 0 and amt > 0:
-            mp[age] = mp.get(age, 0.0) + float(amt)
-    return mp
-
-
 # =========================
-# 単身期開始（年目）
+# 日本語フォント（□対策：オンラインPDF用）
 # =========================
-def get_single_start_year_after(h_now, h_die, w_now, w_die):
-    h_death_y = (h_die - h_now + 1) if h_die >= h_now else None
-    w_death_y = (w_die - w_now + 1) if w_die >= w_now else None
-    ys = [y for y in [h_death_y, w_death_y] if y is not None]
-    if not ys:
-        return None
-    return min(ys) + 1
+def set_japanese_font_for_matplotlib(debug=False):
+    reg = get_font_registry()
+
+    # （任意）デバッグ表示：本番は False のままでOK
+    if debug:
+        st.write("🔎 font_path =", reg["font_path"])
+        st.write("🔎 exists =", reg["font_path_exists"])
+        if reg["font_path_exists"]:
+            try:
+                st.write("🔎 size(bytes) =", os.path.getsize(reg["font_path"]))
+            except Exception as e:
+                st.write("🔎 size error =", e)
+        st.write("✅ font_name =", reg["mpl_font_name"])
+        st.write("✅ rcParams font.family =", matplotlib.rcParams.get("font.family"))
+        st.write("✅ rcParams font.sans-serif =", matplotlib.rcParams.get("font.sans-serif"))
+        st.write("✅ pdf_font =", reg["pdf_font"])
+
+    # ★戻り値：この FontProperties を make_chart_png で直指定する
+    return reg["mpl_fp"]
+
+
+def make_chatgpt_link(question_text: str) -> str:
+    return "https://chat.openai.com/"
 
 
 # =========================
-# 年次計算（単身期：夫婦期最終年の生活費×割合）
+# 計算結果キャッシュ（プロセス共通・入力のハッシュで引く）
 # =========================
-def calc_lifeplan(inputs: dict):
-    h_now = int(inputs["h_now"]); h_die = int(inputs["h_die"])
-    w_now = int(inputs["w_now"]); w_die = int(inputs["w_die"])
-    start_savings = float(inputs["start_savings"])
-
-    years_len = max(h_die - h_now, w_die - w_now) + 1
-    year_labels = [str(i + 1) for i in range(years_len)]
-
-    living_params = inputs["living_params"]
-    h_lump_map = inputs["h_lump_map"]
-    w_lump_map = inputs["w_lump_map"]
-    h_spend_map = inputs["h_spend_map"]
-    w_spend_map = inputs["w_spend_map"]
-
-    single_ratio_pct = float(inputs.get("single_ratio_pct", 100.0))
-    single_ratio = max(min(single_ratio_pct / 100.0, 2.0), 0.0)
-    single_start_y = get_single_start_year_after(h_now, h_die, w_now, w_die)
-
-    def income_base_by_age(age, now_age, die_age, inc1, g1, ch_age, inc2, g2):
-        if age < now_age or age > die_age:
-            return 0.0
-        if ch_age and age >= int(ch_age):
-            yy = age - int(ch_age)
-            return float(inc2) * ((1.0 + float(g2)/100.0) ** yy)
-        yy = age - int(now_age)
-        return float(inc1) * ((1.0 + float(g1)/100.0) ** yy)
-
-    def living_monthly_by_t(t, p):
-        t = int(t)
-        after = int(p["after_years"])
-        if after > 0 and t >= after:
-            dt = t - after
-            mm = float(p["m2"]) * ((1.0 + float(p["g2"])/100.0) ** dt)
-        else:
-            mm = float(p["m"]) * ((1.0 + float(p["g"])/100.0) ** t)
-        return float(mm)
-
-    def care_annual_by_age(age, now_age, die_age, start_age, monthly, g):
-        if age < now_age or age > die_age:
-            return 0.0
-        if start_age and age >= int(start_age):
-            yy = age - int(start_age)
-            mm = float(monthly) * ((1.0 + float(g)/100.0) ** yy)
-            return round(float(mm) * 12.0, 1)
-        return 0.0
-
-    couple_last_t = None
-    if single_start_y is not None and 1 <= int(single_start_y) <= years_len:
-        couple_last_t = int(single_start_y) - 2
-
-    couple_last_monthly = {}
-    if couple_last_t is not None and couple_last_t >= 0:
-        for nm in ITEMS:
-            couple_last_monthly[nm] = living_monthly_by_t(couple_last_t, living_params[nm])
-
-    def living_item_annual_by_t(t, p, name):
-        t = int(t)
-        year_idx = t + 1
-        if single_start_y is not None and year_idx >= int(single_start_y) and couple_last_t is not None and couple_last_t >= 0:
-            base_mm = float(couple_last_monthly.get(name, living_monthly_by_t(couple_last_t, p)))
-            dt = year_idx - int(single_start_y)
-            mm = base_mm * single_ratio * ((1.0 + float(p["g2"])/100.0) ** dt)
-            return round(float(mm) * 12.0, 1)
-
-        mm = living_monthly_by_t(t, p)
-        return round(float(mm) * 12.0, 1)
-
-    rows_table, idx_table = [], []
-    blank_counter = 0
-    def add_blank():
-        nonlocal blank_counter
-        blank_counter += 1
-        idx_table.append(f"__blank{blank_counter}__")
-        rows_table.append([""] * years_len)
-
-    h_age_row, w_age_row = [], []
-    for t in range(years_len):
-        ah, aw = h_now + t, w_now + t
-        h_age_row.append(ah if ah <= h_die else "")
-        w_age_row.append(aw if aw <= w_die else "")
-    idx_table += ["夫年齢", "妻年齢"]
-    rows_table += [h_age_row, w_age_row]
-
-    single_row = [""] * years_len
-    if single_start_y is not None and 1 <= int(single_start_y) <= years_len:
-        single_row[int(single_start_y) - 1] = "←ここから単身期"
-    idx_table.append("単身期開始")
-    rows_table.append(single_row)
-
-    h_inc_row, w_inc_row = [], []
-    h_lump_row, w_lump_row = [], []
-    income_total_row = []
-    for t in range(years_len):
-        ah, aw = h_now + t, w_now + t
-        h_alive = (ah <= h_die)
-        w_alive = (aw <= w_die)
-
-        h_base = income_base_by_age(
-            ah, h_now, h_die,
-            inputs["h_inc_now"], inputs["h_g1"], inputs["h_ch_age"],
-            inputs["h_inc_after"], inputs["h_g2"]
-        ) if h_alive else 0.0
-
-        w_base = income_base_by_age(
-            aw, w_now, w_die,
-            inputs["w_inc_now"], inputs["w_g1"], inputs["w_ch_age"],
-            inputs["w_inc_after"], inputs["w_g2"]
-        ) if w_alive else 0.0
-
-        hl = float(h_lump_map.get(ah, 0.0)) if h_alive else 0.0
-        wl = float(w_lump_map.get(aw, 0.0)) if w_alive else 0.0
-
-        h_inc_row.append(round(h_base, 1))
-        w_inc_row.append(round(w_base, 1))
-        h_lump_row.append(round(hl, 1))
-        w_lump_row.append(round(wl, 1))
-        income_total_row.append(round(h_base + w_base + hl + wl, 1))
-
-    idx_table += ["夫年収(手取り)", "妻年収(手取り)", "一時収入 夫", "一時収入 妻", "収入合計"]
-    rows_table += [h_inc_row, w_inc_row, h_lump_row, w_lump_row, income_total_row]
-
-    add_blank()
-
-    living_item_rows = {nm: [] for nm in ITEMS}
-    for t in range(years_len):
-        for nm in ITEMS:
-            living_item_rows[nm].append(float(living_item_annual_by_t(t, living_params[nm], nm)))
-
-    for nm in ITEMS:
-        idx_table.append(nm)
-        rows_table.append(living_item_rows[nm])
-
-    care_h_row, care_w_row = [], []
-    for t in range(years_len):
-        ah, aw = h_now + t, w_now + t
-        care_h = care_annual_by_age(ah, h_now, h_die, inputs["h_care_start"], inputs["h_care_m"], inputs["h_care_g"]) if ah <= h_die else 0.0
-        care_w = care_annual_by_age(aw, w_now, w_die, inputs["w_care_start"], inputs["w_care_m"], inputs["w_care_g"]) if aw <= w_die else 0.0
-        care_h_row.append(round(float(care_h), 1))
-        care_w_row.append(round(float(care_w), 1))
-    idx_table += ["介護費 夫", "介護費 妻"]
-    rows_table += [care_h_row, care_w_row]
-
-    spend_h_row, spend_w_row = [], []
-    for t in range(years_len):
-        ah, aw = h_now + t, w_now + t
-        spend_h_row.append(round(float(h_spend_map.get(ah, 0.0)) if ah <= h_die else 0.0, 1))
-        spend_w_row.append(round(float(w_spend_map.get(aw, 0.0)) if aw <= w_die else 0.0, 1))
-    idx_table += ["一時支出 夫", "一時支出 妻"]
-    rows_table += [spend_h_row, spend_w_row]
-
-    expense_total_row, cashflow_row, balance_row = [], [], []
-    bal = start_savings
-    for t in range(years_len):
-        living_total = sum(living_item_rows[nm][t] for nm in ITEMS)
-        care_total = care_h_row[t] + care_w_row[t]
-        spend_total = spend_h_row[t] + spend_w_row[t]
-        expense_total = living_total + care_total + spend_total
-
-        cashflow = income_total_row[t] - expense_total
-        bal += cashflow
-
-        expense_total_row.append(round(float(expense_total), 1))
-        cashflow_row.append(round(float(cashflow), 1))
-        balance_row.append(round(float(bal), 1))
-
-    idx_table.append("支出合計")
-    rows_table.append(expense_total_row)
-
-    add_blank()
-
-    idx_table += ["現金収支", "貯蓄残高"]
-    rows_table += [cashflow_row, balance_row]
-
-    df_table = pd.DataFrame(rows_table, index=idx_table, columns=year_labels)
-
-    df_long = pd.DataFrame({
-        "年目": list(range(1, years_len + 1)),
-        "年間現金収支(万円)": cashflow_row,
-        "貯蓄残高(万円)": balance_row,
-    })
-    return df_long, df_table
-
-
-def df_view_for_display(df_table: pd.DataFrame) -> pd.DataFrame:
-    df_view = df_table.reset_index().rename(columns={"index": "年目"})
-    df_view = df_view.fillna("")
-    df_view["年目"] = df_view["年目"].astype(str).apply(lambda x: "" if x.startswith("__blank") else x)
-
-    def add_unit(label):
-        if label in ["夫年齢", "妻年齢", "単身期開始"] or label == "":
-            return label
-        if "（万円）" in label:
-            return label
-        return f"{label}（万円）"
-
-    df_view["年目"] = df_view["年目"].apply(add_unit)
-    return df_view
-
-
-def df_to_sticky_html(df_view: pd.DataFrame) -> str:
-    cols = list(df_view.columns)
-
-    thead = "<thead><tr>"
-    for j, c in enumerate(cols):
-        cls = "sticky-col" if j == 0 else ""
-        thead += f'<th class="{cls}">{html.escape(str(c))}</th>'
-    thead += "</tr></thead>"
-
-    tbody = "<tbody>"
-    for _, row in df_view.iterrows():
-        label = str(row.iloc[0])
-
-        row_class = ""
-        if label == "夫年齢":
-            row_class = "sticky-row-1"
-        elif label == "妻年齢":
-            row_class = "sticky-row-2"
-
-        bg = ""
-        fg = ""
-        fw = ""
-        if str(label).startswith("収入合計"):
-            bg = "background:#00b0f0;"
-            fg = "color:white;"
-            fw = "font-weight:900;"
-        elif str(label).startswith("支出合計"):
-            bg = "background:#ff0000;"
-            fg = "color:white;"
-            fw = "font-weight:900;"
-        elif str(label).startswith("貯蓄残高"):
-            bg = "background:#92d050;"
-            fg = "color:black;"
-            fw = "font-weight:900;"
-        elif str(label).startswith("単身期開始"):
-            bg = "background:#fff4c2;"
-            fg = "color:#111827;"
-            fw = "font-weight:900;"
-
-        tbody += f'<tr class="{row_class}">'
-        for j, c in enumerate(cols):
-            v = row[c]
-            cls = "sticky-col" if j == 0 else ""
-            style = f"{bg}{fg}{fw}"
-
-            if j == 0:
-                tbody += f'<td class="{cls}" style="{style}">{html.escape(str(v))}</td>'
-            else:
-                if v == "" or v is None:
-                    s = ""
-                else:
-                    try:
-                        if label in ["夫年齢", "妻年齢"]:
-                            s = f"{int(float(v))}"
-                        else:
-                            if label.startswith("単身期開始"):
-                                s = html.escape(str(v))
-                            else:
-                                s = f"{float(v):.1f}"
-                    except:
-                        s = html.escape(str(v))
-                tbody += f'<td style="{style}">{s}</td>'
-        tbody += "</tr>"
-    tbody += "</tbody>"
-
-    return f'<div class="table-wrap"><table class="life-table">{thead}{tbody}</table></div>'
-
-
-def build_inputs_table(inputs: dict) -> pd.DataFrame:
-    rows = []
-    rows += [
-        ("年齢・貯蓄", "夫の現在年齢", f"{inputs['h_now']} 歳"),
-        ("年齢・貯蓄", "夫の死亡年齢", f"{inputs['h_die']} 歳"),
-        ("年齢・貯蓄", "妻の現在年齢", f"{inputs['w_now']} 歳"),
-        ("年齢・貯蓄", "妻の死亡年齢", f"{inputs['w_die']} 歳"),
-        ("年齢・貯蓄", "夫婦合計の現在貯蓄額", f"{inputs['start_savings']:.1f} 万円"),
-    ]
-
-    rows += [
-        ("収入（夫）", "現在年収（年額）", f"{inputs['h_inc_now']:.1f} 万円"),
-        ("収入（夫）", "上昇率", f"{inputs['h_g1']:.1f} ％"),
-        ("収入（夫）", "変更（何歳から）", f"{inputs['h_ch_age']} 歳"),
-        ("収入（夫）", "変更後年収（年額）", f"{inputs['h_inc_after']:.1f} 万円"),
-        ("収入（夫）", "変更後上昇率", f"{inputs['h_g2']:.1f} ％"),
-    ]
-
-    rows += [
-        ("収入（妻）", "現在年収（年額）", f"{inputs['w_inc_now']:.1f} 万円"),
-        ("収入（妻）", "上昇率", f"{inputs['w_g1']:.1f} ％"),
-        ("収入（妻）", "変更（何歳から）", f"{inputs['w_ch_age']} 歳"),
-        ("収入（妻）", "変更後年収（年額）", f"{inputs['w_inc_after']:.1f} 万円"),
-        ("収入（妻）", "変更後上昇率", f"{inputs['w_g2']:.1f} ％"),
-    ]
-
-    for who, lumps in [("一時収入（夫）", inputs["h_lumps"]), ("一時収入（妻）", inputs["w_lumps"])]:
-        for i, (use, age, amt) in enumerate(lumps, start=1):
-            rows.append((who, f"{i}件目 使用", "はい" if use else "いいえ"))
-            rows.append((who, f"{i}件目 年齢", f"{age} 歳"))
-            rows.append((who, f"{i}件目 金額（年額）", f"{amt:.1f} 万円"))
-
-    for nm, p in inputs["living_params"].items():
-        rows.append(("生活費", f"{nm} 月額", f"{p['m']:.1f} 万円/月"))
-        rows.append(("生活費", f"{nm} 上昇率", f"{p['g']:.1f} ％"))
-        rows.append(("生活費", f"{nm} 変更（何年後から）", f"{p['after_years']} 年後"))
-        rows.append(("生活費", f"{nm} 変更後月額", f"{p['m2']:.1f} 万円/月"))
-        rows.append(("生活費", f"{nm} 変更後上昇率", f"{p['g2']:.1f} ％"))
-
-        if nm == "その他":
-            rows.append(("生活費", "単身世帯になったときの生活費の割合(％)", f"{int(inputs.get('single_ratio_pct', 100))} ％"))
-
-    rows += [
-        ("介護費（夫）", "何歳から", f"{inputs['h_care_start']} 歳"),
-        ("介護費（夫）", "月額", f"{inputs['h_care_m']:.1f} 万円/月"),
-        ("介護費（夫）", "上昇率", f"{inputs['h_care_g']:.1f} ％"),
-        ("介護費（妻）", "何歳から", f"{inputs['w_care_start']} 歳"),
-        ("介護費（妻）", "月額", f"{inputs['w_care_m']:.1f} 万円/月"),
-        ("介護費（妻）", "上昇率", f"{inputs['w_care_g']:.1f} ％"),
-    ]
-
-    for who, spends in [("一時支出（夫）", inputs["h_spends"]), ("一時支出（妻）", inputs["w_spends"])]:
-        for i, (use, age, amt) in enumerate(spends, start=1):
-            rows.append((who, f"{i}件目 使用", "はい" if use else "いいえ"))
-            rows.append((who, f"{i}件目 年齢", f"{age} 歳"))
-            rows.append((who, f"{i}件目 金額（年額）", f"{amt:.1f} 万円"))
-
-    return pd.DataFrame(rows, columns=["区分", "項目", "入力値"])
+RESULT_CACHE_MB = int(os.environ.get("LIFEPLAN_CACHE_MB", "256"))
 
 
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    # Streamlit はスクリプトを毎回実行し直すので、cache_resource でプロセスに1つだけ持つ
+    return ResultCache(RESULT_CACHE_MB * 1024 * 1024)
 
 
+def get_advice(key: str, res, inputs: dict) -> dict:
+    """
+    アドバイス（集計・家計・相続）を結果ごとに1回だけ作ってキャッシュする
+    画面・PDF・相談テンプレはどれもこれを読むので、同じ入力なら同じ文章になり、再実行でも作り直さない
+    """
+    def build():
+        analytics = analyze_result(res, inputs)
+        return {
+            "analytics": analytics,
+            "money": make_money_advice_from_result(res, inputs, analytics),
+            "inheritance": make_inheritance_advice_from_result(inputs, res, analytics),
+        }
+    return get_result_cache().get_or_compute(("advice", key), build)
 
 
 # =========================
-# matplotlib 日本語フォント（□対策：オンラインPDF用）
+# PDFのバックグラウンド作成（押されるまで待たせない）
 # =========================
-def set_japanese_font_for_matplotlib(debug=False):
-    import os
-    import matplotlib
-    from matplotlib import font_manager
+# matplotlib の pyplot はスレッドセーフではないので、既定は1本で順番に作る
+PDF_WORKERS = int(os.environ.get("LIFEPLAN_PDF_WORKERS", "1"))
+# 待ち行列がこれより長いときは先回りせず、「PDFで保存」が押されてから作る
+PDF_MAX_PENDING = int(os.environ.get("LIFEPLAN_PDF_MAX_PENDING", "8"))
 
-    # 文字化け（□）対策の基本
-    matplotlib.rcParams["axes.unicode_minus"] = False
 
-    here = os.path.dirname(__file__)
-    font_path = os.path.join(here, "fonts", "NotoSansJP-Regular.otf")
-
-    # （任意）デバッグ表示：本番は False のままでOK
-    if debug:
-        st.write("🔎 font_path =", font_path)
-        st.write("🔎 exists =", os.path.exists(font_path))
-        if os.path.exists(font_path):
-            try:
-                st.write("🔎 size(bytes) =", os.path.getsize(font_path))
-            except Exception as e:
-                st.write("🔎 size error =", e)
+@st.cache_resource
+def get_pdf_jobs() -> PdfJobs:
+    return PdfJobs(get_result_cache(), PDF_WORKERS, PDF_MAX_PENDING)
 
-    # 同梱フォントがある場合：これを最優先で使う
-    if os.path.exists(font_path):
-        font_manager.fontManager.addfont(font_path)
-        font_name = font_manager.FontProperties(fname=font_path).get_name()
-
-        # ここが肝：font.family / sans-serif を確実に Noto Sans JP にする
-        matplotlib.rcParams["font.family"] = "sans-serif"
-        matplotlib.rcParams["font.sans-serif"] = [font_name]
-
-        if debug:
-            st.write("✅ font_name =", font_name)
-            st.write("✅ rcParams font.family =", matplotlib.rcParams.get("font.family"))
-            st.write("✅ rcParams font.sans-serif =", matplotlib.rcParams.get("font.sans-serif"))
-
-        # ★戻り値：この FontProperties を make_chart_png で直指定する
-        return font_manager.FontProperties(fname=font_path)
-
-    # フォントが無い場合でも落とさず、候補を試す（ローカル向け保険）
-    candidates = [
-        "Yu Gothic", "Yu Gothic UI", "Meiryo", "MS Gothic", "MS PGothic",
-        "Hiragino Sans", "Noto Sans CJK JP", "IPAexGothic", "TakaoGothic"
-    ]
-    available = {f.name for f in font_manager.fontManager.ttflist}
-    for name in candidates:
-        if name in available:
-            matplotlib.rcParams["font.family"] = name
-            matplotlib.rcParams["axes.unicode_minus"] = False
-            return font_manager.FontProperties(family=name)
-
-    # 何も見つからない場合でも返す（最悪でもクラッシュさせない）
-    return font_manager.FontProperties()
-
-
-def make_chart_png(df_long: pd.DataFrame, y_col: str, title: str) -> bytes:
-    # ★本番は debug=False（画面ログ不要）。確認したいときだけ True。
-    fp = set_japanese_font_for_matplotlib(debug=False)
-
-    fig = plt.figure(figsize=(10, 4.2))
-    ax = fig.add_subplot(111)
-
-    # 0ライン（赤）
-    ax.axhline(0, color="red", linewidth=2, linestyle="--")
-
-    # 線
-    ax.plot(df_long["年目"], df_long[y_col], marker="o")
-
-    # ★ここが本命：フォントを「直指定」してオンラインでも日本語を強制
-    ax.set_title(title, fontproperties=fp)
-    ax.set_xlabel("年目", fontproperties=fp)
-    ax.set_ylabel("万円", fontproperties=fp)
-
-    # ★目盛りにもフォント直指定（念のため）
-    for lab in ax.get_xticklabels() + ax.get_yticklabels():
-        lab.set_fontproperties(fp)
-
-    ax.grid(True)
-
-    buf = BytesIO()
-    fig.tight_layout()
-    fig.savefig(buf, format="png", dpi=200)
-    plt.close(fig)
-    return buf.getvalue()
-
-def build_pdf_bytes(
-    df_view: pd.DataFrame,
-    inputs: dict,
-    df_long: pd.DataFrame,
-    extra_text_blocks: Optional[List[Tuple[str, List[str]]]] = None
-) -> bytes:
-    try:
-        pdfmetrics.registerFont(UnicodeCIDFont("HeiseiKakuGo-W5"))
-        base_font = "HeiseiKakuGo-W5"
-    except Exception:
-        base_font = "Helvetica"
-
-    buf = BytesIO()
-    doc = SimpleDocTemplate(
-        buf,
-        pagesize=landscape(A4),
-        leftMargin=24, rightMargin=18, topMargin=18, bottomMargin=18
-    )
-    styles = getSampleStyleSheet()
-    styleN = styles["Normal"]
-    styleN.fontName = base_font
-    styleN.fontSize = 9
-    styleN.leading = 12
-
-    elems = []
-    elems.append(Paragraph(f"<b>{APP_TITLE}</b>", styleN))
-    elems.append(Spacer(1, 8))
-
-    elems.append(Paragraph("<b>入力値一覧</b>", styleN))
-    elems.append(Spacer(1, 6))
-
-    in_df = build_inputs_table(inputs)
-    in_data = [list(in_df.columns)]
-    for _, r in in_df.iterrows():
-        in_data.append([str(r["区分"]), str(r["項目"]), str(r["入力値"])])
-
-    in_tbl = Table(in_data, repeatRows=1)
-    ts = TableStyle()
-    ts.add("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1e88e5"))
-    ts.add("TEXTCOLOR", (0, 0), (-1, 0), colors.white)
-    ts.add("FONTNAME", (0, 0), (-1, -1), base_font)
-    ts.add("FONTSIZE", (0, 0), (-1, -1), 8)
-    ts.add("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#d0d0d0"))
-    ts.add("VALIGN", (0, 0), (-1, -1), "MIDDLE")
-    ts.add("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f7fbff")])
-    ts.add("ALIGN", (0, 0), (-1, -1), "LEFT")
-    in_tbl.setStyle(ts)
-    elems.append(in_tbl)
-
-    elems.append(PageBreak())
-
-    elems.append(Paragraph("<b>計算結果（ライフプラン表）</b>", styleN))
-    elems.append(Spacer(1, 6))
-
-    all_cols = list(df_view.columns)
-    first_col = all_cols[0]
-    year_cols = all_cols[1:]
-
-    cols_per_page = 20
-    chunks = [year_cols[i:i+cols_per_page] for i in range(0, len(year_cols), cols_per_page)]
-
-    def row_bg(label: str):
-        if label.startswith("収入合計"):
-            return colors.HexColor("#00b0f0"), colors.white
-        if label.startswith("支出合計"):
-            return colors.HexColor("#ff0000"), colors.white
-        if label.startswith("貯蓄残高"):
-            return colors.HexColor("#92d050"), colors.black
-        if label.startswith("単身期開始"):
-            return colors.HexColor("#fff4c2"), colors.black
-        return None, None
-
-    def is_blank(v):
-        if v is None:
-            return True
-        try:
-            if isinstance(v, float) and pd.isna(v):
-                return True
-        except Exception:
-            pass
-        sv = str(v).strip()
-        return (sv == "" or sv.lower() == "nan")
-
-    for ci, ch in enumerate(chunks):
-        page_cols = [first_col] + ch
-        sub = df_view[page_cols].copy()
-
-        data = [page_cols]
-        for _, r in sub.iterrows():
-            row = []
-            label = str(r[first_col])
-            for j, c in enumerate(page_cols):
-                v = r[c]
-                if j == 0:
-                    row.append("" if v is None else str(v))
-                else:
-                    if is_blank(v):
-                        row.append("")
-                    else:
-                        try:
-                            if label in ["夫年齢", "妻年齢"]:
-                                row.append(str(int(float(v))))
-                            else:
-                                if label.startswith("単身期開始"):
-                                    row.append(str(v))
-                                else:
-                                    row.append(f"{float(v):.1f}")
-                        except Exception:
-                            row.append(str(v))
-            data.append(row)
-
-        usable_w = doc.width
-        first_w = 165
-        n_year = len(page_cols) - 1
-        rest_w = max(usable_w - first_w, 10)
-        each_w = rest_w / max(n_year, 1)
-        col_widths = [first_w] + [each_w] * n_year
-
-        tbl = Table(data, repeatRows=1, colWidths=col_widths)
-        ts2 = TableStyle()
-        ts2.add("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f3f4f6"))
-        ts2.add("FONTNAME", (0, 0), (-1, -1), base_font)
-        ts2.add("FONTSIZE", (0, 0), (-1, -1), 8)
-        ts2.add("ALIGN", (1, 0), (-1, -1), "CENTER")
-        ts2.add("ALIGN", (0, 0), (0, -1), "LEFT")
-        ts2.add("VALIGN", (0, 0), (-1, -1), "MIDDLE")
-        ts2.add("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#d0d0d0"))
-        ts2.add("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#fcfcfc")])
-        ts2.add("BACKGROUND", (0, 1), (0, -1), colors.HexColor("#fafafa"))
-
-        for i in range(1, len(data)):
-            label = data[i][0]
-            bg, fg = row_bg(label)
-            if bg is not None:
-                ts2.add("BACKGROUND", (0, i), (-1, i), bg)
-                ts2.add("TEXTCOLOR", (0, i), (-1, i), fg)
-
-        tbl.setStyle(ts2)
-        elems.append(tbl)
-
-        if ci < len(chunks) - 1:
-            elems.append(PageBreak())
-
-    elems.append(PageBreak())
-    elems.append(Paragraph("<b>グラフ</b>", styleN))
-    elems.append(Spacer(1, 8))
-
-    png1 = make_chart_png(df_long, "年間現金収支(万円)", "年間現金収支（万円）")
-    png2 = make_chart_png(df_long, "貯蓄残高(万円)", "貯蓄残高（万円）")
-
-    img1 = RLImage(BytesIO(png1), width=720, height=300)
-    img2 = RLImage(BytesIO(png2), width=720, height=300)
-
-    elems.append(img1)
-    elems.append(Spacer(1, 10))
-    elems.append(img2)
-
-    if extra_text_blocks:
-        elems.append(PageBreak())
-        elems.append(Paragraph("<b>アドバイス</b>", styleN))
-        elems.append(Spacer(1, 8))
-        for title, lines in extra_text_blocks:
-            elems.append(Paragraph(f"<b>{html.escape(title)}</b>", styleN))
-            elems.append(Spacer(1, 4))
-            for ln in lines:
-                elems.append(Paragraph(html.escape(str(ln)), styleN))
-            elems.append(Spacer(1, 10))
-
-    doc.build(elems)
-    return buf.getvalue()
-
-
-def _get_row_vals(df_table: pd.DataFrame, label: str):
-    if df_table is None or label not in df_table.index:
-        return None
-    vals = []
-    for v in df_table.loc[label].tolist():
-        try:
-            vals.append(float(v) if v != "" else 0.0)
-        except:
-            vals.append(0.0)
-    return vals
 
+# フォントは起動時に1回だけ解決しておく（PDF作成スレッドでは結果を使うだけ）
+get_font_registry()
 
-def make_money_advice_soft(
-    df_long: pd.DataFrame,
-    df_table: pd.DataFrame,
-    inputs: Optional[dict] = None
-) -> List[str]:
-    """
-    ✅ 計算結果(df_long, df_table, inputs)を“読むだけ”で文章を作る
-    ※計算式には一切影響しません（出力文章のみ更新）
-    """
-    if df_long is None or len(df_long) == 0:
-        return ["まだ計算結果がありません。入力後に「計算」を押してください。"]
-
-    cash = df_long["年間現金収支(万円)"].astype(float).reset_index(drop=True)
-    bal  = df_long["貯蓄残高(万円)"].astype(float).reset_index(drop=True)
-    years = df_long["年目"].astype(int).reset_index(drop=True)
-
-    min_bal  = float(bal.min())
-    last_bal = float(bal.iloc[-1])
-
-    deficit_mask = cash < 0
-    deficit_count = int(deficit_mask.sum())
-    total_deficit = float((-cash[deficit_mask]).sum()) if deficit_count > 0 else 0.0
-
-    # 連続赤字の最大
-    max_streak = 0
-    cur = 0
-    for is_def in deficit_mask.tolist():
-        if is_def:
-            cur += 1
-            max_streak = max(max_streak, cur)
-        else:
-            cur = 0
-
-    # df_tableから行を取るユーティリティ
-    def _get_row_vals(label: str):
-        if df_table is None or label not in df_table.index:
-            return None
-        vals = []
-        for v in df_table.loc[label].tolist():
-            try:
-                vals.append(float(v) if v != "" else 0.0)
-            except:
-                vals.append(0.0)
-        return vals
-
-    care_h = _get_row_vals("介護費 夫") or [0.0]*len(years)
-    care_w = _get_row_vals("介護費 妻") or [0.0]*len(years)
-    spend_h = _get_row_vals("一時支出 夫") or [0.0]*len(years)
-    spend_w = _get_row_vals("一時支出 妻") or [0.0]*len(years)
-
-    # 生活費合計（年額）
-    item_rows = [_get_row_vals(nm) for nm in ITEMS]
-    if all(r is not None for r in item_rows):
-        living_total = [sum(r[i] for r in item_rows) for i in range(len(item_rows[0]))]
-    else:
-        living_total = [0.0]*len(years)
-
-    care_total = [float(care_h[i]) + float(care_w[i]) for i in range(len(years))]
-    spend_total = [float(spend_h[i]) + float(spend_w[i]) for i in range(len(years))]
-
-    advice: List[str] = []
-
-    # 総評
-    if min_bal < 0:
-        neg_idx = [i for i, v in enumerate(bal.tolist()) if v < 0]
-        first_neg = neg_idx[0] if neg_idx else None
-        last_neg = neg_idx[-1] if neg_idx else None
-        if first_neg is not None:
-            first_year = int(years.iloc[first_neg])
-            last_year = int(years.iloc[last_neg])
-            stays_negative = all(v < 0 for v in bal.iloc[first_neg:].tolist())
-            if stays_negative:
-                advice.append(f"🔴 {first_year}年目から貯蓄残高がマイナスに入り、その状態が最後まで続きます（資金ショート想定）。早めの手当てが必要です。")
-            else:
-                advice.append(f"🔴 {first_year}年目に貯蓄残高がマイナスに入ります（いったん{last_year}年目までマイナスが出ます）。早めに対策を考えると安心です。")
-    else:
-        if deficit_count == 0:
-            advice.append("🟢 全体としてとても安定しています（残高も収支も大きな不安が出にくい形です）。")
-        else:
-            advice.append("🟠 年間収支が赤字になる年はありますが、残高がマイナスにはなっていません。落ち着いて確認していきましょう。")
-        advice.append("🌱 シミュレーション期間を通して、貯蓄残高はマイナスになっていません（資金ショートしにくい想定です）。")
+# 感度分析のトルネード図に出す項目数（影響の大きい順）
+SENS_TOP_N = 15
+# セッションに保存しておけるシナリオの数（超えたら古いものから消す）
+SCENARIO_MAX = 6
 
-    if deficit_count == 0:
-        advice.append("😊 年間の現金収支は全期間でプラスです。大きな支出イベントの年だけ、念のため見ておくと十分です。")
-    else:
-        advice.append(
-            f"📉 年間の現金収支が赤字になる年が {deficit_count} 年あります（連続最大 {max_streak} 年）。"
-            f"赤字合計は {total_deficit:,.1f} 万円ほどです。"
-        )
 
-    advice.append(f"🏁 最終年の貯蓄残高（目安）：{last_bal:,.1f} 万円")
-
-    # “原因の当たり”を具体化（最悪の年）
-    worst_idx = int(cash.idxmin())
-    worst_year = int(years.iloc[worst_idx])
-    worst_cash = float(cash.iloc[worst_idx])
-
-    lt = float(living_total[worst_idx])
-    ct = float(care_total[worst_idx])
-    stt = float(spend_total[worst_idx])
-
-    advice.append("—")
-    advice.append(f"🔎 赤字の要因チェック（目安）：いちばん厳しいのは {worst_year}年目（年間現金収支 {worst_cash:,.1f} 万円）です。")
-    advice.append(f"・内訳の目安：生活費 {lt:,.1f} 万円／介護費 {ct:,.1f} 万円／一時支出 {stt:,.1f} 万円")
-
-    # 生活費8項目のうち最大項目
-    if all(r is not None for r in item_rows):
-        vals = {ITEMS[i]: float(item_rows[i][worst_idx]) for i in range(len(ITEMS))}
-        max_item_name = max(vals, key=vals.get)
-        max_item_val = vals[max_item_name]
-        advice.append(f"・生活費8項目の中では「{max_item_name}」が {max_item_val:,.1f} 万円/年 と最も大きいです。")
-        advice.append("　もしこの項目（例：食費など）が平均よりかなり大きい設定なら、赤字の大きな原因となっている可能性があります。")
-
-    # ▼ 一時支出：年齢で具体表示（夫/妻/合計）
-    if inputs is not None:
-        h_sp_map = inputs.get("h_spend_map", {}) or {}
-        w_sp_map = inputs.get("w_spend_map", {}) or {}
-
-        if len(h_sp_map) > 0:
-            h_age_max = max(h_sp_map, key=lambda a: float(h_sp_map.get(a, 0.0)))
-            h_amt_max = float(h_sp_map.get(h_age_max, 0.0))
-            if h_amt_max > 0:
-                advice.append(f"・夫の一時支出では **{int(h_age_max)}歳の {h_amt_max:,.1f} 万円** が最大で、赤字の主要因になっている可能性があります。")
-
-        if len(w_sp_map) > 0:
-            w_age_max = max(w_sp_map, key=lambda a: float(w_sp_map.get(a, 0.0)))
-            w_amt_max = float(w_sp_map.get(w_age_max, 0.0))
-            if w_amt_max > 0:
-                advice.append(f"・妻の一時支出では **{int(w_age_max)}歳の {w_amt_max:,.1f} 万円** が最大で、赤字の主要因になっている可能性があります。")
-
-        merged = {}
-        for a, v in h_sp_map.items():
-            try:
-                merged[int(a)] = merged.get(int(a), 0.0) + float(v)
-            except:
-                pass
-        for a, v in w_sp_map.items():
-            try:
-                merged[int(a)] = merged.get(int(a), 0.0) + float(v)
-            except:
-                pass
-        if len(merged) > 0:
-            age_max = max(merged, key=lambda a: float(merged.get(a, 0.0)))
-            amt_max = float(merged.get(age_max, 0.0))
-            if amt_max > 0:
-                advice.append(f"・夫婦合計で見ると **{int(age_max)}歳の一時支出 {amt_max:,.1f} 万円** が最大です（時期調整だけでも改善することがあります）。")
-
-    # 介護費：最大年も表示
-    cmax = max(care_total) if care_total else 0.0
-    if cmax > 0:
-        cmax_idx = int(care_total.index(cmax))
-        advice.append(f"・介護費（夫婦合計）が最大なのは {int(years.iloc[cmax_idx])}年目で {cmax:,.1f} 万円です。高め設定なら赤字要因になりやすいので想定の妥当性を確認すると安心です。")
-
-    # 一時収入の影響（安定要因）
-    inc_lump_h = _get_row_vals("一時収入 夫") or [0.0]*len(years)
-    inc_lump_w = _get_row_vals("一時収入 妻") or [0.0]*len(years)
-    lump_sum = [float(inc_lump_h[i]) + float(inc_lump_w[i]) for i in range(len(years))]
-    lmax = max(lump_sum) if lump_sum else 0.0
-    if lmax > 0:
-        lmax_idx = int(lump_sum.index(lmax))
-        advice.append("—")
-        advice.append(f"💰 一時収入の影響：一時収入（夫婦合計）が最大なのは {int(years.iloc[lmax_idx])}年目で {lmax:,.1f} 万円です。")
-        advice.append("　退職金などの一時収入が大きい場合、家計の安定維持の大きな要因になっていることがあります。")
-
-    advice.append("—")
-    advice.append("🧭 もっと詳しく知りたい方は、この下の「相談の入り口」にお進みください。")
-    advice.append("💡 ヒント：①一時支出は“時期調整”だけでも効きます ②生活費は“固定費”から ③介護費は少し多め想定で安心です")
-    return advice
-
-
-def make_inheritance_advice_soft(inputs: dict, df_long: pd.DataFrame) -> List[str]:
-    """
-    ✅ 相続は“計算結果を読むだけ”で文章を作る（計算式には影響なし）
-    目的：
-    - 一次相続（先に亡くなる方）の時点で残高が多い場合の注意喚起
-    - 二次相続リスク（配偶者控除→次の相続で増える可能性）を明確に
-    - 相談導線の文言を追加・表現変更
-    """
-    if inputs is None or df_long is None or len(df_long) == 0:
-        return ["相続アドバイスは、計算後に表示されます。"]
-
-    h_now, h_die = int(inputs["h_now"]), int(inputs["h_die"])
-    w_now, w_die = int(inputs["w_now"]), int(inputs["w_die"])
-
-    # 何年目に死亡するか（到達しないならNone）
-    h_year = (h_die - h_now + 1) if h_die >= h_now else None
-    w_year = (w_die - w_now + 1) if w_die >= w_now else None
-
-    def bal_at(year_after: Optional[int]):
-        if year_after is None:
-            return None
-        if year_after < 1 or year_after > int(df_long["年目"].max()):
-            return None
-        return float(df_long.loc[df_long["年目"] == year_after, "貯蓄残高(万円)"].iloc[0])
-
-    h_bal = bal_at(h_year)
-    w_bal = bal_at(w_year)
-
-    # 一次相続：先に亡くなる方
-    first = None
-    if h_year is not None and w_year is not None:
-        if h_year < w_year:
-            first = ("夫", h_die, h_year, h_bal)
-            second = ("妻", w_die, w_year, w_bal)
-        elif w_year < h_year:
-            first = ("妻", w_die, w_year, w_bal)
-            second = ("夫", h_die, h_year, h_bal)
-        else:
-            first = ("同時期", None, h_year, None)
-            second = None
-    else:
-        first = None
-        second = None
-
-    advice: List[str] = []
-    advice.append("🕊️ 相続については、まず『いつ頃』『どれくらい残る見込みか』をざっくり掴むだけでも大きな前進です。")
-
-    # それぞれの死亡時残高（目安）
-    if h_year is not None:
-        hb = (h_bal if h_bal is not None else 0.0)
-        advice.append(f"・夫が {h_die}歳（{h_year}年目）時点の貯蓄残高目安：{hb:,.1f} 万円")
-    if w_year is not None:
-        wb = (w_bal if w_bal is not None else 0.0)
-        advice.append(f"・妻が {w_die}歳（{w_year}年目）時点の貯蓄残高目安：{wb:,.1f} 万円")
-
-    # 一次相続の注意喚起（残高が大きい場合）
-    # ※しきい値は「目安」：貯蓄だけで判断できないため、控えめに“可能性”表現
-    if first is not None and first[0] != "同時期":
-        who, die_age, year_after, balv = first
-        balv = float(balv) if balv is not None else 0.0
-
-        if balv >= 3600.0:
-            advice.append("—")
-            advice.append(f"⚠️ 一次相続の注意：{who}{die_age}歳での死亡時点（{year_after}年目）に、夫婦の貯蓄残高が {balv:,.1f} 万円ほど残る想定です。")
-            advice.append("　これが **すべて亡くなった方の名義** になっている場合、相続税がかかる可能性があります（他の資産も含めて要確認）。")
-            advice.append("　その場合は **二次相続対策も早めに** 考えておく必要があります。")
-
-            advice.append("—")
-            advice.append("📌 二次相続の注意点（超重要）：")
-            advice.append("・一次相続で、配偶者は『配偶者税額控除』を使って相続税をゼロにできる場合があります。")
-            advice.append("・しかしその結果、次に配偶者が亡くなる（二次相続）時に、配偶者の相続財産が大きく増え、二次相続での相続税が増える恐れがあります。ご注意ください。")
-
-    # 表現変更（ご要望どおり）
-    advice.append("—")
-    advice.append("🌿 さらに次の3点を、できる範囲で整えておくと安心です：")
-    advice.append("　① 遺言（特に不動産がある場合は有効）")
-    advice.append("　② もしもの時の連絡先・口座・保険・不動産情報の一覧（家族が困りにくくなります）")
-    advice.append("　③ 生前贈与や名義の整理は『急がず、税や手間を見ながら』でOKです")
-
-    advice.append("—")
-    advice.append("🧭 もっと詳しく知りたい方は、この下の「相談の入り口」にお進みください。")
-    advice.append("📌 これらについてもさらに詳しく知りたい方は、この下の「相談の入り口」よりお進みください。")
-    return advice
+# =========================
+# 入力の保存・読み込み（JSONファイル・URL）
+# =========================
+LUMP_WIDGETS = [("h_lump", "h_lumps"), ("w_lump", "w_lumps"), ("h_spend", "h_spends"), ("w_spend", "w_spends")]
 
 
-def make_chatgpt_link(question_text: str) -> str:
-    return "https://chat.openai.com/"
+def inputs_to_widget_state(inputs: dict) -> dict:
+    """inputs → 入力フォームの各欄（key）の値。型は DEFAULT にそろえる（整数の欄は int、金額は float）"""
+    state = {}
+    for k, v in DEFAULT.items():
+        if isinstance(v, (int, float)) and k in inputs:
+            state[k] = type(v)(inputs[k])
+    for name in ITEMS:
+        p = inputs["living_params"][name]
+        state[f"lv_{name}_m"], state[f"lv_{name}_g"] = float(p["m"]), float(p["g"])
+        state[f"lv_{name}_after"] = int(p["after_years"])
+        state[f"lv_{name}_m2"], state[f"lv_{name}_g2"] = float(p["m2"]), float(p["g2"])
+    for prefix, list_key in LUMP_WIDGETS:
+        rows = list(inputs.get(list_key, []))[:3]
+        rows += [(False, 0, 0.0)] * (3 - len(rows))
+        for i, (use, age, amt) in enumerate(rows, start=1):
+            state[f"{prefix}_use_{i}"], state[f"{prefix}_age_{i}"], state[f"{prefix}_amt_{i}"] = bool(use), int(age), float(amt)
+    state["monthly_on"] = uses_monthly(inputs)
+    for k in MONTH_KEYS:
+        state[k] = int(inputs.get(k, 1))
+    inv = normalize_invest(inputs.get("invest") or {})
+    state["inv_on"] = bool(inputs.get("invest"))
+    for j in range(len(BUCKETS)):
+        state[f"inv_alloc_{j}"], state[f"inv_ret_{j}"], state[f"inv_sd_{j}"] = inv["alloc"][j], inv["ret"][j], inv["sd"][j]
+    # 画面の選択肢に無い順番（一括計算のファイルなど）は、最初の選択肢にする
+    state["inv_order"] = next((nm for nm, od in WITHDRAW_ORDERS.items() if od == inv["order"]), next(iter(WITHDRAW_ORDERS)))
+    state["inv_rebalance"] = inv["rebalance"]
+    return state
+
+
+def restore_inputs(inputs: dict) -> None:
+    # 入力欄を埋めて、そのまま「計算」したことにする（同じ内容ならハッシュが同じなので、結果はキャッシュから返る）
+    if any(len(inputs.get(list_key, [])) > 3 for _, list_key in LUMP_WIDGETS):
+        st.warning("一時収入・一時支出が4件以上あったので、はじめの3件だけ読み込みました。")
+    st.session_state.update(inputs_to_widget_state(inputs))
+    st.session_state["restore_submit"] = True
+
+
+# URL の ?plan=... は、セッションの最初に1回だけ読む
+if "plan_from_url" not in st.session_state:
+    st.session_state["plan_from_url"] = True
+    plan_token = st.query_params.get(SHARE_QUERY_KEY)
+    if plan_token:
+        try:
+            restore_inputs(inputs_from_token(plan_token))
+        except ValueError as e:
+            st.warning(f"URL の入力を読み込めませんでした：{e}")
+
+with st.expander("■ 保存した入力を読み込む（JSONファイル・URL）", expanded=False):
+    st.markdown('<div class="subnote">計算結果の下の「入力をJSONで保存」で保存したファイルを読み込むと、入力欄が埋まり、そのまま計算します。共有された URL（?plan=...）で開いたときも同じです。</div>', unsafe_allow_html=True)
+    up = st.file_uploader("保存したJSONを読み込む", type=["json"], key="plan_upload")
+    # 同じファイルを何度も読み込まないように、ファイルごとに1回だけ
+    if up is not None and st.session_state.get("plan_upload_id") != up.file_id:
+        st.session_state["plan_upload_id"] = up.file_id
+        try:
+            restore_inputs(inputs_from_json(up.getvalue().decode("utf-8-sig")))
+        except (ValueError, UnicodeDecodeError) as e:
+            st.error(f"読み込めませんでした：{e}")
 
 
 # =========================
@@ -1501,6 +750,49 @@ with st.form("lifeplan_form", clear_on_submit=False):
             note_text=None
         )
 
+    with st.expander("■ 将来のばらつきも見る（モンテカルロ）", expanded=False):
+        st.markdown('<div class="subnote">上昇率（収入・生活費・介護費）を入力値のまわりで何通りも振って、貯蓄残高の幅を見ます。</div>', unsafe_allow_html=True)
+        m1, m2, m3, m4 = st.columns([1.0, 1.0, 1.0, 1.0])
+        with m1:
+            mc_on = st.checkbox("ばらつきも計算する", value=False, key="mc_on")
+        with m2:
+            mc_paths = NI_INT("試行回数", "mc_paths", 1000, 100000, 10000, 1000)
+        with m3:
+            mc_rate_sd = NI_FLOAT("上昇率のばらつき(±％)", "mc_rate_sd", 0.0, 10.0, 1.0, 0.1)
+        with m4:
+            mc_die_sd = NI_FLOAT("死亡年齢のばらつき(±歳)", "mc_die_sd", 0.0, 20.0, 0.0, 0.5)
+
+    with st.expander("■ 月単位で計算する（年の途中の退職・介護）", expanded=False):
+        st.markdown('<div class="subnote">収入の変更（退職など）と介護の始まりを、その年齢の年の何月からにするか選べます。月ごとの貯蓄残高で、年の途中の落ち込みも見られます（表は年ごとにまとめて表示します。ばらつき・逆算・感度・寿命の組み合わせも月単位で計算し、年末の貯蓄残高で見ます）。</div>', unsafe_allow_html=True)
+        n1, n2, n3, n4, n5 = st.columns([1.2, 1.0, 1.0, 1.0, 1.0])
+        with n1:
+            monthly_on = st.checkbox("月単位で計算する", value=False, key="monthly_on")
+        with n2:
+            h_ch_month = NI_INT("夫の収入変更(月)", "h_ch_month", 1, 12, 1, 1)
+        with n3:
+            w_ch_month = NI_INT("妻の収入変更(月)", "w_ch_month", 1, 12, 1, 1)
+        with n4:
+            h_care_month = NI_INT("夫の介護開始(月)", "h_care_month", 1, 12, 1, 1)
+        with n5:
+            w_care_month = NI_INT("妻の介護開始(月)", "w_care_month", 1, 12, 1, 1)
+
+    with st.expander("■ 貯蓄を運用する（現金・債券・株式）", expanded=False):
+        st.markdown('<div class="subnote">貯蓄を現金・債券・株式に分けて持ち、年の初めの残高に期待利回りを付けます。赤字の年は選んだ順番で取り崩し、黒字の年は先頭の口座に入れます。ばらつきは「将来のばらつきも見る」で使います。</div>', unsafe_allow_html=True)
+        inv_on = st.checkbox("貯蓄を運用する", value=False, key="inv_on")
+        inv_cols = st.columns(len(BUCKETS))
+        inv_alloc, inv_ret, inv_sd = [], [], []
+        for j, (col, nm) in enumerate(zip(inv_cols, BUCKETS)):
+            with col:
+                st.markdown(f"**{nm}**")
+                inv_alloc.append(NI_FLOAT("配分(％)", f"inv_alloc_{j}", 0.0, 100.0, INVEST_DEFAULT["alloc"][j], 1.0))
+                inv_ret.append(NI_FLOAT("期待利回り(％)", f"inv_ret_{j}", *INVEST_RET_RANGE, INVEST_DEFAULT["ret"][j], 0.1))
+                inv_sd.append(NI_FLOAT("ばらつき(±％)", f"inv_sd_{j}", *INVEST_SD_RANGE, INVEST_DEFAULT["sd"][j], 0.5))
+        o1, o2 = st.columns([1.0, 1.0])
+        with o1:
+            inv_order = st.selectbox("赤字の年に取り崩す順番", list(WITHDRAW_ORDERS), key="inv_order")
+        with o2:
+            inv_rebalance = st.checkbox("毎年、配分どおりに戻す（リバランス）", value=INVEST_DEFAULT["rebalance"], key="inv_rebalance")
+
     st.markdown('<div class="section-title">■ 実行</div>', unsafe_allow_html=True)
     bL, bC, bR = st.columns([1, 2, 1])
     with bC:
@@ -1512,14 +804,34 @@ with st.form("lifeplan_form", clear_on_submit=False):
 # =========================
 if "result_long" not in st.session_state: st.session_state["result_long"] = None
 if "result_table" not in st.session_state: st.session_state["result_table"] = None
-if "pdf_bytes" not in st.session_state: st.session_state["pdf_bytes"] = None
+if "result" not in st.session_state: st.session_state["result"] = None
+if "pdf_key" not in st.session_state: st.session_state["pdf_key"] = None
+if "pdf_build" not in st.session_state: st.session_state["pdf_build"] = None
 if "inputs" not in st.session_state: st.session_state["inputs"] = None
+if "mc_result" not in st.session_state: st.session_state["mc_result"] = None
+if "inputs_hash" not in st.session_state: st.session_state["inputs_hash"] = None
+if "goal_seek_key" not in st.session_state: st.session_state["goal_seek_key"] = None
+if "sens_key" not in st.session_state: st.session_state["sens_key"] = None
+if "longevity_key" not in st.session_state: st.session_state["longevity_key"] = None
+# 前回の入力との差分だけ計算し直すエンジン（セッションごと）
+if "calc_engine" not in st.session_state: st.session_state["calc_engine"] = IncrementalLifePlan()
+# 名前を付けて保存した結果（名前 → {"key": 入力のハッシュ, "result": LifePlanResult}）。比べるときは計算し直さない
+if "scenarios" not in st.session_state: st.session_state["scenarios"] = {}
+
+# 保存した入力（ファイル・URL）を読み込んだ直後は、「計算」が押されたのと同じに扱う
+if st.session_state.pop("restore_submit", False):
+    submitted = True
+
+# 処理時間の計測（環境変数 LIFEPLAN_TIMING=1 のときだけ。ログは JSON 1行ずつ、画面の一番下に一覧）
+timer = StageTimer("submit" if submitted else "rerun")
 
 if submitted:
     if int(h_die) < int(h_now):
         st.error("夫：死亡年齢は現在年齢以上にしてください。"); st.stop()
     if int(w_die) < int(w_now):
         st.error("妻：死亡年齢は現在年齢以上にしてください。"); st.stop()
+    if inv_on and sum(inv_alloc) <= 0:
+        st.error("貯蓄の運用：配分の合計を0より大きくしてください。"); st.stop()
 
     inputs = {
         "h_now": int(h_now), "h_die": int(h_die),
@@ -1548,25 +860,75 @@ if submitted:
         "h_spend_map": lumps_to_map(h_spends),
         "w_spend_map": lumps_to_map(w_spends),
     }
-
-    df_long, df_table = calc_lifeplan(inputs)
-    st.session_state["result_long"] = df_long
-    st.session_state["result_table"] = df_table
+    # 月単位のときだけ月を入れる（年単位の入力はこれまでと同じハッシュ・保存データになる）
+    if monthly_on:
+        inputs.update({
+            "h_ch_month": int(h_ch_month), "w_ch_month": int(w_ch_month),
+            "h_care_month": int(h_care_month), "w_care_month": int(w_care_month),
+        })
+    # 運用するときだけ入れる（しないときの入力・ハッシュはこれまでと同じ）
+    if inv_on:
+        inputs["invest"] = {
+            "alloc": [float(v) for v in inv_alloc], "ret": [float(v) for v in inv_ret], "sd": [float(v) for v in inv_sd],
+            "order": list(WITHDRAW_ORDERS[inv_order]), "rebalance": bool(inv_rebalance),
+        }
+
+    # 同じ入力（ほかの人の同じ入力も）なら、計算・アドバイス・PDFはキャッシュから返す
+    cache = get_result_cache()
+    key = inputs_hash(inputs)
+
+    if uses_monthly(inputs):
+        # 月単位：月ごとの残高つきの結果をキャッシュに置き、表は年にまとめた結果、グラフ欄は月ごとの残高を読む
+        with timer.stage("calc", cache_hit=("monthly", key) in cache, monthly=True):
+            res = cache.get_or_compute(("monthly", key), lambda: calc_lifeplan_monthly(inputs))["result"]
+    else:
+        with timer.stage("calc", cache_hit=("calc", key) in cache):
+            res = cache.get_or_compute(("calc", key), lambda: st.session_state["calc_engine"].result(inputs))
+    st.session_state["result"] = res
+    st.session_state["result_long"] = res.df_long
+    st.session_state["result_table"] = res.df_table
     st.session_state["inputs"] = inputs
+    st.session_state["inputs_hash"] = key
+    # ブラウザの URL にも今の入力を入れておく（そのままブックマーク・共有できる）
+    st.query_params[SHARE_QUERY_KEY] = inputs_to_token(inputs)
+
+    # 最低残高・赤字の続く期間・死亡年の残高などの集計とアドバイス文は、結果ごとに1回だけ作る
+    with timer.stage("advice", cache_hit=("advice", key) in cache):
+        advice = get_advice(key, res, inputs)
+    money_lines = advice["money"]
+    inh_lines = advice["inheritance"]
+
+    mc_result = None
+    mc_settings = None
+    if mc_on:
+        mc_settings = (int(mc_paths), float(mc_rate_sd), float(mc_die_sd))
+        with timer.stage("monte_carlo", cache_hit=("mc", key, mc_settings) in cache, n_paths=mc_settings[0]):
+            mc_result = cache.get_or_compute(
+                ("mc", key, mc_settings),
+                lambda: run_monte_carlo(inputs, n_paths=mc_settings[0], rate_sd=mc_settings[1], die_sd=mc_settings[2]),
+            )
+    st.session_state["mc_result"] = mc_result
+
+    # PDFはここでは作らない（表を出したあとに裏で作り始め、保存を押したときに受け取る）
+    def build_pdf():
+        # 裏のスレッドで作るので、計測結果はキャッシュに置いて次の再実行で一覧に出す
+        pdf_timer = StageTimer("pdf", inputs_hash=key[:12])
+        data = build_pdf_bytes(
+            None, inputs, res.df_long,
+            extra_text_blocks=[
+                ("家計へのアドバイス", money_lines),
+                ("相続ワンポイントアドバイス", inh_lines),
+            ],
+            mc=mc_result,
+            result=res,
+            timer=pdf_timer,
+        )
+        if pdf_timer.enabled:
+            cache.put(("pdf_timing", key, mc_settings), pdf_timer.stages)
+        return data
 
-    df_view = df_view_for_display(df_table)
-
-    money_lines = make_money_advice_soft(df_long, df_table, inputs)
-
-    inh_lines = make_inheritance_advice_soft(inputs, df_long)
-
-    st.session_state["pdf_bytes"] = build_pdf_bytes(
-        df_view, inputs, df_long,
-        extra_text_blocks=[
-            ("家計へのアドバイス", money_lines),
-            ("相続ワンポイントアドバイス", inh_lines),
-        ]
-    )
+    st.session_state["pdf_key"] = ("pdf", key, mc_settings)
+    st.session_state["pdf_build"] = build_pdf
 
 df_long = st.session_state.get("result_long", None)
 df_table = st.session_state.get("result_table", None)
@@ -1577,7 +939,7 @@ df_table = st.session_state.get("result_table", None)
 if df_long is not None and df_table is not None:
     st.success("計算できました。")
 
-    tab1, tab2, tab3 = st.tabs(["表", "グラフ", "アドバイス"])
+    tab1, tab2, tab3, tab4 = st.tabs(["表", "グラフ", "アドバイス", "シナリオ比較"])
 
     with tab1:
         st.markdown(
@@ -1587,10 +949,23 @@ if df_long is not None and df_table is not None:
             '</div>',
             unsafe_allow_html=True
         )
-        df_view = df_view_for_display(df_table)
-        st.markdown(df_to_sticky_html(df_view), unsafe_allow_html=True)
+        # 表のHTMLは結果ごとに1回だけ作る（相談欄の入力などで再実行されても作り直さない）
+        res_key = st.session_state.get("inputs_hash", None)
+        res = st.session_state.get("result", None)
+        with timer.stage("table_html", cache_hit=("table_html", res_key) in get_result_cache()):
+            if res_key is None or res is None:
+                table_html = df_to_sticky_html(df_view_for_display(df_table))
+            else:
+                table_html = get_result_cache().get_or_compute(("table_html", res_key), lambda: result_to_sticky_html(res))
+            st.markdown(table_html, unsafe_allow_html=True)
+
+    pdf_key = st.session_state.get("pdf_key", None)
+    pdf_build = st.session_state.get("pdf_build", None)
+    if pdf_key is not None and pdf_build is not None:
+        get_pdf_jobs().start(pdf_key, pdf_build)
 
     with tab2:
+        timer.reset_lap()
         st.subheader("グラフ① 年間現金収支")
 
         line = (
@@ -1631,30 +1006,274 @@ if df_long is not None and df_table is not None:
 
         st.altair_chart((chart_bal + zero_line).properties(height=300), use_container_width=True)
 
+        inputs_shown = st.session_state.get("inputs", None)
+        if inputs_shown is not None and uses_monthly(inputs_shown):
+            st.subheader("グラフ②' 貯蓄残高（月ごと）")
+            mres = get_result_cache().get_or_compute(
+                ("monthly", st.session_state.get("inputs_hash", None)), lambda: calc_lifeplan_monthly(inputs_shown)
+            )
+            if mres["min_balance"] is not None:
+                st.caption(f"月末の貯蓄残高がいちばん少ないのは {mres['min_year']}年目の{mres['min_month']}月末で、{mres['min_balance']:,.1f}万円です（一時収入・一時支出はその年の1月に入れています）")
+            chart_bal_m = (
+                alt.Chart(mres["months"])
+                .mark_line()
+                .encode(
+                    x=alt.X("通し月:Q", title="月（通し）"),
+                    y=alt.Y("貯蓄残高(万円):Q", title="万円"),
+                    tooltip=[
+                        alt.Tooltip("年目:Q", title="年目"),
+                        alt.Tooltip("月:Q", title="月"),
+                        alt.Tooltip("貯蓄残高(万円):Q", title="万円"),
+                    ],
+                )
+            )
+            st.altair_chart((chart_bal_m + zero_line).properties(height=300), use_container_width=True)
+
+        res_shown = st.session_state.get("result", None)
+        if res_shown is not None and res_shown.row("運用益") is not None:
+            st.subheader("グラフ②'' 貯蓄残高の内訳（運用）")
+            st.caption(f"運用益の合計は {res_shown.row('運用益').sum():,.1f}万円です（年の初めの残高に期待利回りを付けた場合）")
+            df_bucket = pd.concat([
+                pd.DataFrame({"年目": res_shown.years, "口座": nm, "残高(万円)": res_shown.row(row)})
+                for nm, row in zip(BUCKETS, BUCKET_ROWS)
+            ], ignore_index=True)
+            chart_bucket = (
+                alt.Chart(df_bucket)
+                .mark_area(opacity=0.7)
+                .encode(
+                    x=alt.X("年目:Q", title="年目"),
+                    y=alt.Y("残高(万円):Q", title="万円", stack=True),
+                    color=alt.Color("口座:N", sort=BUCKETS),
+                    tooltip=[
+                        alt.Tooltip("年目:Q", title="年目"),
+                        alt.Tooltip("口座:N", title="口座"),
+                        alt.Tooltip("残高(万円):Q", title="万円"),
+                    ],
+                )
+            )
+            st.altair_chart((chart_bucket + zero_line).properties(height=300), use_container_width=True)
+
+        mc = st.session_state.get("mc_result", None)
+        if mc is not None and len(mc["bands"]) > 0:
+            st.subheader("グラフ③ 貯蓄残高のばらつき（モンテカルロ）")
+            st.caption(mc_summary_text(mc) + "　※帯は5%〜95%、線は中央値です")
+
+            band = (
+                alt.Chart(mc["bands"])
+                .mark_area(opacity=0.25)
+                .encode(
+                    x=alt.X("年目:Q", title="年目"),
+                    y=alt.Y("5%点(万円):Q", title="万円"),
+                    y2="95%点(万円):Q",
+                )
+            )
+            median = (
+                alt.Chart(mc["bands"])
+                .mark_line(point=True)
+                .encode(
+                    x=alt.X("年目:Q", title="年目"),
+                    y=alt.Y("中央値(万円):Q", title="万円"),
+                    tooltip=[
+                        alt.Tooltip("年目:Q", title="年目"),
+                        alt.Tooltip("5%点(万円):Q", title="5%点"),
+                        alt.Tooltip("中央値(万円):Q", title="中央値"),
+                        alt.Tooltip("95%点(万円):Q", title="95%点"),
+                        alt.Tooltip("マイナス確率(％):Q", title="マイナス確率(％)"),
+                    ],
+                )
+            )
+
+            st.altair_chart((band + median + zero_line).properties(height=300), use_container_width=True)
+        timer.lap("charts")
+
+        st.subheader("グラフ④ 寿命の組み合わせと貯蓄残高")
+        st.caption("夫・妻の死亡年齢をすべての組み合わせで計算し、貯蓄残高を色で表します（赤いほどマイナス）。")
+        inputs_now = st.session_state.get("inputs", None)
+        res_key_now = st.session_state.get("inputs_hash", None)
+        g1, g2, g3 = st.columns([1.0, 1.0, 2.0])
+        with g1:
+            lg_min = NI_INT("死亡年齢（下限）", "lg_min", 50, 120, 75, 1)
+        with g2:
+            lg_max = NI_INT("死亡年齢（上限）", "lg_max", 50, 120, 105, 1)
+        with g3:
+            lg_metric = st.radio("見る数字", ["最低残高", "最終残高"], key="lg_metric", horizontal=True)
+        if st.button("寿命の組み合わせを計算する", key="lg_btn", disabled=(inputs_now is None or res_key_now is None)):
+            st.session_state["longevity_key"] = (res_key_now, int(min(lg_min, lg_max)), int(max(lg_min, lg_max)))
+        lg_key = st.session_state.get("longevity_key", None)
+        if inputs_now is not None and lg_key is not None and lg_key[0] == res_key_now:
+            with timer.stage("longevity", cache_hit=("longevity",) + lg_key in get_result_cache()):
+                lg = get_result_cache().get_or_compute(
+                    ("longevity",) + lg_key,
+                    lambda: run_longevity_grid(inputs_now, die_min=lg_key[1], die_max=lg_key[2]),
+                )
+            grid = lg["grid"]
+            heat = (
+                alt.Chart(grid)
+                .mark_rect()
+                .encode(
+                    x=alt.X("妻の死亡年齢:O", title="妻の死亡年齢"),
+                    y=alt.Y("夫の死亡年齢:O", title="夫の死亡年齢", sort="descending"),
+                    color=alt.Color(
+                        f"{lg_metric}(万円):Q",
+                        title="万円",
+                        scale=alt.Scale(scheme="redblue", domainMid=0),
+                    ),
+                    tooltip=[
+                        alt.Tooltip("夫の死亡年齢:O", title="夫の死亡年齢"),
+                        alt.Tooltip("妻の死亡年齢:O", title="妻の死亡年齢"),
+                        alt.Tooltip("最低残高(万円):Q", title="最低残高（万円）", format=",.1f"),
+                        alt.Tooltip("最低残高の年目:Q", title="最低残高の年目"),
+                        alt.Tooltip("最終残高(万円):Q", title="最終残高（万円）", format=",.1f"),
+                    ],
+                )
+            )
+            # 今の入力の組み合わせに印を付ける
+            here = grid[(grid["夫の死亡年齢"] == int(inputs_now["h_die"])) & (grid["妻の死亡年齢"] == int(inputs_now["w_die"]))]
+            mark = (
+                alt.Chart(here)
+                .mark_point(shape="square", filled=False, color="#000000", size=120, strokeWidth=2)
+                .encode(x="妻の死亡年齢:O", y=alt.Y("夫の死亡年齢:O", sort="descending"))
+            )
+            st.altair_chart((heat + mark).properties(height=max(14 * len(lg["h_dies"]), 120)), use_container_width=True)
+            n_neg = int((lg["min_balance"] < 0).sum())
+            st.caption(
+                f"※{len(grid):,}通りのうち、途中で貯蓄残高がマイナスになるのは {n_neg:,}通りです。"
+                "四角の枠は今の入力の組み合わせです（年齢0の人の死亡年齢は振りません）。"
+            )
+
     with tab3:
+        # PDFと同じ文章（計算したときに作ったもの）を表示する。質問欄の入力などで再実行されても作り直さない
+        inputs = st.session_state.get("inputs", None)
+        if inputs is not None and res is not None and res_key is not None:
+            with timer.stage("advice", cache_hit=("advice", res_key) in get_result_cache()):
+                advice = get_advice(res_key, res, inputs)
+        else:
+            advice = {
+                "analytics": None,
+                "money": make_money_advice_soft(df_long, df_table, inputs),
+                "inheritance": make_inheritance_advice_soft(inputs, df_long),
+            }
+
         st.subheader("家計へのアドバイス")
         st.caption("（詳細なアドバイスは下記の質問欄からお進みください）")
-        for line in make_money_advice_soft(df_long, df_table):
+        for line in advice["money"]:
             st.write(line)
 
         st.divider()
 
         st.subheader("相続ワンポイントアドバイス")
         st.caption("（詳細なアドバイスは下記の質問欄からお進みください）")
-        inputs = st.session_state.get("inputs", None)
-        for line in make_inheritance_advice_soft(inputs, df_long):
+        for line in advice["inheritance"]:
             st.write(line)
 
         st.divider()
 
+        st.subheader("逆算（どこまでなら大丈夫？）")
+        st.caption("貯蓄残高が一度もマイナスにならない「生活費の上限」と「必要な初期貯蓄額」を探します（ほかの入力はそのまま）。")
+        if st.button("逆算する", key="goal_seek_btn", disabled=(inputs is None or res_key is None)):
+            st.session_state["goal_seek_key"] = res_key
+        if inputs is not None and res_key is not None and st.session_state.get("goal_seek_key") == res_key:
+            with timer.stage("goal_seek", cache_hit=("goal_seek", res_key) in get_result_cache()):
+                gs_scale, gs_sav = get_result_cache().get_or_compute(
+                    ("goal_seek", res_key),
+                    lambda: (solve_max_spending_scale(inputs), solve_min_start_savings(inputs)),
+                )
+            if gs_scale["scale"] is None:
+                st.write("・生活費を0にしても、介護費・一時支出だけで貯蓄残高がマイナスになります。")
+            elif gs_scale["capped"]:
+                st.write(f"・生活費を今の{gs_scale['scale'] * 100:,.0f}％にしても、貯蓄残高はマイナスになりません。")
+            else:
+                st.write(
+                    f"・生活費は今の **{gs_scale['scale'] * 100:,.1f}％** まで"
+                    f"（月額合計 {gs_scale['monthly_now']:,.1f}万円 → {gs_scale['monthly_at_scale']:,.1f}万円）なら、"
+                    "貯蓄残高はマイナスになりません。"
+                )
+            if gs_sav["start_savings"] <= 0:
+                st.write("・初期貯蓄が0でも、貯蓄残高はマイナスになりません。")
+            else:
+                st.write(
+                    f"・貯蓄残高がマイナスにならない初期貯蓄額は **{gs_sav['start_savings']:,.1f}万円** です"
+                    f"（今の入力 {gs_sav['current']:,.1f}万円との差 {gs_sav['gap']:+,.1f}万円）。"
+                )
+            st.caption("※生活費は8項目を同じ割合で増減（変更後月額も同じ割合）。介護費・一時支出は変えていません。")
+
+        st.divider()
+
+        st.subheader("どの入力が効いている？（感度分析）")
+        st.caption("入力を1つずつ上げ下げしたとき、貯蓄残高がどれだけ変わるかを大きい順に並べます（トルネード図）。")
+        s1, s2, s3, s4 = st.columns([1.0, 1.0, 1.0, 1.0])
+        with s1:
+            sens_amount = NI_FLOAT("金額の増減(±％)", "sens_amount", 1.0, 50.0, 10.0, 1.0)
+        with s2:
+            sens_rate = NI_FLOAT("上昇率の増減(±ポイント)", "sens_rate", 0.1, 5.0, 1.0, 0.1)
+        with s3:
+            sens_years = NI_INT("年齢・年数の増減(±年)", "sens_years", 1, 10, 1, 1)
+        with s4:
+            sens_metric = st.radio("見る数字", ["最低残高", "最終残高"], key="sens_metric", horizontal=True)
+        sens_settings = (float(sens_amount), float(sens_rate), int(sens_years))
+        if st.button("感度を調べる", key="sens_btn", disabled=(inputs is None or res_key is None)):
+            st.session_state["sens_key"] = (res_key, sens_settings)
+        sens_key = st.session_state.get("sens_key", None)
+        if inputs is not None and res_key is not None and sens_key is not None and sens_key[0] == res_key:
+            with timer.stage("sensitivity", cache_hit=("sensitivity",) + sens_key in get_result_cache()):
+                sens = get_result_cache().get_or_compute(
+                    ("sensitivity",) + sens_key,
+                    lambda: run_sensitivity(inputs, amount_pct=sens_key[1][0], rate_pt=sens_key[1][1], years=sens_key[1][2]),
+                )
+            top = sens["table"].sort_values(f"振れ幅({sens_metric})", ascending=False, kind="stable").head(SENS_TOP_N)
+            top = top[top[f"振れ幅({sens_metric})"] > 0]
+            if len(top) == 0:
+                st.write("・上げ下げしても貯蓄残高が変わる入力はありませんでした。")
+            else:
+                tornado = pd.DataFrame({
+                    "項目": list(top["項目"]) * 2,
+                    "ケース": ["下げたとき"] * len(top) + ["上げたとき"] * len(top),
+                    "差(万円)": list(top[f"{sens_metric}の差(下げ)"]) + list(top[f"{sens_metric}の差(上げ)"]),
+                    "値": list(top["下げた値"]) + list(top["上げた値"]),
+                })
+                bars = (
+                    alt.Chart(tornado)
+                    .mark_bar()
+                    .encode(
+                        y=alt.Y("項目:N", sort=list(top["項目"]), title=None),
+                        x=alt.X("差(万円):Q", title=f"{sens_metric}の変化（万円）"),
+                        color=alt.Color(
+                            "ケース:N",
+                            scale=alt.Scale(domain=["下げたとき", "上げたとき"], range=["#4c78a8", "#f58518"]),
+                            legend=alt.Legend(title=None, orient="top"),
+                        ),
+                        tooltip=[
+                            alt.Tooltip("項目:N", title="項目"),
+                            alt.Tooltip("ケース:N", title="ケース"),
+                            alt.Tooltip("値:Q", title="入力値", format=",.1f"),
+                            alt.Tooltip("差(万円):Q", title="変化（万円）", format=",.1f"),
+                        ],
+                    )
+                )
+                zero_rule = (
+                    alt.Chart(pd.DataFrame({"x": [0]}))
+                    .mark_rule(color="#ff0000", size=2, strokeDash=[6, 3])
+                    .encode(x="x:Q")
+                )
+                st.altair_chart((bars + zero_rule).properties(height=26 * len(top) + 40), use_container_width=True)
+                base_v = sens["base_min"] if sens_metric == "最低残高" else sens["base_final"]
+                st.caption(
+                    f"※今の入力での{sens_metric}は {base_v:,.1f}万円。金額は±{sens_key[1][0]:g}％、上昇率は±{sens_key[1][1]:g}ポイント、"
+                    f"年齢・年数は±{sens_key[1][2]}年、単身期の割合は±10ポイント動かしています（影響の大きい{SENS_TOP_N}項目まで）。"
+                )
+
+        st.divider()
+
         st.subheader("相談の入口（ここから追加質問できます）")
         st.caption("下のテンプレをコピーして、このままChatGPTに貼ると、続きの相談がしやすくなります。")
 
-        inputs = st.session_state.get("inputs", None)
-
+        analytics = advice["analytics"]
         if inputs is not None:
-            min_bal = float(df_long["貯蓄残高(万円)"].min())
-            deficit_count = int((df_long["年間現金収支(万円)"] < 0).sum())
+            if analytics is not None:
+                min_bal, deficit_count = analytics["min_balance"], analytics["deficit_count"]
+            else:
+                min_bal = float(df_long["貯蓄残高(万円)"].min())
+                deficit_count = int((df_long["年間現金収支(万円)"] < 0).sum())
 
             template = f"""【シニア夫婦LPS：相談テンプレ】
 - 夫: 現在{inputs['h_now']}歳 / 想定死亡{inputs['h_die']}歳
@@ -1692,20 +1311,132 @@ if df_long is not None and df_table is not None:
 
         st.caption("※アプリからChatGPTへ“自動送信”はしません（安全のため）。上の文章をコピーして貼るだけでOKです。")
 
+    with tab4:
+        st.subheader("シナリオ比較")
+        st.caption("今の計算結果に名前を付けて保存し、入力を変えて計算したものと並べて比べます（保存した結果は計算し直しません）。")
+        scenarios = st.session_state["scenarios"]
+
+        s1, s2 = st.columns([2, 1])
+        with s1:
+            scn_name = st.text_input("シナリオ名", value="今のまま" if not scenarios else f"シナリオ{len(scenarios) + 1}", key="scn_name")
+        with s2:
+            st.write("")
+            if st.button("今の結果を保存", key="scn_save", disabled=(res is None or res_key is None or not scn_name.strip())):
+                # 同じ名前なら上書き（並び順は最後に）
+                scenarios.pop(scn_name.strip(), None)
+                scenarios[scn_name.strip()] = {"key": res_key, "result": res}
+                while len(scenarios) > SCENARIO_MAX:
+                    scenarios.pop(next(iter(scenarios)))
+                st.rerun()
+
+        if len(scenarios) < 2:
+            st.info("2つ以上保存すると、ここに比較が出ます（例：「今のまま」を保存 → 生活費を1割減らして計算 →「生活費を1割削減」で保存）。")
+        if scenarios:
+            names = list(scenarios)
+            picked = st.multiselect("比べるシナリオ", names, default=names)
+            base_name = st.selectbox("基準（差はこのシナリオとの差）", picked or names, index=0)
+            d1, d2 = st.columns([2, 1])
+            with d1:
+                drop_name = st.selectbox("削除するシナリオ", names, key="scn_drop")
+            with d2:
+                st.write("")
+                if st.button("削除", key="scn_drop_btn"):
+                    scenarios.pop(drop_name, None)
+                    st.rerun()
+
+            if len(picked) >= 2:
+                # 比較の表・グラフ用の表も、同じ組み合わせなら作り直さない
+                cmp_key = ("compare", tuple((nm, scenarios[nm]["key"]) for nm in picked), base_name)
+                cmp = get_result_cache().get_or_compute(
+                    cmp_key, lambda: compare_scenarios({nm: scenarios[nm]["result"] for nm in picked}, base=base_name)
+                )
+
+                lines_chart = (
+                    alt.Chart(cmp["lines"])
+                    .mark_line(point=True)
+                    .encode(
+                        x=alt.X("年目:Q", title="年目"),
+                        y=alt.Y("貯蓄残高(万円):Q", title="万円"),
+                        color=alt.Color("シナリオ:N", sort=picked, title="シナリオ"),
+                        tooltip=[
+                            alt.Tooltip("シナリオ:N", title="シナリオ"),
+                            alt.Tooltip("年目:Q", title="年目"),
+                            alt.Tooltip("貯蓄残高(万円):Q", title="万円"),
+                        ],
+                    )
+                )
+                zero_rule = (
+                    alt.Chart(pd.DataFrame({"y": [0]}))
+                    .mark_rule(color="#ff0000", size=2, strokeDash=[6, 3])
+                    .encode(y="y:Q")
+                )
+                st.markdown("**貯蓄残高（重ねて表示）**")
+                st.altair_chart((lines_chart + zero_rule).properties(height=320), use_container_width=True)
+
+                st.markdown(f"**まとめ（差は「{cmp['base']}」との差）**")
+                for _, row in cmp["summary"].iterrows():
+                    if row["シナリオ"] == cmp["base"]:
+                        continue
+                    st.write(
+                        f"・「{row['シナリオ']}」は最低貯蓄残高が {row['最低貯蓄残高(万円)の差']:+,.1f}万円、"
+                        f"最終貯蓄残高が {row['最終貯蓄残高(万円)の差']:+,.1f}万円、"
+                        f"赤字の年数が {int(row['赤字の年数の差']):+d}年 変わります。"
+                    )
+                st.dataframe(cmp["summary"], hide_index=True, use_container_width=True)
+
+                st.markdown("**年ごとの貯蓄残高と差（万円）**")
+                st.dataframe(cmp["diff"], hide_index=True, use_container_width=True)
+            elif len(scenarios) >= 2:
+                st.caption("比べるシナリオを2つ以上選んでください。")
+
     l, c, r = st.columns([1, 2, 1])
     with c:
+        if pdf_key is not None and pdf_build is not None:
+            pdf_data = lambda: get_pdf_jobs().result(pdf_key, pdf_build)
+        else:
+            pdf_data = b""
         st.download_button(
             label="PDFで保存",
-            data=st.session_state.get("pdf_bytes", b""),
+            data=pdf_data,
             file_name="lifeplan_result.pdf",
             mime="application/pdf",
             use_container_width=True,
             type="primary",
+            disabled=(pdf_key is None),
         )
+        saved_inputs = st.session_state.get("inputs", None)
+        if saved_inputs is not None:
+            st.download_button(
+                label="入力をJSONで保存",
+                data=inputs_to_json(saved_inputs),
+                file_name="lifeplan_inputs.json",
+                mime="application/json",
+                use_container_width=True,
+            )
+            st.caption("このページのURL（末尾の ?plan=...）をブックマーク・共有しても、同じ入力で開けます。")
 
 else:
     st.info("まだ計算していません。入力後、中央の「計算」ボタンを押してください。")
 
+# ===== 処理時間（LIFEPLAN_TIMING=1 のときだけ）=====
+if timer.enabled:
+    with st.expander("⏱ 処理時間（計測モード）", expanded=False):
+        st.caption(f"今回の実行（{timer.run}・{timer.run_id}）の合計 {timer.total_ms():,.1f} ms。同じ内容を標準エラーに JSON 1行ずつ出しています。")
+        if timer.stages:
+            st.dataframe(
+                pd.DataFrame([{"段階": r["stage"], "ミリ秒": r["ms"], "キャッシュ": r.get("cache_hit", "")} for r in timer.stages]),
+                hide_index=True, use_container_width=True,
+            )
+        last_pdf_key = st.session_state.get("pdf_key", None)
+        pdf_stages = get_result_cache().get(("pdf_timing",) + tuple(last_pdf_key[1:])) if last_pdf_key else None
+        if pdf_stages:
+            st.markdown("**PDF（裏で作成）**")
+            st.dataframe(pd.DataFrame([{"段階": r["stage"], "ミリ秒": r["ms"]} for r in pdf_stages]), hide_index=True, use_container_width=True)
+        else:
+            st.caption("PDFはまだ作成中か、以前に作ったものをキャッシュから返しています（再実行すると出ます）。")
+        st.markdown("**日本語フォント**")
+        set_japanese_font_for_matplotlib(debug=True)
+
 # ===== フッター（著作権表示）=====
 st.markdown(
     "<hr><div style='text-align:center; color:#888; font-size:0.85em;'>"
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# リポジトリの直下から lifeplan を、tests から reference / households を読む
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
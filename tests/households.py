@@ -0,0 +1,70 @@
+"""
+テスト用の世帯（画面の「計算」で作る inputs と同じ形）を乱数で作る
+"""
+import random
+
+from lifeplan.engine import ITEMS, lumps_to_map
+
+
+LUMP_KEYS = [("h_lump_map", "h_lumps"), ("w_lump_map", "w_lumps"), ("h_spend_map", "h_spends"), ("w_spend_map", "w_spends")]
+
+
+def random_inputs(r: random.Random) -> dict:
+    """年齢・収入・生活費・介護費・一時収入/支出を広い範囲で振った1世帯（おひとりさま入力の年齢0も混ぜる）"""
+    h_now, w_now = r.randint(0, 80), r.randint(0, 80)
+    h_die, w_die = r.randint(h_now, 110), r.randint(w_now, 110)
+    if r.random() < 0.1:
+        h_now = h_die = 0
+
+    def lumps():
+        return [(r.random() < 0.7, r.randint(0, 110), round(r.uniform(0, 2000), 1)) for _ in range(3)]
+
+    d = {
+        "h_now": h_now, "h_die": h_die, "w_now": w_now, "w_die": w_die,
+        "start_savings": round(r.uniform(0, 5000), 1),
+        "h_inc_now": round(r.uniform(0, 800), 1), "h_g1": round(r.uniform(-5, 5), 1), "h_ch_age": r.choice([0, r.randint(0, 90)]),
+        "h_inc_after": round(r.uniform(0, 300), 1), "h_g2": round(r.uniform(-5, 5), 1),
+        "w_inc_now": round(r.uniform(0, 800), 1), "w_g1": round(r.uniform(-5, 5), 1), "w_ch_age": r.choice([0, r.randint(0, 90)]),
+        "w_inc_after": round(r.uniform(0, 300), 1), "w_g2": round(r.uniform(-5, 5), 1),
+        "living_params": {
+            nm: dict(m=round(r.uniform(0, 15), 1), g=round(r.uniform(-3, 6), 1), after_years=r.randint(0, 30),
+                     m2=round(r.uniform(0, 15), 1), g2=round(r.uniform(-3, 6), 1))
+            for nm in ITEMS
+        },
+        "single_ratio_pct": r.randint(0, 200),
+        "h_care_start": r.choice([0, r.randint(0, 110)]), "h_care_m": round(r.uniform(0, 50), 1), "h_care_g": round(r.uniform(-3, 6), 1),
+        "w_care_start": r.choice([0, r.randint(0, 110)]), "w_care_m": round(r.uniform(0, 50), 1), "w_care_g": round(r.uniform(-3, 6), 1),
+        "h_lumps": lumps(), "w_lumps": lumps(), "h_spends": lumps(), "w_spends": lumps(),
+    }
+    for key, src in LUMP_KEYS:
+        d[key] = lumps_to_map(d[src])
+    return d
+
+
+def random_households(n: int, seed: int = 0) -> list:
+    r = random.Random(seed)
+    return [random_inputs(r) for _ in range(n)]
+
+
+def random_invest(r: random.Random) -> dict:
+    """inputs["invest"]（lifeplan.invest.INVEST_DEFAULT と同じ形）を振る"""
+    order = [0, 1, 2]
+    r.shuffle(order)
+    return {
+        "alloc": [round(r.uniform(1, 100), 1) for _ in range(3)],
+        "ret": [round(r.uniform(-2, 6), 1) for _ in range(3)],
+        "sd": [round(r.uniform(0, 20), 1) for _ in range(3)],
+        "order": order,
+        "rebalance": r.random() < 0.5,
+    }
+
+
+def same_frame(x, y) -> bool:
+    """DataFrame が値・型（int / float / 空文字）・行と列の並びまで同じか"""
+    if list(x.index) != list(y.index) or list(x.columns) != list(y.columns):
+        return False
+    for c in x.columns:
+        for u, v in zip(x[c].tolist(), y[c].tolist()):
+            if type(u) != type(v) or u != v:
+                return False
+    return True
@@ -0,0 +1,214 @@
+"""
+元のスカラー版 calc_lifeplan（1年ずつ Python のループで計算する。ベクトル化する前の lifeplan_senior.py のまま）
+テストで lifeplan.engine の結果と比べるためだけに使う
+"""
+import pandas as pd
+
+
+ITEMS = ["食費", "水道光熱費", "通信費", "交通費", "趣味・交際費", "医療費", "住宅の固定資産税・管理費等", "その他"]
+
+
+def lumps_to_map(lumps):
+    mp = {}
+    for use, age, amt in lumps:
+        if use and age > 0 and amt > 0:
+            mp[age] = mp.get(age, 0.0) + float(amt)
+    return mp
+
+
+# =========================
+# 単身期開始（年目）
+# =========================
+def get_single_start_year_after(h_now, h_die, w_now, w_die):
+    h_death_y = (h_die - h_now + 1) if h_die >= h_now else None
+    w_death_y = (w_die - w_now + 1) if w_die >= w_now else None
+    ys = [y for y in [h_death_y, w_death_y] if y is not None]
+    if not ys:
+        return None
+    return min(ys) + 1
+
+
+# =========================
+# 年次計算（単身期：夫婦期最終年の生活費×割合）
+# =========================
+def calc_lifeplan(inputs: dict):
+    h_now = int(inputs["h_now"]); h_die = int(inputs["h_die"])
+    w_now = int(inputs["w_now"]); w_die = int(inputs["w_die"])
+    start_savings = float(inputs["start_savings"])
+
+    years_len = max(h_die - h_now, w_die - w_now) + 1
+    year_labels = [str(i + 1) for i in range(years_len)]
+
+    living_params = inputs["living_params"]
+    h_lump_map = inputs["h_lump_map"]
+    w_lump_map = inputs["w_lump_map"]
+    h_spend_map = inputs["h_spend_map"]
+    w_spend_map = inputs["w_spend_map"]
+
+    single_ratio_pct = float(inputs.get("single_ratio_pct", 100.0))
+    single_ratio = max(min(single_ratio_pct / 100.0, 2.0), 0.0)
+    single_start_y = get_single_start_year_after(h_now, h_die, w_now, w_die)
+
+    def income_base_by_age(age, now_age, die_age, inc1, g1, ch_age, inc2, g2):
+        if age < now_age or age > die_age:
+            return 0.0
+        if ch_age and age >= int(ch_age):
+            yy = age - int(ch_age)
+            return float(inc2) * ((1.0 + float(g2)/100.0) ** yy)
+        yy = age - int(now_age)
+        return float(inc1) * ((1.0 + float(g1)/100.0) ** yy)
+
+    def living_monthly_by_t(t, p):
+        t = int(t)
+        after = int(p["after_years"])
+        if after > 0 and t >= after:
+            dt = t - after
+            mm = float(p["m2"]) * ((1.0 + float(p["g2"])/100.0) ** dt)
+        else:
+            mm = float(p["m"]) * ((1.0 + float(p["g"])/100.0) ** t)
+        return float(mm)
+
+    def care_annual_by_age(age, now_age, die_age, start_age, monthly, g):
+        if age < now_age or age > die_age:
+            return 0.0
+        if start_age and age >= int(start_age):
+            yy = age - int(start_age)
+            mm = float(monthly) * ((1.0 + float(g)/100.0) ** yy)
+            return round(float(mm) * 12.0, 1)
+        return 0.0
+
+    couple_last_t = None
+    if single_start_y is not None and 1 <= int(single_start_y) <= years_len:
+        couple_last_t = int(single_start_y) - 2
+
+    couple_last_monthly = {}
+    if couple_last_t is not None and couple_last_t >= 0:
+        for nm in ITEMS:
+            couple_last_monthly[nm] = living_monthly_by_t(couple_last_t, living_params[nm])
+
+    def living_item_annual_by_t(t, p, name):
+        t = int(t)
+        year_idx = t + 1
+        if single_start_y is not None and year_idx >= int(single_start_y) and couple_last_t is not None and couple_last_t >= 0:
+            base_mm = float(couple_last_monthly.get(name, living_monthly_by_t(couple_last_t, p)))
+            dt = year_idx - int(single_start_y)
+            mm = base_mm * single_ratio * ((1.0 + float(p["g2"])/100.0) ** dt)
+            return round(float(mm) * 12.0, 1)
+
+        mm = living_monthly_by_t(t, p)
+        return round(float(mm) * 12.0, 1)
+
+    rows_table, idx_table = [], []
+    blank_counter = 0
+    def add_blank():
+        nonlocal blank_counter
+        blank_counter += 1
+        idx_table.append(f"__blank{blank_counter}__")
+        rows_table.append([""] * years_len)
+
+    h_age_row, w_age_row = [], []
+    for t in range(years_len):
+        ah, aw = h_now + t, w_now + t
+        h_age_row.append(ah if ah <= h_die else "")
+        w_age_row.append(aw if aw <= w_die else "")
+    idx_table += ["夫年齢", "妻年齢"]
+    rows_table += [h_age_row, w_age_row]
+
+    single_row = [""] * years_len
+    if single_start_y is not None and 1 <= int(single_start_y) <= years_len:
+        single_row[int(single_start_y) - 1] = "←ここから単身期"
+    idx_table.append("単身期開始")
+    rows_table.append(single_row)
+
+    h_inc_row, w_inc_row = [], []
+    h_lump_row, w_lump_row = [], []
+    income_total_row = []
+    for t in range(years_len):
+        ah, aw = h_now + t, w_now + t
+        h_alive = (ah <= h_die)
+        w_alive = (aw <= w_die)
+
+        h_base = income_base_by_age(
+            ah, h_now, h_die,
+            inputs["h_inc_now"], inputs["h_g1"], inputs["h_ch_age"],
+            inputs["h_inc_after"], inputs["h_g2"]
+        ) if h_alive else 0.0
+
+        w_base = income_base_by_age(
+            aw, w_now, w_die,
+            inputs["w_inc_now"], inputs["w_g1"], inputs["w_ch_age"],
+            inputs["w_inc_after"], inputs["w_g2"]
+        ) if w_alive else 0.0
+
+        hl = float(h_lump_map.get(ah, 0.0)) if h_alive else 0.0
+        wl = float(w_lump_map.get(aw, 0.0)) if w_alive else 0.0
+
+        h_inc_row.append(round(h_base, 1))
+        w_inc_row.append(round(w_base, 1))
+        h_lump_row.append(round(hl, 1))
+        w_lump_row.append(round(wl, 1))
+        income_total_row.append(round(h_base + w_base + hl + wl, 1))
+
+    idx_table += ["夫年収(手取り)", "妻年収(手取り)", "一時収入 夫", "一時収入 妻", "収入合計"]
+    rows_table += [h_inc_row, w_inc_row, h_lump_row, w_lump_row, income_total_row]
+
+    add_blank()
+
+    living_item_rows = {nm: [] for nm in ITEMS}
+    for t in range(years_len):
+        for nm in ITEMS:
+            living_item_rows[nm].append(float(living_item_annual_by_t(t, living_params[nm], nm)))
+
+    for nm in ITEMS:
+        idx_table.append(nm)
+        rows_table.append(living_item_rows[nm])
+
+    care_h_row, care_w_row = [], []
+    for t in range(years_len):
+        ah, aw = h_now + t, w_now + t
+        care_h = care_annual_by_age(ah, h_now, h_die, inputs["h_care_start"], inputs["h_care_m"], inputs["h_care_g"]) if ah <= h_die else 0.0
+        care_w = care_annual_by_age(aw, w_now, w_die, inputs["w_care_start"], inputs["w_care_m"], inputs["w_care_g"]) if aw <= w_die else 0.0
+        care_h_row.append(round(float(care_h), 1))
+        care_w_row.append(round(float(care_w), 1))
+    idx_table += ["介護費 夫", "介護費 妻"]
+    rows_table += [care_h_row, care_w_row]
+
+    spend_h_row, spend_w_row = [], []
+    for t in range(years_len):
+        ah, aw = h_now + t, w_now + t
+        spend_h_row.append(round(float(h_spend_map.get(ah, 0.0)) if ah <= h_die else 0.0, 1))
+        spend_w_row.append(round(float(w_spend_map.get(aw, 0.0)) if aw <= w_die else 0.0, 1))
+    idx_table += ["一時支出 夫", "一時支出 妻"]
+    rows_table += [spend_h_row, spend_w_row]
+
+    expense_total_row, cashflow_row, balance_row = [], [], []
+    bal = start_savings
+    for t in range(years_len):
+        living_total = sum(living_item_rows[nm][t] for nm in ITEMS)
+        care_total = care_h_row[t] + care_w_row[t]
+        spend_total = spend_h_row[t] + spend_w_row[t]
+        expense_total = living_total + care_total + spend_total
+
+        cashflow = income_total_row[t] - expense_total
+        bal += cashflow
+
+        expense_total_row.append(round(float(expense_total), 1))
+        cashflow_row.append(round(float(cashflow), 1))
+        balance_row.append(round(float(bal), 1))
+
+    idx_table.append("支出合計")
+    rows_table.append(expense_total_row)
+
+    add_blank()
+
+    idx_table += ["現金収支", "貯蓄残高"]
+    rows_table += [cashflow_row, balance_row]
+
+    df_table = pd.DataFrame(rows_table, index=idx_table, columns=year_labels)
+
+    df_long = pd.DataFrame({
+        "年目": list(range(1, years_len + 1)),
+        "年間現金収支(万円)": cashflow_row,
+        "貯蓄残高(万円)": balance_row,
+    })
+    return df_long, df_table
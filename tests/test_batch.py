@@ -0,0 +1,88 @@
+import csv
+import json
+
+import pandas as pd
+
+from households import random_households
+from lifeplan.batch import main, run_batch
+from lifeplan.engine import ITEMS, LIVING_KEYS
+
+
+def _records(n: int, seed: int) -> list:
+    # 画面と同じ形のリスト（h_lumps など）で書く。{年齢: 金額} の *_map は書かない
+    return [dict({k: v for k, v in d.items() if not k.endswith("_map")}, id=f"hh{i}")
+            for i, d in enumerate(random_households(n, seed=seed))]
+
+
+def _write_jsonl(path, recs, extra_lines=()):
+    lines = [json.dumps(r, ensure_ascii=False) for r in recs]
+    for pos, text in extra_lines:
+        lines.insert(pos, text)
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _write_csv(path, recs):
+    # 生活費は列 "living_食費_m" など、一時収入/支出のリストは JSON のセル
+    rows = []
+    for r in recs:
+        row = {k: v for k, v in r.items() if k != "living_params"}
+        for nm in ITEMS:
+            for k in LIVING_KEYS:
+                row[f"living_{nm}_{k}"] = r["living_params"][nm][k]
+        for k in ["h_lumps", "w_lumps", "h_spends", "w_spends"]:
+            row[k] = json.dumps(r[k])
+        rows.append(row)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0]))
+        w.writeheader()
+        w.writerows(rows)
+
+
+# =========================
+# CLI（python -m lifeplan.batch）
+# =========================
+def test_csv_and_jsonl_give_same_output(tmp_path):
+    recs = _records(30, seed=61)
+    _write_jsonl(tmp_path / "h.jsonl", recs)
+    _write_csv(tmp_path / "h.csv", recs)
+    assert main([str(tmp_path / "h.jsonl"), "-o", str(tmp_path / "a.csv")]) == 0
+    assert main([str(tmp_path / "h.csv"), "-o", str(tmp_path / "b.csv")]) == 0
+    a, b = pd.read_csv(tmp_path / "a.csv"), pd.read_csv(tmp_path / "b.csv")
+    assert a.equals(b)
+    assert list(a["id"].unique()) == [r["id"] for r in recs]
+
+
+def test_summary_only_and_workers(tmp_path):
+    recs = _records(50, seed=62)
+    _write_jsonl(tmp_path / "h.jsonl", recs)
+    out = {}
+    for name, args in [
+        ("one", []),
+        ("two", ["--workers", "2"]),
+        ("sum1", ["--summary-only"]),
+        ("sum2", ["--summary-only", "--workers", "2"]),
+    ]:
+        assert main([str(tmp_path / "h.jsonl"), "-o", str(tmp_path / f"{name}.csv"), "--chunk-size", "7"] + args) == 0
+        out[name] = (tmp_path / f"{name}.csv").read_bytes()
+    assert out["one"] == out["two"]
+    assert out["sum1"] == out["sum2"]
+    summary = pd.read_csv(tmp_path / "sum1.csv", dtype={"id": str})
+    assert list(summary["id"]) == [r["id"] for r in recs]
+    years = pd.read_csv(tmp_path / "one.csv", dtype={"id": str})
+    assert (years.groupby("id", sort=False).size().reindex(summary["id"]).to_numpy() == summary["年数"].to_numpy()).all()
+
+
+# =========================
+# 読めない行・おかしい値はその世帯だけスキップ
+# =========================
+def test_bad_lines_are_skipped(tmp_path):
+    recs = _records(5, seed=63)
+    recs[2]["h_now"] = "abc"
+    _write_jsonl(tmp_path / "h.jsonl", recs, extra_lines=[(1, '{"h_now": 60,'), (4, "[1, 2]")])
+    log_path = tmp_path / "log.txt"
+    with open(log_path, "w", encoding="utf-8") as log:
+        stats = run_batch(str(tmp_path / "h.jsonl"), str(tmp_path / "out.csv"), summary_only=True, log=log)
+    assert stats["households"] == 4 and stats["errors"] == 3
+    text = log_path.read_text(encoding="utf-8")
+    assert "2行目" in text and "5行目" in text and "hh2" in text
+    assert list(pd.read_csv(tmp_path / "out.csv")["id"]) == ["hh0", "hh1", "hh3", "hh4"]
@@ -0,0 +1,74 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+import lifeplan.bulkpdf as bulkpdf
+from households import random_households
+from lifeplan.bulkpdf import run_pdf_export
+
+pytest.importorskip("reportlab")
+pytest.importorskip("matplotlib")
+
+
+def _write_jsonl(path, ids, seed):
+    recs = [dict({k: v for k, v in d.items() if not k.endswith("_map")}, id=i)
+            for i, d in zip(ids, random_households(len(ids), seed=seed))]
+    path.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in recs) + "\n", encoding="utf-8")
+    return recs
+
+
+# =========================
+# ZIP のエントリ名・並び・件数
+# =========================
+def test_zip_entries_in_input_order(tmp_path):
+    _write_jsonl(tmp_path / "h.jsonl", ["山田/1", "b", "b"], seed=71)
+    log = io.StringIO()
+    stats = run_pdf_export(str(tmp_path / "h.jsonl"), str(tmp_path / "out.zip"), workers=1, chunk_size=2, log=log)
+    with zipfile.ZipFile(tmp_path / "out.zip") as zf:
+        names = zf.namelist()
+        sizes = [len(zf.read(n)) for n in names]
+        assert all(zf.read(n).startswith(b"%PDF") for n in names)
+    assert names == ["山田_1.pdf", "b.pdf", "b_2.pdf"]
+    assert stats["reports"] == 3 and stats["errors"] == 0 and stats["bytes"] == sum(sizes)
+    assert log.getvalue() == ""
+
+
+# =========================
+# 1通の失敗はその世帯だけスキップ（ZIP は最後まで書く）
+# =========================
+def test_failed_reports_are_skipped(tmp_path, monkeypatch):
+    recs = _write_jsonl(tmp_path / "h.jsonl", ["a", "b", "c"], seed=72)
+    with open(tmp_path / "h.jsonl", "a", encoding="utf-8") as f:
+        f.write("{broken\n")
+        f.write(json.dumps(dict(recs[0], id="d", h_now="abc")) + "\n")
+    build_report = bulkpdf.build_report
+
+    def flaky(inputs):
+        if inputs["start_savings"] == recs[1]["start_savings"]:
+            raise OSError("フォントを読めません")
+        return build_report(inputs)
+
+    monkeypatch.setattr(bulkpdf, "build_report", flaky)
+    log = io.StringIO()
+    stats = run_pdf_export(str(tmp_path / "h.jsonl"), str(tmp_path / "out.zip"), workers=1, log=log)
+    with zipfile.ZipFile(tmp_path / "out.zip") as zf:
+        assert zf.namelist() == ["a.pdf", "c.pdf"]
+    assert stats["reports"] == 2 and stats["errors"] == 3
+    text = log.getvalue()
+    assert "スキップ b: PDF を作れませんでした（OSError" in text
+    assert "4行目" in text and "スキップ d:" in text
+
+
+# =========================
+# ASCII85 を止めるのは PDF を作っている間だけ（reportlab の設定を変えたままにしない）
+# =========================
+def test_report_restores_rl_config():
+    from reportlab import rl_config
+
+    inputs = random_households(1, seed=73)[0]
+    before = rl_config.useA85
+    data = bulkpdf.build_report(inputs)
+    assert rl_config.useA85 == before
+    assert b"ASCII85Decode" not in data
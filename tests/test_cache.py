@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from lifeplan.cache import ResultCache
+
+
+def _wait_until(cond, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < end
+        time.sleep(0.001)
+
+
+def test_get_or_compute_is_single_flight():
+    cache = ResultCache(1 << 20)
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5.0)
+        return {"value": 42}
+
+    n = 8
+    out = [None] * n
+
+    def worker(i):
+        out[i] = cache.get_or_compute("k", fn)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for th in threads:
+        th.start()
+    # 1つが計算中で、残りはその結果を待っている
+    _wait_until(lambda: cache.stats()["misses"] + cache.stats()["hits"] == n)
+    release.set()
+    for th in threads:
+        th.join(5.0)
+    assert len(calls) == 1
+    assert all(v is out[0] for v in out)
+    assert cache.get("k") is out[0]
+
+
+def test_get_or_compute_error_reaches_waiters_and_is_not_cached():
+    cache = ResultCache(1 << 20)
+    release = threading.Event()
+
+    def fail():
+        release.wait(5.0)
+        raise ValueError("失敗")
+
+    errors = []
+
+    def worker():
+        try:
+            cache.get_or_compute("k", fail)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for th in threads:
+        th.start()
+    _wait_until(lambda: cache.stats()["misses"] + cache.stats()["hits"] == 4)
+    release.set()
+    for th in threads:
+        th.join(5.0)
+    assert len(errors) == 4
+    assert "k" not in cache
+    # 次の呼び出しは計算し直す
+    assert cache.get_or_compute("k", lambda: 1) == 1
+    with pytest.raises(KeyError):
+        cache.get_or_compute("x", lambda: {}["x"])
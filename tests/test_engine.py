@@ -0,0 +1,14 @@
+import reference
+from households import random_households, same_frame
+from lifeplan.engine import calc_lifeplan
+
+
+# =========================
+# ベクトル化した calc_lifeplan = 元のスカラー版
+# =========================
+def test_calc_lifeplan_matches_scalar_reference():
+    for d in random_households(400, seed=1):
+        l1, t1 = reference.calc_lifeplan(d)
+        l2, t2 = calc_lifeplan(d)
+        assert same_frame(l1, l2)
+        assert same_frame(t1, t2)
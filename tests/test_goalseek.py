@@ -0,0 +1,87 @@
+import copy
+
+import numpy as np
+
+from households import random_households
+from lifeplan.engine import ITEMS, calc_lifeplan_rows
+from lifeplan.goalseek import SCALE_MAX, solve_max_spending_scale, solve_min_start_savings
+
+
+def _min_balance(d: dict) -> float:
+    rows = calc_lifeplan_rows(d)
+    return float(rows["貯蓄残高"].min()) if rows["years_len"] else 0.0
+
+
+def _scaled(d: dict, scale: float) -> dict:
+    # 生活費8項目の月額（夫婦期・変更後）を scale 倍にした inputs
+    d = copy.deepcopy(d)
+    for nm in ITEMS:
+        p = d["living_params"][nm]
+        p["m"], p["m2"] = float(np.float64(p["m"]) * scale), float(np.float64(p["m2"]) * scale)
+    return d
+
+
+# =========================
+# 生活費の上限（倍率）
+# =========================
+def test_max_spending_scale_is_largest_feasible():
+    checked = 0
+    for d in random_households(150, seed=21):
+        out = solve_max_spending_scale(d)
+        if out["scale"] is None or out["capped"]:
+            continue
+        scale = out["scale"]
+        assert _min_balance(_scaled(d, scale)) >= 0
+        assert _min_balance(_scaled(d, round(scale + 0.001, 3))) < 0
+        assert out["min_balance"] == _min_balance(_scaled(d, scale))
+        checked += 1
+    assert checked > 20
+
+
+def test_max_spending_scale_matches_grid():
+    # 0.1％ 刻みの全部の点を計算した結果と同じ
+    d = random_households(1, seed=22)[0]
+    d.update(h_now=65, h_die=90, w_now=63, w_die=92, start_savings=2000.0, h_inc_now=300.0, w_inc_now=100.0,
+             h_ch_age=0, w_ch_age=0, h_care_start=0, w_care_start=0, h_lump_map={}, w_lump_map={}, h_spend_map={}, w_spend_map={})
+    out = solve_max_spending_scale(d)
+    assert out["scale"] is not None and not out["capped"]
+    k = round(out["scale"] * 1000)
+    grid = [_min_balance(_scaled(d, j / 1000.0)) >= 0 for j in range(max(k - 30, 0), k + 31)]
+    assert grid == [True] * (min(k, 30) + 1) + [False] * 30
+
+
+def test_max_spending_scale_capped_and_none():
+    d = random_households(1, seed=23)[0]
+    d.update(h_now=60, h_die=90, w_now=60, w_die=90, h_lump_map={}, w_lump_map={}, h_spend_map={}, w_spend_map={})
+    d["living_params"] = {nm: dict(m=5.0, g=0.0, after_years=0, m2=5.0, g2=0.0) for nm in ITEMS}
+    # 生活費を20倍（月800万円）にしても、収入のほうが多い
+    rich = dict(d, start_savings=0.0, h_inc_now=5000.0, w_inc_now=5000.0, h_g1=0.0, w_g1=0.0, h_ch_age=0, w_ch_age=0,
+                h_care_m=0.0, w_care_m=0.0)
+    out = solve_max_spending_scale(rich)
+    assert out["capped"] and out["scale"] == SCALE_MAX
+    assert out["min_balance"] >= 0
+
+    # 収入が無く、介護費だけで貯蓄残高がマイナスになる
+    poor = dict(d, h_now=70, h_die=90, w_now=70, w_die=90, start_savings=0.0, h_inc_now=0.0, w_inc_now=0.0,
+                h_care_start=70, h_care_m=30.0)
+    out = solve_max_spending_scale(poor)
+    assert out["scale"] is None and not out["capped"]
+    assert out["min_balance"] < 0
+
+
+# =========================
+# 必要な初期貯蓄額（運用しないとき）
+# =========================
+def test_min_start_savings_is_smallest():
+    checked = 0
+    for d in random_households(150, seed=24):
+        out = solve_min_start_savings(d)
+        need = out["start_savings"]
+        assert _min_balance(dict(d, start_savings=need)) >= 0
+        assert out["gap"] == round(need - d["start_savings"], 1)
+        if need > 0:
+            assert _min_balance(dict(d, start_savings=round(need - 0.1, 1))) < 0
+            checked += 1
+        else:
+            assert _min_balance(dict(d, start_savings=0.0)) >= 0
+    assert checked > 20
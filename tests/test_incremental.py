@@ -0,0 +1,41 @@
+import copy
+import random
+
+from households import random_inputs, random_invest, same_frame
+from lifeplan.engine import calc_lifeplan_result
+from lifeplan.incremental import IncrementalLifePlan
+
+
+# =========================
+# 差分計算 = 全部計算し直した結果
+# =========================
+def _edit(r: random.Random, d: dict) -> dict:
+    # 画面で1か所だけ触ったときのように、入力を1つ変える
+    d = copy.deepcopy(d)
+    other = random_inputs(r)
+    key = r.choice([
+        "start_savings", "h_inc_now", "w_g1", "h_ch_age", "w_inc_after", "single_ratio_pct",
+        "h_care_start", "w_care_m", "h_lump_map", "w_spend_map", "living", "h_die", "w_now", "invest",
+    ])
+    if key == "invest":
+        # 運用する・しないも切り替える
+        d["invest"] = random_invest(r) if r.random() < 0.5 else None
+    elif key == "living":
+        nm = r.choice(list(d["living_params"]))
+        d["living_params"][nm] = other["living_params"][nm]
+    elif key in ("h_die", "w_now"):
+        d["h_now"], d["h_die"], d["w_now"], d["w_die"] = other["h_now"], other["h_die"], other["w_now"], other["w_die"]
+    else:
+        d[key] = other[key]
+    return d
+
+
+def test_incremental_matches_full_recompute():
+    r = random.Random(3)
+    inc = IncrementalLifePlan()
+    d = random_inputs(r)
+    for _ in range(300):
+        d = _edit(r, d)
+        got, want = inc.result(d), calc_lifeplan_result(d)
+        assert same_frame(got.df_long, want.df_long)
+        assert same_frame(got.df_table, want.df_table)
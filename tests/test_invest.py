@@ -0,0 +1,161 @@
+import copy
+import io
+import json
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from households import random_households, random_invest
+from lifeplan.batch import YEAR_COLUMNS, batch_frame, run_batch
+from lifeplan.engine import calc_lifeplan_batch, calc_lifeplan_rows
+from lifeplan.goalseek import solve_min_start_savings
+from lifeplan.invest import BUCKET_ROWS, normalize_invest, run_buckets
+from lifeplan.monthly import MONTH_KEYS, calc_lifeplan_monthly_batch
+
+
+def _buckets_loop(start, cashflow, alloc, ret_pct, order, rebalance, valid):
+    # run_buckets の説明どおりに、1世帯・1年・1口座ずつ進める
+    N, T = cashflow.shape
+    B = alloc.shape[1]
+    total, gain, hold_out = np.zeros((N, T)), np.zeros((N, T)), np.zeros((N, T, B))
+    for i in range(N):
+        hold = [max(start[i], 0.0) * alloc[i, j] for j in range(B)]
+        hold[order[i, 0]] += min(start[i], 0.0)
+        for t in range(T):
+            rate = ret_pct[i, t] if ret_pct.ndim == 3 else ret_pct[i]
+            g = [max(hold[j], 0.0) * (rate[j] / 100.0) if valid[i, t] else 0.0 for j in range(B)]
+            hold = [hold[j] + g[j] for j in range(B)]
+            cf = cashflow[i, t]
+            need = max(-cf, 0.0)
+            for j in order[i]:
+                take = min(max(hold[j], 0.0), need)
+                hold[j] -= take
+                need -= take
+            hold[order[i, 0]] += max(cf, 0.0) - need
+            tot = sum(hold)
+            if rebalance[i] and tot > 0 and valid[i, t]:
+                hold = [tot * alloc[i, j] for j in range(B)]
+            total[i, t], gain[i, t], hold_out[i, t] = tot, sum(g), hold
+    return {"total": total, "gain": gain, "hold": hold_out}
+
+
+def test_run_buckets_matches_loop():
+    rng = np.random.default_rng(5)
+    N, T, B = 200, 40, 3
+    start = rng.uniform(-500, 5000, N)
+    cashflow = rng.uniform(-600, 400, (N, T))
+    alloc = rng.uniform(0, 1, (N, B))
+    alloc /= alloc.sum(axis=1, keepdims=True)
+    order = np.array([rng.permutation(B) for _ in range(N)])
+    rebalance = rng.random(N) < 0.5
+    valid = np.arange(T)[None, :] < rng.integers(1, T + 1, N)[:, None]
+    for ret in [rng.uniform(-2, 6, (N, B)), rng.normal(3, 10, (N, T, B))]:
+        got = run_buckets(start, cashflow, alloc, ret, order, rebalance, valid)
+        want = _buckets_loop(start, cashflow, alloc, ret, order, rebalance, valid)
+        for key in ["total", "gain", "hold"]:
+            np.testing.assert_allclose(got[key], want[key], rtol=1e-12, atol=1e-8)
+
+
+def test_invest_all_cash_without_return_matches_plain():
+    # 全部現金・利回り0 なら、運用しない場合と同じ貯蓄残高になる（残高がマイナスの年があっても）
+    ins = random_households(50, seed=6)
+    plain = calc_lifeplan_batch(ins)
+    r = random.Random(6)
+    for d in ins:
+        d["invest"] = dict(random_invest(r), alloc=[100.0, 0.0, 0.0], ret=[0.0, 0.0, 0.0], order=[0, 1, 2])
+    inv = calc_lifeplan_batch(ins)
+    assert np.array_equal(inv["貯蓄残高"], plain["貯蓄残高"])
+    assert not inv["運用益"].any()
+
+
+# =========================
+# 運用するときのゴールシーク・一括計算・月次
+# =========================
+def _min_balance(d: dict, savings: float) -> float:
+    rows = calc_lifeplan_rows(dict(d, start_savings=savings))
+    return float(rows["貯蓄残高"].min()) if rows["years_len"] else 0.0
+
+
+def test_min_start_savings_with_invest_is_smallest():
+    r = random.Random(12)
+    checked = 0
+    for d in random_households(120, seed=12):
+        d["invest"] = random_invest(r)
+        need = solve_min_start_savings(d)["start_savings"]
+        assert _min_balance(d, need) >= 0
+        if need > 0:
+            assert _min_balance(d, round(need - 0.1, 1)) < 0
+            checked += 1
+    assert checked > 20
+
+
+def test_batch_frame_always_has_invest_columns():
+    ins = random_households(4, seed=13)
+    ins[1]["invest"] = random_invest(random.Random(13))
+    m = calc_lifeplan_batch(ins)
+    for part, ids in [(ins, ["a", "b", "c", "d"]), (ins[2:], ["c", "d"])]:
+        df = batch_frame(part, ids)
+        assert [c for c in df.columns if c in YEAR_COLUMNS] == YEAR_COLUMNS
+    df = batch_frame(ins, ["a", "b", "c", "d"])
+    assert np.array_equal(df.loc[df["id"] == "b", "運用益"].to_numpy(), m["運用益"][1, :m["years_len"][1]])
+    # 運用しない世帯は、運用する世帯と同じまとまりでも別のまとまりでも、運用益0・全部現金
+    plain = batch_frame(ins[2:], ["c", "d"])
+    for df in [df[df["id"].isin(["c", "d"])].reset_index(drop=True), plain]:
+        assert not df["運用益"].any()
+        assert np.array_equal(df[BUCKET_ROWS[0]].to_numpy(), df["貯蓄残高"].to_numpy())
+        assert not df[BUCKET_ROWS[1:]].to_numpy().any()
+
+
+@pytest.mark.parametrize("invest_at", [[0, 1], [4, 5], [2]])
+def test_run_batch_keeps_invest_columns_in_any_order(tmp_path, invest_at):
+    # 運用する世帯が先頭・最後・途中のどこにあっても、列は同じで値も落ちない
+    ins = random_households(6, seed=14)
+    for i in invest_at:
+        ins[i]["invest"] = random_invest(random.Random(14 + i))
+    src = tmp_path / "h.jsonl"
+    src.write_text("".join(json.dumps({k: v for k, v in d.items() if not k.endswith("_map")}) + "\n" for d in ins), encoding="utf-8")
+    out = tmp_path / "out.csv"
+    log = io.StringIO()
+    stats = run_batch(str(src), str(out), chunk_size=1, log=log)
+    df = pd.read_csv(out)
+    whole = batch_frame(ins, [str(i) for i in range(1, 7)])
+    assert list(df.columns) == list(whole.columns)
+    for c in ["貯蓄残高", "運用益"] + BUCKET_ROWS:
+        assert np.allclose(df[c].to_numpy(), whole[c].to_numpy())
+    assert stats["errors"] == 0 and log.getvalue() == ""
+
+
+def test_normalize_invest_rejects_returns_out_of_range():
+    for bad in [{"ret": [0, 0, -150]}, {"ret": [0, 0, 25]}, {"sd": [0, -1, 0]}, {"sd": [0, 0, 60]}]:
+        with pytest.raises(ValueError):
+            normalize_invest(bad)
+    assert normalize_invest({"ret": [-20, 0, 20], "sd": [0, 0, 50]})["ret"] == [-20.0, 0.0, 20.0]
+
+
+def test_min_start_savings_with_negative_returns():
+    # 利回りがマイナスでも、見当を超えた範囲まで広げて必要額を見つける
+    d = random_households(1, seed=16)[0]
+    d.update(h_inc_now=0.0, w_inc_now=0.0, h_inc_after=0.0, w_inc_after=0.0)
+    d["invest"] = {"alloc": [0, 0, 100], "ret": [0, 0, -20], "sd": [0, 0, 0], "order": [2, 0, 1], "rebalance": False}
+    need = solve_min_start_savings(d)["start_savings"]
+    assert need > -_min_balance(d, 0.0)
+    assert _min_balance(d, need) >= 0 and _min_balance(d, round(need - 0.1, 1)) < 0
+
+
+def test_monthly_cash_is_pure_cashflow_with_invest():
+    ins = random_households(40, seed=15)
+    for i, d in enumerate(ins):
+        for j, k in enumerate(MONTH_KEYS):
+            d[k] = (i + j) % 12 + 1
+    plain = calc_lifeplan_monthly_batch(ins)
+    r = random.Random(15)
+    inv_ins = copy.deepcopy(ins)
+    for d in inv_ins:
+        d["invest"] = random_invest(r)
+    inv = calc_lifeplan_monthly_batch(inv_ins)
+    # 運用しても月ごとの収支は変わらない（運用益・丸めの差は12月末の残高だけに入る）
+    assert np.array_equal(inv["cash_m"], plain["cash_m"])
+    N, T = inv["貯蓄残高"].shape
+    assert np.array_equal(inv["bal_m"].reshape(N, T, 12)[:, :, -1], inv["貯蓄残高"])
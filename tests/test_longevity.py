@@ -0,0 +1,40 @@
+import copy
+import random
+
+import numpy as np
+
+from households import random_inputs, random_invest
+from lifeplan.engine import calc_lifeplan_matrix, stack_inputs
+from lifeplan.longevity import run_longevity_grid
+
+
+def _grid_by_matrix(inputs, h_dies, w_dies):
+    # 組み合わせごとに inputs の死亡年齢を変えて calc_lifeplan_matrix で計算し直す
+    ins = []
+    for h in h_dies:
+        for w in w_dies:
+            d = copy.deepcopy(inputs)
+            d["h_die"], d["w_die"] = int(h), int(w)
+            ins.append(d)
+    m = calc_lifeplan_matrix(stack_inputs(ins))
+    n = m["years_len"]
+    bal = np.where(m["valid"], m["貯蓄残高"], np.inf)
+    min_year = np.argmin(bal, axis=1)
+    shape = (len(h_dies), len(w_dies))
+    return {
+        "min_balance": m["貯蓄残高"][np.arange(len(ins)), min_year].reshape(shape),
+        "final_balance": m["貯蓄残高"][np.arange(len(ins)), n - 1].reshape(shape),
+        "min_year": min_year.reshape(shape) + 1,
+    }
+
+
+def test_longevity_grid_matches_per_combination_matrix():
+    r = random.Random(4)
+    for i in range(40):
+        d = random_inputs(r)
+        if i % 2:
+            d["invest"] = random_invest(r)
+        g = run_longevity_grid(d, 75, 95)
+        want = _grid_by_matrix(d, g["h_dies"], g["w_dies"])
+        for key in ["min_balance", "final_balance", "min_year"]:
+            assert np.array_equal(g[key], want[key]), key
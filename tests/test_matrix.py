@@ -0,0 +1,18 @@
+import numpy as np
+
+from households import random_households
+from lifeplan.engine import calc_lifeplan_batch, calc_lifeplan_rows
+
+
+# =========================
+# N世帯をまとめた計算 = 1世帯ずつの計算
+# =========================
+def test_batch_matches_one_by_one():
+    ins = random_households(60, seed=2)
+    m = calc_lifeplan_batch(ins)
+    for i, d in enumerate(ins):
+        rows = calc_lifeplan_rows(d)
+        n = rows["years_len"]
+        assert int(m["years_len"][i]) == n
+        for label in ["収入合計", "支出合計", "現金収支", "貯蓄残高"]:
+            assert np.array_equal(m[label][i, :n], rows[label])
@@ -0,0 +1,45 @@
+import random
+
+import numpy as np
+
+from households import random_households, random_invest
+from lifeplan.engine import calc_lifeplan_result
+from lifeplan.montecarlo import run_monte_carlo
+
+
+def test_no_spread_collapses_to_deterministic_balance():
+    r = random.Random(41)
+    for i, d in enumerate(random_households(30, seed=41)):
+        if i % 3 == 0:
+            # 運用しても、ばらつき0なら利回りは期待利回りのまま
+            d["invest"] = dict(random_invest(r), sd=[0.0, 0.0, 0.0])
+        bal = calc_lifeplan_result(d).row("貯蓄残高")
+        out = run_monte_carlo(d, n_paths=50, rate_sd=0.0, die_sd=0.0, seed=i, chunk_size=16)
+        bands = out["bands"]
+        assert len(bands) == len(bal)
+        for col in ["5%点(万円)", "中央値(万円)", "95%点(万円)"]:
+            # 経路の残高は float32 で持つ
+            np.testing.assert_allclose(bands[col].to_numpy(), bal, rtol=1e-6, atol=0.1)
+        assert out["prob_negative"] == float((bal < 0).any())
+        assert np.array_equal(out["prob_negative_by_year"], (bal < 0).astype(float))
+
+
+def test_results_do_not_depend_on_chunk_size():
+    r = random.Random(42)
+    for i, d in enumerate(random_households(6, seed=42)):
+        if i % 2:
+            d["invest"] = random_invest(r)
+        runs = [run_monte_carlo(d, n_paths=300, rate_sd=1.5, die_sd=3.0, seed=7, chunk_size=cs) for cs in [1, 64, 300, 1000]]
+        for out in runs[1:]:
+            assert out["bands"].equals(runs[0]["bands"])
+            assert out["prob_negative"] == runs[0]["prob_negative"]
+
+
+def test_probabilities_in_range():
+    for i, d in enumerate(random_households(10, seed=43)):
+        out = run_monte_carlo(d, n_paths=200, rate_sd=2.0, die_sd=4.0, seed=i)
+        assert 0.0 <= out["prob_negative"] <= 1.0
+        p = out["prob_negative_by_year"]
+        assert ((p >= 0) & (p <= 1)).all()
+        assert (out["bands"]["5%点(万円)"] <= out["bands"]["中央値(万円)"]).all()
+        assert (out["bands"]["中央値(万円)"] <= out["bands"]["95%点(万円)"]).all()
@@ -0,0 +1,101 @@
+import copy
+import random
+
+import numpy as np
+
+from households import random_households, random_inputs
+from lifeplan.batch import batch_frame
+from lifeplan.engine import calc_lifeplan_batch, stack_inputs
+from lifeplan.goalseek import solve_min_start_savings
+from lifeplan.inputs import normalize_record
+from lifeplan.longevity import run_longevity_grid
+from lifeplan.montecarlo import run_monte_carlo
+from lifeplan.monthly import (
+    MONTH_KEYS, MONTHS, calc_lifeplan_monthly, calc_lifeplan_monthly_batch, calc_lifeplan_monthly_matrix, stack_months,
+)
+from lifeplan.sensitivity import run_sensitivity
+from lifeplan.share import inputs_from_token, inputs_to_token
+
+
+def test_monthly_all_january_matches_annual():
+    # 全部 1月から切り替わるなら、年にまとめた行は年次計算と末尾ビットまで同じ
+    ins = random_households(300, seed=7)
+    annual = calc_lifeplan_batch(ins)
+    for d in ins:
+        for k in MONTH_KEYS:
+            d[k] = 1
+    for monthly in [calc_lifeplan_monthly_batch(ins), calc_lifeplan_monthly_matrix(stack_inputs(ins))]:
+        for key, v in annual.items():
+            assert np.array_equal(monthly[key], v), key
+
+
+def test_monthly_year_end_matches_table():
+    ins = random_households(100, seed=8)
+    for i, d in enumerate(ins):
+        for j, k in enumerate(MONTH_KEYS):
+            d[k] = (i + 3 * j) % MONTHS + 1
+    m = calc_lifeplan_monthly_matrix(stack_inputs(ins), stack_months(ins))
+    N, T = m["貯蓄残高"].shape
+    assert np.array_equal(m["bal_m"].reshape(N, T, MONTHS)[:, :, -1], m["貯蓄残高"])
+
+
+# =========================
+# 月の入力は一括計算・保存・ほかの分析にも効く
+# =========================
+def _monthly_household(seed: int) -> dict:
+    # 年の途中で収入・介護が変わる世帯（期間内に変更年齢・介護開始年齢がある）
+    r = random.Random(seed)
+    d = random_inputs(r)
+    d.update(h_now=62, h_die=88, w_now=60, w_die=92, h_ch_age=65, w_ch_age=63, h_care_start=80, w_care_start=85)
+    d.update(h_inc_now=500.0, w_inc_now=200.0, start_savings=1000.0)
+    d.update(h_ch_month=10, w_ch_month=4, h_care_month=7, w_care_month=2)
+    return d
+
+
+def test_normalize_record_and_share_keep_months():
+    d = _monthly_household(9)
+    rec = {k: v for k, v in d.items() if not k.endswith("_map")}
+    rec["h_ch_month"], rec["w_care_month"] = "10", 13
+    inputs = normalize_record(rec)
+    assert [inputs[k] for k in MONTH_KEYS] == [10, 4, 7, 12]
+    back = inputs_from_token(inputs_to_token(inputs))
+    assert [back[k] for k in MONTH_KEYS] == [10, 4, 7, 12]
+    assert not any(k in normalize_record({k: v for k, v in rec.items() if k not in MONTH_KEYS}) for k in MONTH_KEYS)
+
+
+def test_batch_frame_uses_monthly():
+    ins = [_monthly_household(10)] + random_households(5, seed=10)
+    df = batch_frame(ins, [str(i) for i in range(len(ins))])
+    m = calc_lifeplan_monthly_batch(ins)
+    a = calc_lifeplan_batch(ins)
+    for i in range(len(ins)):
+        got = df.loc[df["id"] == str(i), "貯蓄残高"].to_numpy()
+        n = int(m["years_len"][i])
+        assert np.array_equal(got, m["貯蓄残高"][i, :n])
+        if i > 0:
+            assert np.array_equal(got, a["貯蓄残高"][i, :n])
+    assert not np.array_equal(m["貯蓄残高"][0], a["貯蓄残高"][0])
+
+
+def test_analyses_use_monthly():
+    d = _monthly_household(11)
+    table = calc_lifeplan_monthly(d)["result"].row("貯蓄残高")
+    annual = copy.deepcopy(d)
+    for k in MONTH_KEYS:
+        del annual[k]
+
+    assert run_sensitivity(d)["base_min"] == float(table.min())
+    assert run_sensitivity(annual)["base_min"] != float(table.min())
+
+    mc = run_monte_carlo(d, n_paths=20, rate_sd=0.0, seed=0)
+    assert np.allclose(mc["bands"]["中央値(万円)"].to_numpy(), table)
+
+    g = run_longevity_grid(d, 85, 95)
+    i, j = list(g["h_dies"]).index(d["h_die"]), list(g["w_dies"]).index(d["w_die"])
+    assert g["min_balance"][i, j] == float(table.min())
+    assert g["final_balance"][i, j] == float(table[-1])
+
+    need = solve_min_start_savings(dict(d, h_inc_now=0.0, w_inc_now=0.0))["start_savings"]
+    assert need > 0
+    ok = lambda s: calc_lifeplan_monthly(dict(d, h_inc_now=0.0, w_inc_now=0.0, start_savings=s))["result"].row("貯蓄残高").min() >= 0
+    assert ok(need) and not ok(round(need - 0.1, 1))
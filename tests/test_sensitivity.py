@@ -0,0 +1,49 @@
+import copy
+
+import numpy as np
+
+from households import random_households
+from lifeplan.engine import INT_KEYS, ITEMS, calc_lifeplan_result
+from lifeplan.sensitivity import run_sensitivity
+
+
+def _min_final(d: dict):
+    bal = calc_lifeplan_result(d).row("貯蓄残高")
+    return (float(bal.min()), float(bal[-1])) if len(bal) else (np.inf, 0.0)
+
+
+def _bumped(d: dict, key: str, value: float) -> dict:
+    # run_sensitivity の表の「キー」（"h_inc_now" や "living_m[食費]"）の入力を value にした inputs
+    d = copy.deepcopy(d)
+    if key.startswith("living_"):
+        name, nm = key[len("living_"):-1].split("[")
+        d["living_params"][nm][name] = int(value) if name == "after_years" else value
+    else:
+        d[key] = int(value) if key in INT_KEYS else value
+    return d
+
+
+def test_sensitivity_matches_separate_runs():
+    for d in random_households(12, seed=31):
+        out = run_sensitivity(d)
+        base_min, base_final = _min_final(d)
+        assert (out["base_min"], out["base_final"]) == (base_min, base_final)
+        for row in out["table"].itertuples(index=False):
+            key = row[1]
+            for value, d_min, d_final in [(row[3], row[5], row[7]), (row[4], row[6], row[8])]:
+                m, f = _min_final(_bumped(d, key, value))
+                assert d_min == round(m - base_min, 1), key
+                assert d_final == round(f - base_final, 1), key
+
+
+def test_sensitivity_table_sorted_and_skips_unused():
+    d = random_households(1, seed=32)[0]
+    d.update(h_ch_age=0, w_care_start=0, h_inc_now=0.0)
+    table = run_sensitivity(d)["table"]
+    keys = list(table["キー"])
+    # 変更年齢が0なら変更後年収・上昇率は効かないので除く。金額0も除く
+    assert not {"h_inc_after", "h_g2", "h_ch_age", "w_care_m", "w_care_g", "w_care_start", "h_inc_now"} & set(keys)
+    assert len(keys) == len(set(keys))
+    swing = list(zip(table["振れ幅(最低残高)"], table["振れ幅(最終残高)"]))
+    assert swing == sorted(swing, reverse=True)
+    assert all(f"living_m[{nm}]" in keys for nm in ITEMS if d["living_params"][nm]["m"] != 0)
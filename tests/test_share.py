@@ -0,0 +1,59 @@
+import json
+import random
+
+import pytest
+
+from households import random_households, random_invest
+from lifeplan.cache import inputs_hash
+from lifeplan.monthly import MONTH_KEYS
+from lifeplan.share import (
+    SHARE_VERSION, encode_inputs, decode_inputs, inputs_from_json, inputs_from_token, inputs_to_json, inputs_to_token,
+)
+
+
+def _households():
+    r = random.Random(51)
+    out = random_households(40, seed=51)
+    for i, d in enumerate(out):
+        if i % 3 == 1:
+            d["invest"] = random_invest(r)
+        if i % 4 == 2:
+            d.update({k: r.randint(1, 12) for k in MONTH_KEYS})
+    return out
+
+
+def test_token_and_json_round_trip_keep_cache_hash():
+    for d in _households():
+        assert inputs_hash(inputs_from_token(inputs_to_token(d))) == inputs_hash(d)
+        assert inputs_hash(inputs_from_json(inputs_to_json(d))) == inputs_hash(d)
+
+
+def test_token_is_url_safe():
+    for d in _households():
+        token = inputs_to_token(d)
+        assert set(token) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+def test_rejects_unknown_version_and_format():
+    d = _households()[0]
+    payload = encode_inputs(d)
+    with pytest.raises(ValueError):
+        decode_inputs(dict(payload, v=SHARE_VERSION + 1))
+    with pytest.raises(ValueError):
+        decode_inputs(dict(payload, f="something-else"))
+    with pytest.raises(ValueError):
+        decode_inputs(dict(payload, s=payload["s"][:-1]))
+    with pytest.raises(ValueError):
+        decode_inputs({k: v for k, v in payload.items() if k != "lv"})
+    with pytest.raises(ValueError):
+        decode_inputs([payload])
+
+
+def test_rejects_corrupted_token_and_json():
+    token = inputs_to_token(_households()[0])
+    for bad in [token[:-5], token[:10] + "!!" + token[12:], "", "not-a-token"]:
+        with pytest.raises(ValueError):
+            inputs_from_token(bad)
+    for bad in ["{", "[]", json.dumps({"f": "lifeplan-inputs"})]:
+        with pytest.raises(ValueError):
+            inputs_from_json(bad)